@@ -0,0 +1,69 @@
+# NB: Кэш решений на «живом» трафике: запросы с повторами (распределение Ципфа).
+# Запуск: python3 benchmarks/bench_cache.py --n 50000 --d 32 --requests 5000 --unique 500
+
+from __future__ import annotations
+from pathlib import Path
+import argparse, sys, time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.cache import QueryCache  # noqa: E402
+from ml_justify.model import Model  # noqa: E402
+from ml_justify.scaling import fit_scaling, transform_matrix  # noqa: E402
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark: query cache")
+    p.add_argument("--n", type=int, default=50000)
+    p.add_argument("--d", type=int, default=32)
+    p.add_argument("--requests", type=int, default=3000)
+    p.add_argument("--unique", type=int, default=300)
+    p.add_argument("--zipf", type=float, default=1.3)
+    p.add_argument("--top-k", type=int, default=10)
+    p.add_argument("--cache-mb", type=float, default=16)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    X = rng.random((args.n, args.d))
+    info = fit_scaling("minmax", X)
+    refs = {
+        "class_ids": [f"c{i % 10}" for i in range(args.n)],
+        "raw": X,
+        "scaled": transform_matrix(info, X),
+        "scale_info": info,
+        "strict": True,
+        "d": args.d,
+        "stats": None,
+        "fingerprint": None,
+        "index": None,
+    }
+    cfg = {"metric": "L2", "delta_max": 0.5, "tie_break": "first", "scale": "minmax"}
+    files = {"refs": None, "index": None, "query": None, "config": None, "val": None}
+    pool = rng.random((args.unique, args.d)).tolist()
+    picks = np.minimum(rng.zipf(args.zipf, args.requests), args.unique) - 1
+    traffic = [pool[i] for i in picks.tolist()]
+
+    print(f"N={args.n} d={args.d} requests={args.requests} unique={args.unique}")
+    for name, cache in (
+        ("no cache", None),
+        (f"cache {args.cache_mb:g} MB", QueryCache(int(args.cache_mb * 2**20))),
+    ):
+        model = Model(cfg, refs, files, cache=cache)
+        t0 = time.perf_counter()
+        for q in traffic:
+            model.classify(q, top_k=args.top_k)
+        t = time.perf_counter() - t0
+        extra = ""
+        if cache is not None:
+            st = cache.stats()
+            extra = f" | hit rate {st['hit_rate']:.1%} | {st['bytes'] / 2**20:.2f} MB"
+        print(f"{name:<14} {len(traffic) / t:9.1f} req/s{extra}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
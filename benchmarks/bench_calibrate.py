@@ -0,0 +1,64 @@
+# NB: Поиск порога в calibrate: прежний перебор O(n²) против sweep O(n log n).
+# Запуск: python3 benchmarks/bench_calibrate.py --sizes 1000 10000 100000 1000000 5000000
+# Прежний алгоритм гоняю только до --legacy-max строк (дальше он часами).
+
+from __future__ import annotations
+from pathlib import Path
+import argparse, sys, time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.calibrate import sweep_thresholds  # noqa: E402
+
+
+def legacy_search(dists, correct, min_coverage):
+    # NB: копия прежнего цикла из calibrate_delta — только для сравнения
+    stats = [{"dist": d, "ok": c} for d, c in zip(dists, correct)]
+    dists_sorted = sorted(set(dists))
+    best = None
+    for thr in dists_sorted + [dists_sorted[-1] * 1.01]:
+        decided = [s for s in stats if s["dist"] <= thr]
+        coverage = len(decided) / len(stats)
+        if coverage < min_coverage:
+            continue
+        acc = sum(1 for s in decided if s["ok"]) / len(decided)
+        if best is None or (acc, -thr) > best[1]:
+            best = (float(thr), (acc, -thr))
+    return best
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark: calibrate threshold search")
+    p.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 3000, 100000, 1000000]
+    )
+    p.add_argument("--legacy-max", type=int, default=3000)
+    p.add_argument("--coverage", type=float, default=0.9)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    for n in args.sizes:
+        dists = rng.gamma(2.0, 0.1, size=n)
+        # NB: чем дальше, тем чаще ошибаемся — как в жизни
+        correct = rng.random(n) > dists / (dists.max() + 1e-12)
+        t0 = time.perf_counter()
+        best = sweep_thresholds(dists, correct, args.coverage)
+        t_sweep = time.perf_counter() - t0
+        line = f"n={n:>9}: sweep {t_sweep * 1e3:9.1f} ms (δ*={best['delta']:.6g})"
+        if n <= args.legacy_max:
+            dl, cl = dists.tolist(), correct.tolist()
+            t0 = time.perf_counter()
+            old = legacy_search(dl, cl, args.coverage)
+            t_old = time.perf_counter() - t0
+            assert old[0] == best["delta"]
+            line += f" | legacy {t_old * 1e3:9.1f} ms (x{t_old / t_sweep:7.1f})"
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,96 @@
+# NB: Ближайшие эталоны для валидации в калибровке: прежний путь (строки
+# дистанций блоками запросов x все N + tuple на строку) против тайлов
+# val x эталоны с бегущим min/argmin (DistanceEngine.nearest).
+# Время, пик памяти (tracemalloc) и прикидка на --target-m x --target-n
+# по пропускной способности (пар/с) самого большого прогона.
+# Запуск: python3 benchmarks/bench_calibrate_blocked.py --m 20000 --n 20000 200000 --d 16 --workers 1 4
+
+from __future__ import annotations
+from pathlib import Path
+import argparse, sys, time, tracemalloc
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.calibrate import validation_nearest  # noqa: E402
+from ml_justify.metrics import BLOCK_ELEMS, get_metric  # noqa: E402
+
+
+def legacy_nearest(Q, R, labels, engine):
+    # NB: копия прежнего decide_block (только решение) — для сравнения
+    step = max(1, BLOCK_ELEMS // max(1, R.shape[0]))
+    out = []
+    for s in range(0, Q.shape[0], step):
+        D = engine.pairwise(Q[s : s + step], R)
+        idxs = D.argmin(axis=1)
+        mins = D[range(len(idxs)), idxs]
+        for m, idx in zip(mins.tolist(), idxs.tolist()):
+            out.append((m, labels[idx], idx))
+    return out
+
+
+def _run(fn):
+    t0 = time.perf_counter()
+    res = fn()
+    sec = time.perf_counter() - t0
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return res, sec, peak
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark: blocked nearest for calibration")
+    p.add_argument("--m", type=int, nargs="+", default=[20000], help="Размер валидации")
+    p.add_argument("--n", type=int, nargs="+", default=[20000, 100000], help="Число эталонов")
+    p.add_argument("--d", type=int, default=16)
+    p.add_argument("--metric", default="L2")
+    p.add_argument("--workers", type=int, nargs="+", default=[1])
+    p.add_argument("--legacy-max", type=int, default=10**9, help="Прежний путь — только до стольких M*N")
+    p.add_argument("--target-m", type=int, default=1_000_000)
+    p.add_argument("--target-n", type=int, default=1_000_000)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    engine = get_metric(args.metric)[0]
+    rng = np.random.default_rng(args.seed)
+    rate = {}
+    for m in args.m:
+        for n in args.n:
+            R = rng.random((n, args.d))
+            V = rng.random((m, args.d))
+            labels = [f"c{i % 10}" for i in range(n)]
+            val_labels = [f"c{i % 10}" for i in range(m)]
+            print(f"M={m} N={n} d={args.d} {args.metric}:")
+            ref = None
+            if m * n <= args.legacy_max:
+                ref, sec, peak = _run(lambda: legacy_nearest(V, R, labels, engine))
+                print(f"  legacy         {sec:8.2f} s  peak {peak / 2**20:8.1f} MiB")
+            for w in args.workers:
+                (dists, _ok, pred), sec, peak = _run(
+                    lambda: validation_nearest(labels, R, val_labels, V, engine, w)
+                )
+                if ref is not None:
+                    assert np.array_equal(dists, [r[0] for r in ref])
+                    assert list(pred) == [r[1] for r in ref]
+                rate[w] = m * n / sec
+                print(
+                    f"  tiled w={w:<3}    {sec:8.2f} s  peak {peak / 2**20:8.1f} MiB"
+                    f"  ({m * n / sec / 1e6:.0f}M pairs/s)"
+                )
+    pairs = args.target_m * args.target_n
+    for w, r in rate.items():
+        print(
+            f"≈ {args.target_m} x {args.target_n} with workers={w}: {pairs / r / 3600:.1f} h "
+            f"(memory: val arrays only, ~{args.target_m * 40 / 2**20:.0f} MiB)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,73 @@
+# NB: Сжатие эталонов: во сколько раз меньше набор, сколько стоит само сжатие,
+# во сколько раз быстрее пакетная классификация и сколько решений меняется.
+# Запуск: python3 benchmarks/bench_condense.py --n 50000 --d 16 --classes 10 --delta 0.4
+
+from __future__ import annotations
+from pathlib import Path
+import argparse, sys, time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.condense import compare_decisions, condense_references  # noqa: E402
+from ml_justify.decision import decide_block  # noqa: E402
+from ml_justify.metrics import get_metric  # noqa: E402
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark: reference condensation")
+    p.add_argument("--n", type=int, default=50000)
+    p.add_argument("--d", type=int, default=16)
+    p.add_argument("--classes", type=int, default=10)
+    p.add_argument("--noise", type=float, default=0.1)
+    p.add_argument("--delta", type=float, default=0.4)
+    p.add_argument("--queries", type=int, default=5000)
+    p.add_argument("--reduce", action="store_true")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    centers = rng.random((args.classes, args.d))
+
+    def sample(m):
+        y = rng.integers(0, args.classes, m)
+        return centers[y] + rng.normal(scale=args.noise, size=(m, args.d)), [f"c{k}" for k in y]
+
+    X, labels = sample(args.n)
+    V, val_labels = sample(args.queries)
+    metric_fn, _ = get_metric("L2")
+
+    t0 = time.perf_counter()
+    res = condense_references(labels, X, metric_fn, args.delta, reduce=args.reduce)
+    t_cond = time.perf_counter() - t0
+    keep = res["keep"]
+    print(
+        f"n={args.n} d={args.d} classes={args.classes} δ={args.delta}: "
+        f"{res['n_refs']} → {res['n_kept']} refs (x{res['reduction']:.1f}) in {t_cond:.2f}s"
+    )
+
+    small = [labels[i] for i in keep]
+    Xs = X[keep]
+    t0 = time.perf_counter()
+    decide_block(V, X, labels, metric_fn)
+    t_full = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    decide_block(V, Xs, small, metric_fn)
+    t_small = time.perf_counter() - t0
+    print(
+        f"  {args.queries} queries: full {t_full * 1e3:.1f} ms, condensed {t_small * 1e3:.1f} ms "
+        f"(x{t_full / t_small:.1f})"
+    )
+    cmp = compare_decisions(labels, X, keep, V, val_labels, metric_fn, args.delta)
+    print(
+        f"  changed decisions: {cmp['changed']}/{cmp['n_val']} | "
+        f"coverage {cmp['full']['coverage']:.2%} → {cmp['condensed']['coverage']:.2%}, "
+        f"acc {cmp['full']['accuracy_on_decided']:.2%} → {cmp['condensed']['accuracy_on_decided']:.2%}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,70 @@
+# NB: Выбор рабочей точки: calibrate_delta заново на каждое значение coverage
+# против calibrate_sweep (ближайшие дистанции валидации — один раз на всю сетку)
+# и стоимость перевыборок (bootstrap) в 1 и в N процессов.
+# Запуск: python3 benchmarks/bench_coverage_sweep.py --n-refs 5000 --n-val 5000 --d 16 --grid 10
+
+from __future__ import annotations
+from pathlib import Path
+import argparse, sys, time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.calibrate import (  # noqa: E402
+    calibrate_delta,
+    calibrate_sweep,
+    coverage_sweep,
+    validation_nearest,
+)
+from ml_justify.metrics import get_metric  # noqa: E402
+from ml_justify.parallel import default_workers  # noqa: E402
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark: coverage sweep calibration")
+    p.add_argument("--n-refs", type=int, default=5000)
+    p.add_argument("--n-val", type=int, default=5000)
+    p.add_argument("--d", type=int, default=16)
+    p.add_argument("--classes", type=int, default=10)
+    p.add_argument("--grid", type=int, default=10, help="Точек сетки coverage в [0.5, 0.99]")
+    p.add_argument("--n-boot", type=int, default=200)
+    p.add_argument("--workers", type=int, default=0, help="0 — по числу ядер")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    centers = rng.random((args.classes, args.d))
+    ref_y = rng.integers(0, args.classes, args.n_refs)
+    val_y = rng.integers(0, args.classes, args.n_val)
+    R = centers[ref_y] + rng.normal(scale=0.15, size=(args.n_refs, args.d))
+    V = centers[val_y] + rng.normal(scale=0.15, size=(args.n_val, args.d))
+    ref_labels = [f"c{k}" for k in ref_y]
+    val_labels = [f"c{k}" for k in val_y]
+    metric_fn, _ = get_metric("L2")
+    grid = np.linspace(0.5, 0.99, args.grid).tolist()
+    workers = args.workers or default_workers()
+    print(f"refs={args.n_refs} val={args.n_val} d={args.d} grid={len(grid)} workers={workers}")
+
+    t0 = time.perf_counter()
+    old = [calibrate_delta(ref_labels, R, val_labels, V, metric_fn, min_coverage=c) for c in grid]
+    t_old = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    sweep = calibrate_sweep(ref_labels, R, val_labels, V, metric_fn, grid)
+    t_new = time.perf_counter() - t0
+    assert [o["chosen_delta"] for o in old] == [g["delta"] for g in sweep["grid"]]
+    print(f"  calibrate_delta x{len(grid)}: {t_old * 1e3:9.1f} ms")
+    print(f"  calibrate_sweep:        {t_new * 1e3:9.1f} ms  (x{t_old / t_new:.1f})")
+
+    dists, correct, _ = validation_nearest(ref_labels, R, val_labels, V, metric_fn)
+    for w in sorted({1, workers}):
+        t0 = time.perf_counter()
+        coverage_sweep(dists, correct, grid, resample="bootstrap", n_boot=args.n_boot, workers=w)
+        dt = time.perf_counter() - t0
+        print(f"  bootstrap x{args.n_boot}, workers={w}: {dt * 1e3:9.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
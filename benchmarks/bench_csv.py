@@ -0,0 +1,57 @@
+# NB: Разбор refs.csv: обычный csv-путь (load_refs_csv / load_refs_array python)
+# против быстрого pyarrow-пути. Файл генерирую синтетический.
+# Запуск: python3 benchmarks/bench_csv.py --n 100000 --d 64
+
+from __future__ import annotations
+from pathlib import Path
+import argparse, importlib.util, sys, tempfile, time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.data_io import load_refs_csv, load_refs_array  # noqa: E402
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark: refs.csv parsers")
+    p.add_argument("--n", type=int, default=100000)
+    p.add_argument("--d", type=int, default=64)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "refs.csv"
+        X = rng.random((args.n, args.d))
+        with path.open("w", encoding="utf-8") as f:
+            f.write("class_id," + ",".join(f"p{j + 1}" for j in range(args.d)) + "\n")
+            for i, row in enumerate(X.tolist()):
+                f.write(f"c{i % 10}," + ",".join(map(repr, row)) + "\n")
+        size_mb = path.stat().st_size / 1e6
+        print(f"N={args.n} d={args.d} file={size_mb:.1f} MB")
+
+        runs = [
+            ("load_refs_csv (lists)", lambda: load_refs_csv(path)),
+            ("load_refs_array python", lambda: load_refs_array(path, parser="python")),
+        ]
+        if importlib.util.find_spec("pyarrow") is not None:
+            runs.append(
+                ("load_refs_array pyarrow", lambda: load_refs_array(path, parser="pyarrow"))
+            )
+        else:
+            print("pyarrow is not installed — fast path skipped")
+
+        base = None
+        for name, fn in runs:
+            t0 = time.perf_counter()
+            fn()
+            t = time.perf_counter() - t0
+            base = base or t
+            print(f"{name:>26}: {t:7.2f} s  {size_mb / t:7.1f} MB/s  (x{base / t:5.1f})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,59 @@
+# NB: Сравниваю попарные l1/l2/linf (чистый Python) с DistanceEngine (NumPy).
+# Запуск: python3 benchmarks/bench_distances.py --n 20000 --d 128 --queries 16
+# Попарный вариант на полном N очень долгий — меряю на --pair-n эталонах
+# и экстраполирую линейно (он строго O(N·d)).
+
+from __future__ import annotations
+from pathlib import Path
+import argparse, sys, time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.metrics import get_metric  # noqa: E402
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark: per-pair vs matrix distances")
+    p.add_argument("--n", type=int, default=20000)
+    p.add_argument("--d", type=int, default=128)
+    p.add_argument("--queries", type=int, default=16)
+    p.add_argument("--pair-n", type=int, default=2000)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    R = rng.random((args.n, args.d))
+    Q = rng.random((args.queries, args.d))
+    R_list = R[: args.pair_n].tolist()
+    q_list = Q[0].tolist()
+
+    print(f"N={args.n} d={args.d} queries={args.queries}")
+    for name in ("L1", "L2", "Linf"):
+        engine, pretty = get_metric(name)
+        t_pair = _best_of(lambda: [engine(q_list, r) for r in R_list], 1)
+        t_pair *= args.n / len(R_list)
+        t_one = _best_of(lambda: engine.to_refs(Q[0], R), args.repeat)
+        t_blk = _best_of(lambda: engine.pairwise(Q, R), args.repeat) / len(Q)
+        print(
+            f"{pretty:>4}: per-pair {t_pair * 1e3:9.1f} ms/query | "
+            f"to_refs {t_one * 1e3:7.2f} ms/query (x{t_pair / t_one:6.1f}) | "
+            f"pairwise {t_blk * 1e3:7.2f} ms/query (x{t_pair / t_blk:6.1f})"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
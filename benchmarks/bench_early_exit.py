@@ -0,0 +1,60 @@
+# NB: Режим «только решение» с ранним выходом против полного перебора, большие d.
+# Данные — кластеры с разной дисперсией признаков (как у реальных эмбеддингов/фич).
+# Запуск: python3 benchmarks/bench_early_exit.py --n 50000 --d 256 --queries 300
+
+from __future__ import annotations
+from pathlib import Path
+import argparse, sys, time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.decision import nearest_classes  # noqa: E402
+from ml_justify.early_exit import PartialDistanceSearch  # noqa: E402
+from ml_justify.metrics import get_metric  # noqa: E402
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark: early-exit partial distances")
+    p.add_argument("--n", type=int, default=50000)
+    p.add_argument("--d", type=int, default=256)
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--clusters", type=int, default=50)
+    p.add_argument("--metrics", nargs="+", default=["L1", "L2", "Linf"])
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    spread = np.sort(rng.random(args.d))[::-1] * 2.0
+    centers = rng.standard_normal((args.clusters, args.d)) * spread
+    lab = rng.integers(0, args.clusters, args.n)
+    R = centers[lab] + rng.standard_normal((args.n, args.d)) * 0.3 * spread
+    Q = centers[rng.integers(0, args.clusters, args.queries)]
+    Q = Q + rng.standard_normal(Q.shape) * 0.3 * spread
+    labels = [f"c{c}" for c in lab.tolist()]
+
+    t0 = time.perf_counter()
+    search = PartialDistanceSearch.build(R)
+    print(f"N={args.n} d={args.d} queries={args.queries} | build {time.perf_counter() - t0:.2f} s")
+    for name in args.metrics:
+        engine, _ = get_metric(name)
+        t0 = time.perf_counter()
+        full = nearest_classes(Q, R, labels, engine)
+        t_full = time.perf_counter() - t0
+        delta = float(np.percentile([m for m, _c, _i in full], 50))
+        for label, max_dist in (("no delta", None), ("delta=p50", delta)):
+            t0 = time.perf_counter()
+            got = nearest_classes(Q, R, labels, engine, tree=search, max_dist=max_dist)
+            t = time.perf_counter() - t0
+            ok = all(g == f for g, f in zip(got, full) if g[2] >= 0)
+            print(
+                f"{name:<5} {label:<10} full {t_full:6.2f} s | early-exit {t:6.2f} s "
+                f"(x{t_full / t:4.1f}) | same winners: {ok}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,58 @@
+# NB: KD-дерево против полного перебора DistanceEngine на одном запросе.
+# Запуск: python3 benchmarks/bench_kdtree.py --n 200000 --d 8 --queries 200
+# С --delta показывает ещё и раннее отсечение «undecided» запросов.
+
+from __future__ import annotations
+from pathlib import Path
+import argparse, sys, time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.metrics import get_metric  # noqa: E402
+from ml_justify.kdtree import KDTree  # noqa: E402
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark: KD-tree vs brute force")
+    p.add_argument("--n", type=int, default=200000)
+    p.add_argument("--d", type=int, default=8)
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--delta", type=float, default=0.05)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    R = rng.random((args.n, args.d))
+    Q = rng.random((args.queries, args.d))
+
+    t0 = time.perf_counter()
+    tree = KDTree.build(R)
+    print(f"N={args.n} d={args.d} | build {time.perf_counter() - t0:.2f}s")
+
+    for name in ("L1", "L2", "Linf"):
+        engine, pretty = get_metric(name)
+        t0 = time.perf_counter()
+        for q in Q:
+            engine.to_refs(q, R).argmin()
+        t_brute = (time.perf_counter() - t0) / len(Q)
+        t0 = time.perf_counter()
+        for q in Q:
+            tree.nearest(q, engine)
+        t_tree = (time.perf_counter() - t0) / len(Q)
+        t0 = time.perf_counter()
+        for q in Q:
+            tree.nearest(q, engine, max_dist=args.delta)
+        t_cut = (time.perf_counter() - t0) / len(Q)
+        print(
+            f"{pretty:>4}: brute {t_brute * 1e3:7.2f} ms | tree {t_tree * 1e3:7.2f} ms "
+            f"(x{t_brute / t_tree:5.1f}) | tree+delta {t_cut * 1e3:7.2f} ms "
+            f"(x{t_brute / t_cut:5.1f})"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
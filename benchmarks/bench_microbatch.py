@@ -0,0 +1,111 @@
+# NB: Много одновременных клиентов: обычный serve (поток на запрос) против
+# asyncio-фронта с микро-батчингом. Смотрим req/s и хвосты задержки.
+# Запуск: python3 benchmarks/bench_microbatch.py --n 50000 --d 32 --clients 32 --windows 0 1 2 5
+
+from __future__ import annotations
+from pathlib import Path
+import argparse, asyncio, http.client, json, sys, threading, time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.microbatch import start_async_server  # noqa: E402
+from ml_justify.model import Model  # noqa: E402
+from ml_justify.scaling import fit_scaling, transform_matrix  # noqa: E402
+from ml_justify.server import make_server  # noqa: E402
+
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100 * (len(xs) - 1))))]
+
+
+def _load(addr, Q, clients, top_k):
+    lat, lock = [], threading.Lock()
+    per = len(Q) // clients
+
+    def client(c):
+        conn = http.client.HTTPConnection(*addr)
+        mine = []
+        for q in Q[c * per : (c + 1) * per]:
+            body = json.dumps({"vector": q, "top_k": top_k})
+            t0 = time.perf_counter()
+            conn.request("POST", "/classify", body)
+            conn.getresponse().read()
+            mine.append((time.perf_counter() - t0) * 1e3)
+        with lock:
+            lat.extend(mine)
+
+    t0 = time.perf_counter()
+    ts = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    return lat, time.perf_counter() - t0
+
+
+def _report(name, lat, wall):
+    print(
+        f"{name:<22} {len(lat) / wall:8.0f} req/s | p50 {_pct(lat, 50):7.2f} ms | "
+        f"p99 {_pct(lat, 99):7.2f} ms"
+    )
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark: micro-batching front end")
+    p.add_argument("--n", type=int, default=20000)
+    p.add_argument("--d", type=int, default=32)
+    p.add_argument("--requests", type=int, default=2000)
+    p.add_argument("--clients", type=int, default=16)
+    p.add_argument("--top-k", type=int, default=5)
+    p.add_argument("--windows", type=float, nargs="+", default=[0.0, 1.0, 2.0, 5.0])
+    p.add_argument("--max-batch", type=int, default=64)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    X = rng.random((args.n, args.d))
+    labels = [f"c{i % 10}" for i in range(args.n)]
+    info = fit_scaling("minmax", X)
+    refs = {
+        "class_ids": labels,
+        "raw": X,
+        "scaled": transform_matrix(info, X),
+        "scale_info": info,
+        "strict": True,
+        "d": args.d,
+        "index": None,
+    }
+    cfg = {"metric": "L2", "delta_max": 0.5, "tie_break": "first", "scale": "minmax"}
+    model = Model(cfg, refs, {"refs": None, "index": None, "query": None, "config": None, "val": None})
+    Q = rng.random((args.requests, args.d)).tolist()
+    print(f"N={args.n} d={args.d} requests={args.requests} clients={args.clients}")
+
+    srv = make_server(model, port=0)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    _report("threaded serve", *_load(srv.server_address[:2], Q, args.clients, args.top_k))
+    srv.shutdown()
+    srv.server_close()
+
+    for w in args.windows:
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        asrv, batcher = asyncio.run_coroutine_threadsafe(
+            start_async_server(model, port=0, window_ms=w, max_batch=args.max_batch), loop
+        ).result()
+        addr = asrv.sockets[0].getsockname()[:2]
+        lat, wall = _load(addr, Q, args.clients, args.top_k)
+        mean = batcher.requests / max(1, batcher.batches)
+        _report(f"micro-batch {w:g} ms", lat, wall)
+        print(f"{'':<22} mean batch {mean:.1f}")
+        asrv.close()
+        asyncio.run_coroutine_threadsafe(batcher.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
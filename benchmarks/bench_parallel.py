@@ -0,0 +1,54 @@
+# NB: Масштабирование пакетного nearest по процессам (эталоны в shared memory).
+# Запуск: python3 benchmarks/bench_parallel.py --n 200000 --d 64 --queries 4096 --workers 1 2 4 8 16 32 64
+# На машине с C ядрами смотреть на строки workers <= C: эффективность = speedup / workers.
+
+from __future__ import annotations
+from pathlib import Path
+import argparse, os, sys, time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.metrics import get_metric  # noqa: E402
+from ml_justify.parallel import decide_block_parallel  # noqa: E402
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark: multi-process batch nearest")
+    p.add_argument("--n", type=int, default=50000)
+    p.add_argument("--d", type=int, default=64)
+    p.add_argument("--queries", type=int, default=2048)
+    p.add_argument("--metric", default="L2")
+    p.add_argument("--workers", type=int, nargs="+", default=None)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    cores = os.cpu_count() or 1
+    workers = args.workers or sorted({1, 2, 4, 8, 16, 32, 64, cores})
+    rng = np.random.default_rng(args.seed)
+    R = rng.random((args.n, args.d))
+    Q = rng.random((args.queries, args.d))
+    labels = [f"c{i % 10}" for i in range(args.n)]
+    engine, _ = get_metric(args.metric)
+
+    print(f"N={args.n} d={args.d} queries={args.queries} cores={cores}")
+    base, ref = None, None
+    for w in workers:
+        t0 = time.perf_counter()
+        res = decide_block_parallel(Q, R, labels, engine, w)
+        t = time.perf_counter() - t0
+        base = base or t
+        ref = ref or res
+        assert res == ref
+        note = "" if w <= cores else "  (больше, чем ядер)"
+        print(
+            f"workers={w:>3}: {t:7.2f} s | {len(Q) / t:9.1f} q/s | "
+            f"speedup x{base / t:5.2f} | efficiency {base / t / w:5.0%}{note}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
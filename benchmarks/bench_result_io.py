@@ -0,0 +1,75 @@
+# NB: Запись result.json для большого N: старый путь (N словарей + json.dump(indent=2))
+# против потокового писателя (ленивый ranking) — время и пик памяти (tracemalloc).
+# Запуск: python3 benchmarks/bench_result_io.py --n 1000000
+
+from __future__ import annotations
+from pathlib import Path
+import argparse, json, sys, tempfile, time, tracemalloc
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.decision import _ranking, make_result_dict, top_k_order  # noqa: E402
+from ml_justify.result_io import RankingView, write_result  # noqa: E402
+
+
+def _result(dists, labels, ranking):
+    cfg = {"metric": "L2", "tie_break": "first", "scale": "minmax"}
+    idx = int(dists.argmin())
+    return make_result_dict(
+        {}, cfg, 2, {"scale": "minmax"}, None, [0.0, 0.0], [0.0, 0.0],
+        dists, ranking, idx, labels[idx], 0.5,
+    )
+
+
+def _measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn()
+    t = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return t, peak
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark: streaming result writer")
+    p.add_argument("--n", type=int, default=300000)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    dists = rng.random(args.n)
+    labels = [f"c{i % 10}" for i in range(args.n)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "result.json"
+
+        def old():
+            res = _result(dists, labels, _ranking(dists, labels))
+            with out.open("w", encoding="utf-8") as f:
+                json.dump(res, f, ensure_ascii=False, indent=2)
+
+        def new(fmt):
+            def run():
+                view = RankingView(top_k_order(dists), dists, labels)
+                write_result(out, _result(dists, labels, view), fmt=fmt)
+            return run
+
+        print(f"N={args.n}")
+        rows = [("dict + json.dump", old)] + [
+            (f"stream {fmt}", new(fmt)) for fmt in ("pretty", "compact", "npz")
+        ]
+        for name, fn in rows:
+            t, peak = _measure(fn)
+            size = out.stat().st_size
+            print(
+                f"{name:<18} {t:7.2f} s | peak {peak / 2**20:8.1f} MiB | file {size / 2**20:7.1f} MiB"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
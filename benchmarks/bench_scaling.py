@@ -0,0 +1,87 @@
+# NB: Скейлинг: списочные функции (по вектору) vs прежний fit numpy в два прохода
+# vs Scaler (один проход блоками + векторный transform) и загрузка готового
+# скейлера с диска вместо повторного fit.
+# Запуск: python3 benchmarks/bench_scaling.py --n 200000 --d 64
+
+from __future__ import annotations
+from pathlib import Path
+import argparse, sys, tempfile, time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.scaling import Scaler, fit_minmax, fit_standard, transform_matrix, transform_vector  # noqa: E402
+
+
+def _two_pass(scale: str, X):
+    # NB: как было до Scaler: отдельные проходы X.min/X.max (или mean, потом var)
+    if scale == "minmax":
+        mins = X.min(axis=0)
+        ranges = X.max(axis=0) - mins
+        ranges[ranges == 0] = 1.0
+        return {"scale": scale, "params": {"mins": mins.tolist(), "ranges": ranges.tolist()}}
+    means = X.mean(axis=0)
+    var = ((X - means) ** 2).mean(axis=0)
+    stds = np.where(var > 0, np.sqrt(var), 1.0)
+    return {"scale": scale, "params": {"means": means.tolist(), "stds": stds.tolist()}}
+
+
+def _timed(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark: scaling fit/transform")
+    p.add_argument("--n", type=int, default=200000)
+    p.add_argument("--d", type=int, default=64)
+    p.add_argument("--scale", choices=("minmax", "standard"), default="standard")
+    p.add_argument("--list-rows", type=int, default=20000, help="Строк для списочного пути (он медленный)")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    X = rng.normal(size=(args.n, args.d))
+    print(f"n={args.n} d={args.d} scale={args.scale}")
+
+    L = X[: args.list_rows].tolist()
+    fit_list = fit_minmax if args.scale == "minmax" else fit_standard
+
+    def list_path():
+        a, b = fit_list(L)
+        key = ("mins", "ranges") if args.scale == "minmax" else ("means", "stds")
+        info = {"scale": args.scale, "params": dict(zip(key, (a, b)))}
+        return [transform_vector(info, v) for v in L]
+
+    t_list, _ = _timed(list_path, 1)
+    t_list *= args.n / len(L)
+    print(f"  lists (per vector, extrapolated): {t_list * 1e3:9.1f} ms")
+
+    t_two, Xt = _timed(lambda: transform_matrix(_two_pass(args.scale, X), X), args.repeat)
+    print(f"  numpy two-pass fit + transform:   {t_two * 1e3:9.1f} ms")
+
+    t_sc, Xs = _timed(lambda: Scaler(args.scale).fit_transform(X), args.repeat)
+    print(f"  Scaler fit + transform:           {t_sc * 1e3:9.1f} ms  (x{t_two / t_sc:.2f} vs two-pass)")
+    err = float(np.abs(Xs - Xt).max())
+    print(f"    max |Scaler - two-pass| = {err:.3g}")
+
+    sc = Scaler(args.scale).fit(X)
+    t_fit, _ = _timed(lambda: Scaler(args.scale).fit(X), args.repeat)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "scaler.json"
+        sc.save(path)
+        t_load, loaded = _timed(lambda: Scaler.load(path), args.repeat)
+    assert loaded.info == sc.info
+    print(f"  fit only: {t_fit * 1e3:.1f} ms   load saved scaler: {t_load * 1e3:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+# NB: Задержка serve (эталоны в памяти) против запуска CLI на каждый запрос.
+# Запуск: python3 benchmarks/bench_serve.py --n 20000 --d 32 --requests 2000 --top-k 10
+
+from __future__ import annotations
+from pathlib import Path
+import argparse, http.client, json, subprocess, sys, tempfile, threading, time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.model import Model  # noqa: E402
+from ml_justify.server import make_server  # noqa: E402
+
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100 * (len(xs) - 1))))]
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark: serve latency")
+    p.add_argument("--n", type=int, default=20000)
+    p.add_argument("--d", type=int, default=32)
+    p.add_argument("--requests", type=int, default=2000)
+    p.add_argument("--top-k", type=int, default=10)
+    p.add_argument("--cli-runs", type=int, default=5)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        refs = tmp / "refs.csv"
+        X = rng.random((args.n, args.d))
+        with refs.open("w", encoding="utf-8") as f:
+            f.write("class_id," + ",".join(f"p{j + 1}" for j in range(args.d)) + "\n")
+            for i, row in enumerate(X.tolist()):
+                f.write(f"c{i % 10}," + ",".join(map(repr, row)) + "\n")
+        cfg = tmp / "config.json"
+        cfg.write_text(json.dumps({"metric": "L2", "scale": "minmax", "delta_max": 0.5}))
+        Q = rng.random((args.requests, args.d)).tolist()
+
+        model = Model.load(str(cfg), refs_path=str(refs))
+        srv = make_server(model, port=0, top_k=args.top_k)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        conn = http.client.HTTPConnection(*srv.server_address[:2])
+        lat = []
+        for q in Q:
+            body = json.dumps({"vector": q})
+            t0 = time.perf_counter()
+            conn.request("POST", "/classify", body, {"Content-Type": "application/json"})
+            conn.getresponse().read()
+            lat.append((time.perf_counter() - t0) * 1e3)
+        srv.shutdown()
+        print(
+            f"serve  N={args.n} d={args.d}: p50 {_pct(lat, 50):.2f} ms | "
+            f"p99 {_pct(lat, 99):.2f} ms | {len(lat) / (sum(lat) / 1e3):.0f} req/s"
+        )
+
+        qfile = tmp / "q.json"
+        cli = []
+        for q in Q[: args.cli_runs]:
+            qfile.write_text(json.dumps({"vector": q}))
+            t0 = time.perf_counter()
+            subprocess.run(
+                [sys.executable, str(ROOT / "justify.py"), "--refs", str(refs),
+                 "--query", str(qfile), "--config", str(cfg), "--top-k", str(args.top_k),
+                 "--out", str(tmp / "r.json")],
+                check=True, capture_output=True,
+            )
+            cli.append((time.perf_counter() - t0) * 1e3)
+        print(f"cli per call: p50 {_pct(cli, 50):.1f} ms (x{_pct(cli, 50) / _pct(lat, 50):.0f})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
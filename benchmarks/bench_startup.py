@@ -0,0 +1,136 @@
+# NB: Время запуска cli для одиночного запроса (процесс на каждый запрос).
+# Меряю отдельными процессами (лучшее из --repeat): голый интерпретатор,
+# import numpy, import ml_justify.cli и полную классификацию маленького набора
+# (конфиг YAML: первый запуск — разбор PyYAML, дальше — кэш в ML_JUSTIFY_CACHE_DIR).
+# Цель — полное время классификации < --target-ms (как есть, без вычетов).
+# Для сравнения — та же классификация на --baseline (ревизия git, по умолчанию
+# первый коммит: чистый Python без numpy). Плюс — какие необязательные
+# подсистемы оказались загружены (должно быть пусто).
+# Запуск: python3 benchmarks/bench_startup.py --repeat 10
+
+from __future__ import annotations
+from pathlib import Path
+import argparse, compileall, json, os, shutil, subprocess, sys, tarfile, tempfile, time
+
+ROOT = Path(__file__).resolve().parent.parent
+
+OPTIONAL = (
+    "yaml",
+    "pyarrow",
+    "matplotlib",
+    "logging",
+    "tracemalloc",
+    "asyncio",
+    "http.server",
+    "ml_justify.calibrate",
+    "ml_justify.plot2d",
+    "ml_justify.kdtree",
+    "ml_justify.early_exit",
+    "ml_justify.microbatch",
+    "ml_justify.server",
+    "ml_justify.condense",
+    "ml_justify.bench",
+)
+
+CONFIG = "metric: L2\ndelta_max: 0.5\ntie_break: first\nscale: minmax\n"
+REFS = "class_id,p1,p2\nA,0.1,0.2\nA,0.15,0.1\nB,0.8,0.9\nB,0.9,0.75\n"
+QUERY = '{"vector": [0.15, 0.15]}'
+
+
+def _best(cmd, env, cwd, repeat: int, before=None) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        t0 = time.perf_counter()
+        subprocess.run(cmd, env=env, cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _checkout(rev: str, dest: Path):
+    # NB: дерево ревизии через git archive (рабочую копию не трогаю); нет git — None
+    try:
+        if not rev:
+            rev = subprocess.run(
+                ["git", "rev-list", "--max-parents=0", "HEAD"],
+                cwd=ROOT, check=True, capture_output=True, text=True,
+            ).stdout.split()[0]
+        tar = dest / "baseline.tar"
+        with tar.open("wb") as f:
+            subprocess.run(["git", "archive", rev], cwd=ROOT, check=True, stdout=f)
+    except (OSError, IndexError, subprocess.CalledProcessError):
+        return None, rev
+    with tarfile.open(tar) as t:
+        t.extractall(dest / "tree")
+    compileall.compile_dir(str(dest / "tree" / "ml_justify"), quiet=1)
+    return dest / "tree", rev
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark: cli startup (classify-only path)")
+    p.add_argument("--repeat", type=int, default=7)
+    p.add_argument("--target-ms", type=float, default=50.0)
+    p.add_argument("--baseline", default="", help="Ревизия для сравнения (по умолчанию — первый коммит)")
+    args = p.parse_args(argv)
+
+    # NB: как после pip install — байткод уже есть (PYTHONDONTWRITEBYTECODE не даёт его писать)
+    compileall.compile_dir(str(ROOT / "ml_justify"), quiet=1)
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    env["PYTHONPATH"] = str(ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+
+    with tempfile.TemporaryDirectory(prefix="ml-justify-startup-") as tmp:
+        cwd = Path(tmp)
+        (cwd / "config.yaml").write_text(CONFIG, encoding="utf-8")
+        (cwd / "refs.csv").write_text(REFS, encoding="utf-8")
+        (cwd / "q.json").write_text(QUERY, encoding="utf-8")
+        cache = cwd / "cache"
+        env["ML_JUSTIFY_CACHE_DIR"] = str(cache)
+        py = sys.executable
+        classify = [py, "-m", "ml_justify.cli", "--out", str(cwd / "result.json")]
+
+        def cold():
+            shutil.rmtree(cache, ignore_errors=True)
+
+        rows = [
+            ("python", _best([py, "-c", "pass"], env, cwd, args.repeat)),
+            ("import numpy", _best([py, "-c", "import numpy"], env, cwd, args.repeat)),
+            ("import ml_justify.cli", _best([py, "-c", "import ml_justify.cli"], env, cwd, args.repeat)),
+            ("classify (yaml parse)", _best(classify, env, cwd, args.repeat, before=cold)),
+            ("classify (cached cfg)", _best(classify, env, cwd, args.repeat)),
+        ]
+        probe = (
+            "import json, sys; from ml_justify.cli import main; main(['--out', 'result.json']); "
+            f"print(json.dumps([m for m in {OPTIONAL!r} if m in sys.modules]))"
+        )
+        out = subprocess.run(
+            [py, "-c", probe], env=env, cwd=cwd, check=True, capture_output=True, text=True
+        ).stdout
+        loaded = json.loads(out.strip().splitlines()[-1])
+
+        base, rev = _checkout(args.baseline, cwd)
+        if base is not None:
+            base_env = dict(env, PYTHONPATH=str(base))
+            rows.append((f"baseline {rev[:10]}", _best(classify, base_env, cwd, args.repeat)))
+
+    t = dict(rows)
+    for name, sec in rows:
+        print(f"{name:<24} {sec * 1e3:8.1f} ms")
+    total = t["classify (cached cfg)"] * 1e3
+    print(f"ml_justify import over python: {(t['import ml_justify.cli'] - t['python']) * 1e3:.1f} ms")
+    print(f"import numpy over python: {(t['import numpy'] - t['python']) * 1e3:.1f} ms")
+    if base is not None:
+        was = t[f"baseline {rev[:10]}"] * 1e3
+        print(f"classify vs baseline: {total:.1f} ms vs {was:.1f} ms (x{total / was:.2f})")
+    else:
+        print(f"baseline {rev or '(first commit)'}: not available (no git?)")
+    print(
+        f"classify (cached cfg): {total:.1f} ms (target < {args.target_ms:g} ms) → "
+        + ("OK" if total < args.target_ms else "OVER")
+    )
+    print(f"optional modules loaded: {', '.join(loaded) if loaded else 'none'}")
+    return 0 if total < args.target_ms else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
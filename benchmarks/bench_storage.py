@@ -0,0 +1,57 @@
+# NB: Память и скорость поиска для float64 / float32 / int8 хранения эталонов.
+# Решения сверяются с float64 (должны совпасть все).
+# Запуск: python3 benchmarks/bench_storage.py --n 200000 --d 64 --queries 500
+
+from __future__ import annotations
+from pathlib import Path
+import argparse, sys, time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.decision import decide_block  # noqa: E402
+from ml_justify.metrics import get_metric  # noqa: E402
+from ml_justify.storage import STORAGES, compact_refs  # noqa: E402
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark: compact reference storage")
+    p.add_argument("--n", type=int, default=100000)
+    p.add_argument("--d", type=int, default=64)
+    p.add_argument("--queries", type=int, default=300)
+    p.add_argument("--metric", default="L2")
+    p.add_argument("--top-k", type=int, default=None)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    R = rng.standard_normal((args.n, args.d))
+    Q = rng.standard_normal((args.queries, args.d))
+    labels = [f"c{i % 10}" for i in range(args.n)]
+    engine, _ = get_metric(args.metric)
+    with_ranking = args.top_k is not None
+
+    # NB: list of lists, как было до numpy — для сравнения по памяти (~32 байта на число)
+    py_bytes = args.n * (56 + 8 * args.d + 24 * args.d)
+    print(f"N={args.n} d={args.d} queries={args.queries} metric={args.metric}")
+    print(f"{'list of lists':<10} {py_bytes / 2**20:9.1f} MiB (оценка)")
+    ref = None
+    for storage in STORAGES:
+        t0 = time.perf_counter()
+        S = compact_refs(R, storage)
+        build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        res = decide_block(Q, S, labels, engine, with_ranking, args.top_k)
+        t = time.perf_counter() - t0
+        ref = ref or res
+        print(
+            f"{storage:<10} {S.nbytes / 2**20:9.1f} MiB | build {build:6.2f} s | "
+            f"{len(Q) / t:9.1f} q/s | same as float64: {res == ref}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,72 @@
+# NB: Инкрементальный апдейт эталонов против полной пересборки индекса из csv.
+# Запуск: python3 benchmarks/bench_updates.py --n 200000 --d 32 --add 10 --remove 10
+
+from __future__ import annotations
+from pathlib import Path
+import argparse, sys, tempfile, time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.cli import update_index_main  # noqa: E402
+from ml_justify.index_file import build_index  # noqa: E402
+from ml_justify.updates import update_references  # noqa: E402
+from ml_justify.model import load_references  # noqa: E402
+
+
+def _write(path, labels, X):
+    with path.open("w", encoding="utf-8") as f:
+        f.write("class_id," + ",".join(f"p{j + 1}" for j in range(X.shape[1])) + "\n")
+        for c, row in zip(labels, X.tolist()):
+            f.write(c + "," + ",".join(map(repr, row)) + "\n")
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark: incremental reference updates")
+    p.add_argument("--n", type=int, default=100000)
+    p.add_argument("--d", type=int, default=32)
+    p.add_argument("--add", type=int, default=10)
+    p.add_argument("--remove", type=int, default=10)
+    p.add_argument("--scale", default="standard", choices=["minmax", "standard"])
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    X = rng.random((args.n, args.d))
+    labels = [f"c{i % 10}" for i in range(args.n)]
+    new = rng.random((args.add, args.d))
+    drop = rng.choice(args.n, size=args.remove, replace=False).tolist()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        _write(tmp / "refs.csv", labels, X)
+        _write(tmp / "new.csv", [f"c{i % 10}" for i in range(args.add)], new)
+        idx = tmp / "refs.idx"
+
+        t0 = time.perf_counter()
+        build_index(tmp / "refs.csv", idx, args.scale)
+        full = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        update_index_main(
+            ["--index", str(idx), "--add", str(tmp / "new.csv"),
+             "--remove", ",".join(map(str, drop))]
+        )
+        upd = time.perf_counter() - t0
+
+        refs = load_references({"scale": args.scale}, index_path=idx)
+        t0 = time.perf_counter()
+        refs = update_references(refs, drop, [f"c{i % 10}" for i in range(args.add)], new)
+        mem = time.perf_counter() - t0
+
+    print(f"N={args.n} d={args.d} scale={args.scale} +{args.add} -{args.remove}")
+    print(f"full rebuild (csv + fit):   {full:8.3f} s")
+    print(f"update-index (file):        {upd:8.3f} s  (x{full / upd:.0f})")
+    print(f"in-memory model update:     {mem:8.3f} s  (x{full / mem:.0f})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
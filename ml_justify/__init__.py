@@ -1,18 +1,94 @@
 # NB: Делаю пакет «читаемым снаружи»: можно импортировать функции адресно.
 # Версия просто для информации (если вдруг понадобятся релизы).
+# Импорт ленивый (PEP 562): `import ml_justify` (и `python -m ml_justify.cli`)
+# не тянет за собой все подсистемы — модуль грузится при первом обращении
+# к его имени. Список публичных имён — _EXPORTS (имя -> модуль).
+
+from __future__ import annotations
+import importlib
 
 __version__ = "1.0.0"
 
-from .config import read_config
-from .data_io import load_refs_csv, load_query, load_val_csv
-from .metrics import get_metric, l1, l2, linf
-from .scaling import (
-    apply_scaling,
-    fit_minmax,
-    transform_minmax,
-    fit_standard,
-    transform_standard,
-)
-from .decision import nearest_class, build_ranking, make_result_dict
-from .calibrate import calibrate_delta, write_calibrated_config
-from .plot2d import plot_2d
+_EXPORTS = {
+    "read_config": "config",
+    "parse_query": "data_io",
+    "load_refs_csv": "data_io",
+    "load_refs_array": "data_io",
+    "load_query": "data_io",
+    "load_queries": "data_io",
+    "load_val_csv": "data_io",
+    "load_val_array": "data_io",
+    "get_metric": "metrics",
+    "l1": "metrics",
+    "l2": "metrics",
+    "linf": "metrics",
+    "DistanceEngine": "metrics",
+    "distances_to_refs": "metrics",
+    "apply_scaling": "scaling",
+    "Scaler": "scaling",
+    "fit_minmax": "scaling",
+    "transform_minmax": "scaling",
+    "fit_standard": "scaling",
+    "transform_standard": "scaling",
+    "fit_scaling": "scaling",
+    "fit_stats": "scaling",
+    "update_stats": "scaling",
+    "transform_vector": "scaling",
+    "transform_matrix": "scaling",
+    "decide": "decision",
+    "decide_block": "decision",
+    "nearest_class": "decision",
+    "nearest_classes": "decision",
+    "build_ranking": "decision",
+    "make_result_dict": "decision",
+    "calibrate_delta": "calibrate",
+    "calibrate_sweep": "calibrate",
+    "calibrated_thresholds": "calibrate",
+    "coverage_sweep": "calibrate",
+    "write_calibrated_config": "calibrate",
+    "write_curve": "calibrate",
+    "RankingView": "result_io",
+    "write_result": "result_io",
+    "read_result": "result_io",
+    "plot_2d": "plot2d",
+    "build_index": "index_file",
+    "write_index": "index_file",
+    "open_index": "index_file",
+    "KDTree": "kdtree",
+    "ClassThresholds": "thresholds",
+    "thresholds_from_config": "thresholds",
+    "PartialDistanceSearch": "early_exit",
+    "QueryCache": "cache",
+    "StepTimer": "instrument",
+    "add_profiler_hook": "instrument",
+    "remove_profiler_hook": "instrument",
+    "Model": "model",
+    "load_references": "model",
+    "CompactRefs": "storage",
+    "compact_refs": "storage",
+    "MicroBatcher": "microbatch",
+    "condense_references": "condense",
+    "compare_decisions": "condense",
+    "update_references": "updates",
+    "add_references": "updates",
+    "remove_references": "updates",
+    "decide_block_parallel": "parallel",
+    "nearest_classes_parallel": "parallel",
+}
+
+__all__ = ["__version__", *_EXPORTS]
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        # NB: AttributeError обязателен — на нём `from ml_justify import scaling`
+        # откатывается к импорту подмодуля
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value  # NB: дальше — обычный атрибут, без __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,293 @@
+# NB: Встроенный бенчмарк: генерирую синтетические refs.csv / val.csv / q.json /
+# queries.jsonl под заданные N, d и число классов и прогоняю по шагам тот же
+# конвейер, что cli.main (конфиг → эталоны → скейлинг → решение → ranking →
+# калибровка → запись result.json). По каждому шагу — время (лучшее из
+# --repeat) и пик памяти (tracemalloc; отдельным прогоном, чтобы трассировка
+# не портила время). Итог — JSON: два файла от разных версий сравниваются
+# через --compare.
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json, os, platform, sys, time
+
+
+def _fail(msg: str):
+    raise RuntimeError(msg)
+
+
+def generate(
+    out_dir: Path,
+    n: int,
+    d: int,
+    classes: int,
+    n_val: int = 1000,
+    n_queries: int = 1000,
+    noise: float = 0.1,
+    seed: int = 0,
+) -> Dict[str, Path]:
+    # NB: гауссовы облака вокруг случайных центров; признаки в «сырых» единицах
+    # с разным масштабом по столбцам — чтобы скейлинг делал реальную работу
+    import numpy as np
+
+    if min(n, d, classes) < 1:
+        _fail("❌ Synthetic data needs n, d and classes >= 1")
+    rng = np.random.default_rng(seed)
+    centers = rng.random((classes, d))
+    spread = rng.uniform(0.5, 20.0, d)
+
+    def sample(m):
+        y = rng.integers(0, classes, m)
+        return (centers[y] + rng.normal(scale=noise, size=(m, d))) * spread, y
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    header = "class_id," + ",".join(f"p{j + 1}" for j in range(d)) + "\n"
+    paths = {"refs": out_dir / "refs.csv", "val": out_dir / "val.csv"}
+    for key, m in (("refs", n), ("val", n_val)):
+        X, y = sample(m)
+        with paths[key].open("w", encoding="utf-8") as f:
+            f.write(header)
+            for s in range(0, m, 10000):
+                f.write(
+                    "".join(
+                        f"c{k}," + ",".join(map(repr, row)) + "\n"
+                        for k, row in zip(y[s : s + 10000].tolist(), X[s : s + 10000].tolist())
+                    )
+                )
+    Q, _ = sample(max(1, n_queries))
+    paths["query"] = out_dir / "q.json"
+    paths["query"].write_text(json.dumps({"vector": Q[0].tolist()}), encoding="utf-8")
+    paths["queries"] = out_dir / "queries.jsonl"
+    with paths["queries"].open("w", encoding="utf-8") as f:
+        for row in Q.tolist():
+            f.write(json.dumps({"vector": row}) + "\n")
+    paths["config"] = out_dir / "config.json"
+    paths["config"].write_text(
+        json.dumps({"metric": "L2", "delta_max": 0.5, "tie_break": "first", "scale": "minmax"}),
+        encoding="utf-8",
+    )
+    return paths
+
+
+def _measure(fn: Callable[[], Any], repeat: int, memory: bool) -> Dict[str, Any]:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    out: Dict[str, Any] = {"seconds": best}
+    if memory:
+        import tracemalloc
+
+        tracemalloc.start()
+        try:
+            fn()
+            out["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return out
+
+
+def run_pipeline(
+    paths: Dict[str, Path],
+    repeat: int = 3,
+    memory: bool = True,
+    top_k: Optional[int] = None,
+    workers: int = 1,
+) -> Dict[str, Dict[str, Any]]:
+    # NB: шаги cli.main по отдельности; каждый берёт входы из st (результат
+    # прошлых шагов) и кладёт туда свой — повторные прогоны идемпотентны
+    from .calibrate import calibrate_delta
+    from .config import read_config
+    from .data_io import load_queries, load_query, load_refs_array, load_val_array
+    from .decision import decide, decide_block, make_result_dict, top_k_order
+    from .metrics import get_metric
+    from .parallel import decide_block_parallel
+    from .result_io import RankingView, write_result
+    from .scaling import Scaler
+
+    st: Dict[str, Any] = {}
+    out_path = paths["config"].parent / "result.json"
+
+    def config():
+        st["cfg"] = read_config(paths["config"])
+        st["metric_fn"], st["metric_name"] = get_metric(st["cfg"]["metric"])
+
+    def load_refs():
+        st["class_ids"], st["raw"] = load_refs_array(paths["refs"])
+
+    def fit_scaling():
+        st["scaler"] = Scaler(st["cfg"]["scale"]).fit(st["raw"])
+
+    def transform_refs():
+        st["scaled"] = st["scaler"].transform(st["raw"])
+
+    def load_q():
+        st["q"] = load_query(paths["query"], expected_dim=st["raw"].shape[1])
+        st["q_s"] = st["scaler"].transform_vector(st["q"])
+
+    def nearest():
+        # NB: одиночный запрос: дистанции до всех + победитель (decide)
+        st["decision"] = decide(st["q_s"], st["scaled"], st["class_ids"], st["metric_fn"])
+
+    def ranking():
+        dists = st["decision"][3]
+        st["ranking"] = RankingView(top_k_order(dists, top_k), dists, st["class_ids"])
+
+    def write_json():
+        min_d, winner_class, winner_idx, dists, _ = st["decision"]
+        result = make_result_dict(
+            {},
+            {**st["cfg"], "metric": st["metric_name"]},
+            st["raw"].shape[1],
+            st["scaler"].info,
+            None,
+            st["q"],
+            st["q_s"],
+            dists,
+            st["ranking"],
+            winner_idx,
+            winner_class,
+            st["cfg"]["delta_max"],
+        )
+        write_result(out_path, result)
+
+    def load_batch():
+        st["Q_s"] = st["scaler"].transform(load_queries(paths["queries"], st["raw"].shape[1]))
+
+    def batch_decide():
+        if workers > 1:
+            decide_block_parallel(st["Q_s"], st["scaled"], st["class_ids"], st["metric_fn"], workers)
+        else:
+            decide_block(st["Q_s"], st["scaled"], st["class_ids"], st["metric_fn"])
+
+    def calibrate():
+        val_labels, val_X = load_val_array(paths["val"], expected_dim=st["raw"].shape[1])
+        calibrate_delta(
+            st["class_ids"],
+            st["scaled"],
+            val_labels,
+            st["scaler"].transform(val_X),
+            st["metric_fn"],
+            workers=workers,
+        )
+
+    stages: List[Tuple[str, Callable[[], Any]]] = [
+        ("read_config", config),
+        ("load_refs", load_refs),
+        ("fit_scaling", fit_scaling),
+        ("transform_refs", transform_refs),
+        ("load_query", load_q),
+        ("nearest_class", nearest),
+        ("build_ranking", ranking),
+        ("write_result", write_json),
+        ("load_queries", load_batch),
+        ("decide_batch", batch_decide),
+        ("calibrate", calibrate),
+    ]
+    results = {}
+    for name, fn in stages:
+        results[name] = _measure(fn, repeat, memory)
+    batch = results["decide_batch"]
+    batch["per_query_seconds"] = batch["seconds"] / len(st["Q_s"])
+    return results
+
+
+def _environment() -> Dict[str, Any]:
+    import numpy as np
+
+    from . import __version__
+
+    return {
+        "ml_justify": __version__,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _max_rss() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # NB: не unix
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # NB: Linux — КБ, macOS — байты
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def run_bench(
+    sizes: List[int],
+    d: int,
+    classes: int,
+    work_dir: Path,
+    n_val: int = 1000,
+    n_queries: int = 1000,
+    repeat: int = 3,
+    memory: bool = True,
+    top_k: Optional[int] = None,
+    workers: int = 1,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    runs = []
+    for n in sizes:
+        data = work_dir / f"n{n}_d{d}_k{classes}"
+        t0 = time.perf_counter()
+        paths = generate(data, n, d, classes, n_val=n_val, n_queries=n_queries, seed=seed)
+        gen = time.perf_counter() - t0
+        stages = run_pipeline(paths, repeat=repeat, memory=memory, top_k=top_k, workers=workers)
+        runs.append(
+            {
+                "n": n,
+                "generate_seconds": gen,
+                "refs_csv_bytes": paths["refs"].stat().st_size,
+                "stages": stages,
+            }
+        )
+    return {
+        "format": "ml-justify-bench",
+        "version": 1,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": _environment(),
+        "params": {
+            "sizes": list(sizes),
+            "d": d,
+            "classes": classes,
+            "n_val": n_val,
+            "n_queries": n_queries,
+            "repeat": repeat,
+            "top_k": top_k,
+            "workers": workers,
+            "seed": seed,
+        },
+        "runs": runs,
+        "max_rss_bytes": _max_rss(),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # NB: по каждому (n, шаг), который есть в обоих отчётах: время и пик памяти,
+    # ratio > 1 — стало медленнее / больше
+    base = {r["n"]: r["stages"] for r in baseline.get("runs", [])}
+    rows = []
+    for run in current["runs"]:
+        old = base.get(run["n"])
+        if old is None:
+            continue
+        for name, cur in run["stages"].items():
+            if name not in old:
+                continue
+            row = {
+                "n": run["n"],
+                "stage": name,
+                "seconds": cur["seconds"],
+                "baseline_seconds": old[name]["seconds"],
+            }
+            row["ratio"] = cur["seconds"] / old[name]["seconds"] if old[name]["seconds"] > 0 else None
+            if "peak_bytes" in cur and "peak_bytes" in old[name]:
+                row["peak_bytes"] = cur["peak_bytes"]
+                row["baseline_peak_bytes"] = old[name]["peak_bytes"]
+            rows.append(row)
+    return rows
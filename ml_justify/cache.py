@@ -0,0 +1,110 @@
+# NB: Кэш решений для повторяющихся запросов (LRU + TTL, с бюджетом памяти).
+# Ключ — хэш отскейленного q (по желанию квантованного: близкие запросы
+# делят один ответ) + всё, от чего зависит ответ: метрика, скейлинг,
+# delta_max, top_k и отпечаток набора эталонов. Поменялись эталоны
+# (update_references даёт новый отпечаток) или конфиг — ключи другие, старые
+# записи просто вытесняются по LRU/TTL, явная инвалидация не нужна.
+# Храню только решение (min_distance, класс, индекс, ranking); query/summary
+# собираются заново, так что raw/scaled в ответе — всегда от самого запроса.
+
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import hashlib, sys, threading, time
+
+# NB: грубая оценка «веса» записи: кортеж + ключ + элемент ranking (dict из 3 полей)
+_ENTRY_BYTES = 400
+_RANK_ITEM_BYTES = 360
+
+
+def _sizeof(value) -> int:
+    ranking = value[3]
+    return _ENTRY_BYTES + (len(ranking) * _RANK_ITEM_BYTES if ranking else 0)
+
+
+class QueryCache:
+    def __init__(
+        self,
+        max_bytes: int = 64 << 20,
+        ttl: Optional[float] = None,
+        quantum: float = 0.0,
+    ):
+        if max_bytes <= 0:
+            raise RuntimeError("❌ Cache budget must be > 0 bytes")
+        if ttl is not None and ttl <= 0:
+            raise RuntimeError("❌ Cache TTL must be > 0 seconds")
+        if quantum < 0:
+            raise RuntimeError("❌ Cache quantum must be >= 0")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.quantum = quantum
+        self._data: "OrderedDict[bytes, Tuple[float, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def key(self, q_s, scope: Tuple) -> bytes:
+        import numpy as np
+
+        v = np.asarray(q_s, dtype=np.float64)
+        if self.quantum > 0:
+            # NB: близкие (в пределах кванта) запросы — один ключ
+            v = np.rint(v / self.quantum).astype(np.int64)
+        else:
+            v = v + 0.0  # NB: -0.0 -> 0.0, иначе разные байты у равных векторов
+        h = hashlib.blake2b(v.tobytes(), digest_size=16)
+        h.update(repr(scope).encode("utf-8"))
+        return h.digest()
+
+    def get(self, key: bytes):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                stamp, size, value = entry
+                if self.ttl is not None and time.monotonic() - stamp > self.ttl:
+                    del self._data[key]
+                    self.bytes -= size
+                    self.expired += 1
+                else:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, key: bytes, value) -> None:
+        size = _sizeof(value) + sys.getsizeof(key)
+        if size > self.max_bytes:
+            return  # NB: такой ранжинг не влезет в бюджет — не кэширую
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._data[key] = (time.monotonic(), size, value)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _k, (_t, s, _v) = self._data.popitem(last=False)
+                self.bytes -= s
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+                "evictions": self.evictions,
+                "expired": self.expired,
+            }
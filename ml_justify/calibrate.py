@@ -2,10 +2,294 @@
 # при ограничении по coverage (доля принятых ≥ min_coverage).
 
 from __future__ import annotations
-from typing import List, Dict, Any
+from typing import Any, Dict, List, Sequence
 import json
 from pathlib import Path
 
+from .config import RESAMPLING
+from .metrics import DistanceEngine
+from .parallel import nearest_classes_parallel, nearest_parallel
+from .thresholds import ClassThresholds
+
+
+def _curve(dists, correct):
+    # NB: Кандидаты порога — все уникальные дистанции + чуть > max.
+    # Вместо «для каждого кандидата заново фильтруем все примеры» (O(n²))
+    # сортирую один раз и беру накопленные счётчики decided/correct на
+    # последнем вхождении каждой уникальной дистанции: O(n log n).
+    # Возвращаю (пороги, coverage, точность на принятых) — coverage не убывает.
+    import numpy as np
+
+    d = np.asarray(dists, dtype=np.float64)
+    n = len(d)
+    if n == 0:
+        raise RuntimeError("❌ No distances computed for calibration (check val.csv)")
+    order = np.argsort(d, kind="stable")
+    d_sorted = d[order]
+    cum_correct = np.cumsum(np.asarray(correct, dtype=np.int64)[order])
+
+    # NB: конец каждой группы равных дистанций = «decided при thr = этой дистанции»
+    last = np.flatnonzero(np.append(d_sorted[1:] != d_sorted[:-1], True))
+    thr = d_sorted[last]
+    n_decided = last + 1
+    n_correct = cum_correct[last]
+    # NB: кандидат «чуть > max» — все решены, как и при thr = max
+    thr = np.append(thr, thr[-1] * 1.01)
+    n_decided = np.append(n_decided, n)
+    n_correct = np.append(n_correct, cum_correct[-1])
+    return thr, n_decided / n, n_correct / n_decided
+
+
+def _pick(curve, min_coverage: float) -> int:
+    # NB: Правило выбора: макс. точность среди порогов с coverage ≥ min_coverage,
+    # при равной — меньший порог; если coverage не достигается — fallback на max.
+    # coverage монотонна, так что допустимые пороги — суффикс кривой.
+    import numpy as np
+
+    thr, coverage, acc = curve
+    s = int(np.searchsorted(coverage, min_coverage, side="left"))
+    if s == len(thr):
+        # fallback — максимум покрытия любой ценой
+        return len(thr) - 2
+    # NB: argmax берёт первый максимум — т.е. наименьший порог при равной точности
+    return s + int(acc[s:].argmax())
+
+
+def sweep_thresholds(dists, correct, min_coverage: float) -> Dict[str, Any]:
+    thr, coverage, acc = curve = _curve(dists, correct)
+    i = _pick(curve, min_coverage)
+    return {
+        "delta": float(thr[i]),
+        "coverage": float(coverage[i]),
+        "acc_decided": float(acc[i]),
+        "score": (float(acc[i]), -float(thr[i])),
+    }
+
+
+def _held_out(d, ok, delta: float):
+    # NB: (coverage, точность на принятых) отложенной части при пороге delta
+    decided = d <= delta
+    n_dec = int(decided.sum())
+    return n_dec / len(d), (float(ok[decided].mean()) if n_dec else float("nan"))
+
+
+_RS: Dict[str, Any] = {}
+
+
+def _init_resample(dists, correct, coverages, method: str, folds: int, seed: int) -> None:
+    import numpy as np
+
+    _RS.update(
+        {
+            "d": np.asarray(dists, dtype=np.float64),
+            "ok": np.asarray(correct, dtype=bool),
+            "cov": list(coverages),
+            "method": method,
+            "folds": folds,
+            "seed": seed,
+        }
+    )
+
+
+def _resample_task(r: int):
+    # NB: одна перевыборка: порог подбираю на обучающей части для каждой цели
+    # из сетки, оцениваю на отложенной. Индексы — от (seed, r): результат не
+    # зависит от числа процессов.
+    import numpy as np
+
+    d, ok, n = _RS["d"], _RS["ok"], len(_RS["d"])
+    if _RS["method"] == "kfold":
+        perm = np.random.default_rng(_RS["seed"]).permutation(n)
+        test = np.zeros(n, dtype=bool)
+        test[np.array_split(perm, _RS["folds"])[r]] = True
+        train_idx, test_idx = np.flatnonzero(~test), np.flatnonzero(test)
+    else:
+        train_idx = np.random.default_rng([_RS["seed"], r]).integers(0, n, n)
+        test = np.ones(n, dtype=bool)
+        test[train_idx] = False  # NB: out-of-bag
+        test_idx = np.flatnonzero(test)
+    curve = _curve(d[train_idx], ok[train_idx])
+    out = []
+    for c in _RS["cov"]:
+        delta = float(curve[0][_pick(curve, c)])
+        if len(test_idx):
+            cov, acc = _held_out(d[test_idx], ok[test_idx], delta)
+        else:
+            cov, acc = float("nan"), float("nan")
+        out.append((delta, cov, acc))
+    return out
+
+
+def _interval(values, level: float) -> Dict[str, Any]:
+    import numpy as np
+
+    v = np.asarray(values, dtype=np.float64)
+    v = v[~np.isnan(v)]
+    if len(v) == 0:
+        return {"mean": None, "lo": None, "hi": None}
+    a = (1.0 - level) / 2
+    lo, hi = np.quantile(v, [a, 1.0 - a])
+    return {"mean": float(v.mean()), "lo": float(lo), "hi": float(hi)}
+
+
+def coverage_sweep(
+    dists,
+    correct,
+    coverages: Sequence[float],
+    resample: str = "none",
+    folds: int = 5,
+    n_boot: int = 200,
+    ci: float = 0.95,
+    seed: int = 0,
+    workers: int = 1,
+) -> Dict[str, Any]:
+    # NB: Ближайшие дистанции валидации считаются один раз, дальше вся сетка
+    # coverage — по одной отсортированной кривой. resample=kfold|bootstrap:
+    # порог подбирается на обучающей части, coverage/точность меряются на
+    # отложенной (k фолдов или out-of-bag), интервалы — перцентильные по
+    # перевыборкам (у kfold при малом k это почти min..max).
+    # workers>1 — перевыборки по процессам.
+    if resample not in RESAMPLING:
+        raise RuntimeError(f"❌ Unknown resampling: {resample}. Use one of {'|'.join(RESAMPLING)}.")
+    if not 0 < ci < 1:
+        raise RuntimeError("❌ Confidence level must be in (0, 1)")
+    n = len(dists)
+    curve = _curve(dists, correct)
+    thr, coverage, acc = curve
+    grid = []
+    for c in coverages:
+        i = _pick(curve, c)
+        grid.append(
+            {
+                "target": float(c),
+                "delta": float(thr[i]),
+                "coverage": float(coverage[i]),
+                "accuracy_on_decided": float(acc[i]),
+            }
+        )
+    out: Dict[str, Any] = {
+        "n_val": n,
+        # NB: полная кривая: каждый уникальный порог и его coverage/точность
+        "curve": {
+            "threshold": thr[:-1].tolist(),
+            "coverage": coverage[:-1].tolist(),
+            "accuracy_on_decided": acc[:-1].tolist(),
+        },
+        "grid": grid,
+        "resampling": None,
+    }
+    if resample == "none":
+        return out
+
+    if resample == "kfold":
+        if not 2 <= folds <= n:
+            raise RuntimeError(f"❌ k-fold needs 2 <= folds <= n_val ({n}), got {folds}")
+        rounds = folds
+    else:
+        if n_boot < 1:
+            raise RuntimeError("❌ Bootstrap needs at least one resample")
+        rounds = n_boot
+    init = (dists, correct, coverages, resample, folds, seed)
+    if workers > 1 and rounds > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=min(workers, rounds), initializer=_init_resample, initargs=init
+        ) as pool:
+            chunk = max(1, rounds // (4 * workers))
+            runs = list(pool.map(_resample_task, range(rounds), chunksize=chunk))
+    else:
+        _init_resample(*init)
+        runs = [_resample_task(r) for r in range(rounds)]
+        _RS.clear()
+
+    for g, row in enumerate(grid):
+        row["resampled"] = {
+            key: _interval([run[g][j] for run in runs], ci)
+            for j, key in enumerate(("delta", "coverage", "accuracy_on_decided"))
+        }
+    out["resampling"] = {
+        "method": resample,
+        "rounds": rounds,
+        "ci": float(ci),
+        "seed": int(seed),
+    }
+    return out
+
+
+def validation_nearest(ref_labels, refs_s, val_labels, val_X_s, metric_fn, workers: int = 1):
+    # NB: (ближайшие дистанции, угадан ли класс, предсказанный класс) для
+    # каждого вал. примера, tie-first как у decision. Встроенные метрики —
+    # тайлами val x эталоны с бегущим min/argmin (parallel.nearest_parallel):
+    # память — O(размер валидации), не O(M x N); workers>1 — куски валидации
+    # по процессам (эталоны в shared memory). Своя метрика — по-старому.
+    import numpy as np
+
+    if not isinstance(metric_fn, DistanceEngine):
+        results = nearest_classes_parallel(val_X_s, refs_s, ref_labels, metric_fn, workers)
+        dists = [m for m, _y, _i in results]
+        predicted = [y for _m, y, _i in results]
+        correct = [y_pred == y_true for y_pred, y_true in zip(predicted, val_labels)]
+        return dists, correct, predicted
+    dists, idxs = nearest_parallel(val_X_s, refs_s, metric_fn, workers)
+    predicted = np.asarray(ref_labels, dtype=object)[idxs]
+    correct = predicted == np.asarray(val_labels, dtype=object)
+    return dists, correct, predicted
+
+
+def _calibration_info(
+    dists, correct, min_coverage: float, predicted=None, min_per_class: int = 20
+) -> Dict[str, Any]:
+    # Порог — одним проходом по отсортированным дистанциям
+    best = sweep_thresholds(dists, correct, min_coverage)
+    info = {
+        "chosen_delta": best["delta"],
+        "coverage": best["coverage"],
+        "accuracy_on_decided": best["acc_decided"],
+        "n_val": len(dists),
+        "min_coverage_required": float(min_coverage),
+    }
+    if predicted is not None:
+        info.update(_per_class(dists, correct, predicted, min_coverage, best["delta"], min_per_class))
+    return info
+
+
+def _per_class(dists, correct, predicted, min_coverage, default, min_per_class) -> Dict[str, Any]:
+    # NB: Порог применяется к классу-победителю, поэтому вал. примеры делю по
+    # ПРЕДСКАЗАННОМУ классу и в каждой группе подбираю порог тем же правилом
+    # (макс. точность при coverage ≥ min_coverage) — каждый класс покрыт не
+    # меньше цели, значит и в целом тоже. Классы, где примеров меньше
+    # min_per_class, остаются на общем пороге (оценка по паре точек — шум).
+    import numpy as np
+
+    d = np.asarray(dists, dtype=np.float64)
+    ok = np.asarray(correct, dtype=bool)
+    labels = np.asarray(predicted, dtype=object)
+    per_class: Dict[str, Any] = {}
+    thr = np.full(len(d), float(default))
+    for cls in sorted(set(predicted)):
+        mask = labels == cls
+        n = int(mask.sum())
+        if n < min_per_class:
+            continue
+        best = sweep_thresholds(d[mask], ok[mask], min_coverage)
+        per_class[cls] = {
+            "delta": best["delta"],
+            "coverage": best["coverage"],
+            "accuracy_on_decided": best["acc_decided"],
+            "n_val": n,
+        }
+        thr[mask] = best["delta"]
+    # NB: итог по всей валидации с порогами по классам
+    decided = d <= thr
+    n_dec = int(decided.sum())
+    return {
+        "per_class": per_class,
+        "per_class_coverage": n_dec / len(d),
+        "per_class_accuracy_on_decided": float(ok[decided].mean()) if n_dec else None,
+        "min_per_class": int(min_per_class),
+    }
+
 
 def calibrate_delta(
     ref_labels: List[str],
@@ -14,60 +298,73 @@ def calibrate_delta(
     val_X_s: List[List[float]],
     metric_fn,
     min_coverage: float = 0.9,
+    workers: int = 1,
+    per_class: bool = False,
+    min_per_class: int = 20,
 ) -> Dict[str, Any]:
     # 1) Считаем для каждого вал. примера ближайшую дистанцию и предсказанный класс
-    stats = []
-    for y_true, x in zip(val_labels, val_X_s):
-        dists = [metric_fn(x, r) for r in refs_s]
-        m = min(dists)
-        idx = dists.index(m)
-        y_pred = ref_labels[idx]
-        stats.append({"dist": m, "y_true": y_true, "y_pred": y_pred})
-
-    # 2) Кандидаты порога: все уникальные расстояния + чуть > max
-    dists_sorted = sorted(set(s["dist"] for s in stats))
-    if not dists_sorted:
-        raise RuntimeError("❌ No distances computed for calibration (check val.csv)")
-    candidates = dists_sorted[:] + [dists_sorted[-1] * 1.01]
+    dists, correct, predicted = validation_nearest(
+        ref_labels, refs_s, val_labels, val_X_s, metric_fn, workers
+    )
+    # 2) Порог (per_class — ещё и свой порог для каждого класса, см. _per_class)
+    return _calibration_info(
+        dists, correct, min_coverage, predicted if per_class else None, min_per_class
+    )
 
-    best = None
-    for thr in candidates:
-        decided = [s for s in stats if s["dist"] <= thr]
-        coverage = len(decided) / len(stats)
-        if coverage < min_coverage:
-            continue
-        correct = sum(1 for s in decided if s["y_pred"] == s["y_true"])
-        acc = (correct / len(decided)) if decided else 0.0
-        score = (acc, -thr)  # NB: при равной точности берем меньший порог
-        if best is None or score > best["score"]:
-            best = {
-                "delta": float(thr),
-                "coverage": coverage,
-                "acc_decided": acc,
-                "score": score,
-            }
 
-    if best is None:
-        # fallback — максимум покрытия любой ценой
-        thr = dists_sorted[-1]
-        decided = [s for s in stats if s["dist"] <= thr]
-        coverage = len(decided) / len(stats)
-        correct = sum(1 for s in decided if s["y_pred"] == s["y_true"])
-        acc = (correct / len(decided)) if decided else 0.0
-        best = {
-            "delta": float(thr),
-            "coverage": coverage,
-            "acc_decided": acc,
-            "score": (acc, -thr),
-        }
+def calibrate_sweep(
+    ref_labels: List[str],
+    refs_s: List[List[float]],
+    val_labels: List[str],
+    val_X_s: List[List[float]],
+    metric_fn,
+    coverages: Sequence[float],
+    min_coverage: float = 0.9,
+    workers: int = 1,
+    per_class: bool = False,
+    min_per_class: int = 20,
+    **sweep,
+) -> Dict[str, Any]:
+    # NB: Как calibrate_delta (порог для min_coverage — "calibration"), плюс
+    # сетка coverage и кривая по тем же дистанциям (coverage_sweep, **sweep —
+    # resample/folds/n_boot/ci/seed)
+    dists, correct, predicted = validation_nearest(
+        ref_labels, refs_s, val_labels, val_X_s, metric_fn, workers
+    )
+    out = coverage_sweep(dists, correct, coverages, workers=workers, **sweep)
+    out["calibration"] = _calibration_info(
+        dists, correct, min_coverage, predicted if per_class else None, min_per_class
+    )
+    return out
 
-    return {
-        "chosen_delta": best["delta"],
-        "coverage": best["coverage"],
-        "accuracy_on_decided": best["acc_decided"],
-        "n_val": len(stats),
-        "min_coverage_required": float(min_coverage),
-    }
+
+def calibrated_thresholds(calibration_info: Dict[str, Any]):
+    # NB: порог(и) для решения: число или ClassThresholds, если калибровали по классам
+    delta = calibration_info["chosen_delta"]
+    if "per_class" not in calibration_info:
+        return delta
+    per_class = {c: v["delta"] for c, v in calibration_info["per_class"].items()}
+    return ClassThresholds(delta, per_class)
+
+
+def write_curve(out_path: Path, sweep: Dict[str, Any]) -> None:
+    # NB: .csv — только сетка (по строке на цель coverage), иначе весь JSON с кривой
+    if out_path.suffix.lower() == ".csv":
+        import csv
+
+        cols = ["target", "delta", "coverage", "accuracy_on_decided"]
+        extra = [f"{k}_{b}" for k in cols[1:] for b in ("mean", "lo", "hi")]
+        with out_path.open("w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(cols + (extra if sweep["resampling"] else []))
+            for row in sweep["grid"]:
+                vals = [row[c] for c in cols]
+                if sweep["resampling"]:
+                    vals += [row["resampled"][k][b] for k in cols[1:] for b in ("mean", "lo", "hi")]
+                w.writerow(vals)
+        return
+    with out_path.open("w", encoding="utf-8") as f:
+        json.dump(sweep, f, ensure_ascii=False, indent=2)
 
 
 def write_calibrated_config(out_path: Path, cfg_dict):
@@ -1,23 +1,593 @@
 # NB: Это «склейка»: парсер аргументов + вызовы модулей по шагам.
 # Добавил флаг --calibrate-only (иногда удобно показать подбор порога отдельно).
+# Подкоманды (build-index, condense, bench, ...) — первым словом: python3 -m ml_justify.cli build-index ...
 
 from __future__ import annotations
 from pathlib import Path
-import argparse, json, sys
+import argparse, json, sys, time
 
-from .config import read_config
-from .data_io import load_refs_csv, load_query, load_val_csv
+from .config import RESAMPLING, read_config
+from .data_io import PARSERS, load_query, load_queries, load_val_array
 from .metrics import get_metric
-from .scaling import apply_scaling, transform_minmax, transform_standard
-from .decision import nearest_class, build_ranking, make_result_dict
-from .calibrate import calibrate_delta, write_calibrated_config
-from .plot2d import plot_2d
+from .scaling import Scaler, transform_matrix, transform_vector
+from .decision import decide, nearest_classes, make_result_dict, top_k_order
+from .result_io import FORMATS, RankingView, write_result
+from .parallel import decide_block_parallel, default_workers
+from .model import load_references, search_refs
+from .storage import STORAGES
+from .instrument import LOGGER, NULL_TIMER, make_timer
+from .thresholds import ClassThresholds, applied_threshold, search_bound, thresholds_from_config
+
+# NB: калибровка, график, индекс, деревья и подкоманды импортируются там, где
+# нужны: одиночная классификация (python -m ml_justify.cli) их не грузит —
+# см. benchmarks/bench_startup.py
+
+
+def build_index_main(argv=None) -> int:
+    p = argparse.ArgumentParser(
+        prog="ml_justify.cli build-index",
+        description="Собрать бинарный индекс эталонов (метки + матрицы + скейлинг)",
+    )
+    p.add_argument("--refs", default="refs.csv")
+    p.add_argument("--config", default="config.yaml")
+    p.add_argument("--out", default="refs.idx")
+    strict = p.add_mutually_exclusive_group()
+    strict.add_argument("--strict", dest="strict", action="store_true")
+    strict.add_argument("--no-strict", dest="strict", action="store_false")
+    p.set_defaults(strict=True)
+    p.add_argument(
+        "--tree", action="store_true", help="Сохранить в индекс ещё и KD-дерево"
+    )
+    p.add_argument("--csv-parser", choices=PARSERS, default="auto")
+    args = p.parse_args(argv)
+
+    from .index_file import build_index
+
+    cfg = read_config(Path(args.config))
+    header = build_index(
+        Path(args.refs),
+        Path(args.out),
+        cfg["scale"],
+        strict=args.strict,
+        tree=args.tree,
+        parser=args.csv_parser,
+    )
+    print(
+        f"Index written to: {args.out} | n={header['n']} d={header['d']} "
+        f"scale={cfg['scale']} classes={len(header['classes'])}"
+        + (" +kd-tree" if args.tree else "")
+    )
+    return 0
+
+
+def update_index_main(argv=None) -> int:
+    # NB: Добавить/удалить эталоны в готовом индексе без разбора всего refs.csv и fit
+    import numpy as np
+
+    from .data_io import load_refs_array
+    from .index_file import open_index, write_index
+    from .updates import update_references
+
+    p = argparse.ArgumentParser(
+        prog="ml_justify.cli update-index",
+        description="Инкрементально обновить индекс эталонов (add/remove без полной пересборки)",
+    )
+    p.add_argument("--index", default="refs.idx")
+    p.add_argument("--add", default=None, help="csv с новыми эталонами (формат как refs.csv)")
+    p.add_argument(
+        "--remove", default=None, help="Индексы эталонов через запятую (по текущему индексу)"
+    )
+    p.add_argument("--out", default=None, help="Куда писать (по умолчанию — поверх --index)")
+    p.add_argument("--csv-parser", choices=PARSERS, default="auto")
+    args = p.parse_args(argv)
+    if not args.add and not args.remove:
+        raise RuntimeError("❌ Nothing to do: pass --add rows.csv and/or --remove 3,17")
+
+    t0 = time.perf_counter()
+    index = open_index(Path(args.index))
+    refs = {
+        "class_ids": index["class_ids"],
+        "raw": index["raw"],
+        "scaled": index["scaled"],
+        "scale_info": index["scale_info"],
+        "strict": index["strict"],
+        "d": index["d"],
+        "stats": index["stats"],
+        "index": index,
+    }
+    n0 = index["n"]
+    ids, labels, rows = [], [], None
+    if args.remove:
+        try:
+            ids = [int(x) for x in args.remove.split(",") if x.strip()]
+        except ValueError:
+            raise RuntimeError(f"❌ --remove expects comma-separated integers, got: {args.remove}")
+    if args.add:
+        labels, rows = load_refs_array(
+            Path(args.add), strict=index["strict"], dtype=index["raw"].dtype, parser=args.csv_parser
+        )
+    refs = update_references(refs, ids, labels, rows)
+    out = Path(args.out or args.index)
+    header = write_index(
+        out,
+        refs["class_ids"],
+        np.asarray(refs["raw"]),
+        np.asarray(refs["scaled"]),
+        refs["scale_info"],
+        strict=refs["strict"],
+        source=index["source"],
+        tree=index["tree"] is not None,
+        stats=refs["stats"],
+    )
+    print(
+        f"Index updated: {out} | n {n0} -> {header['n']} | "
+        f"rescaled columns: {refs.get('rescaled_columns', 0)}/{header['d']} | "
+        f"{time.perf_counter() - t0:.3f} s"
+    )
+    return 0
+
+
+def condense_main(argv=None) -> int:
+    # NB: Сжать refs.csv: CNN/ENN с учётом delta_max (см. condense.py)
+    import csv
+
+    import numpy as np
+
+    from .condense import compare_decisions, condense_references
+
+    p = argparse.ArgumentParser(
+        prog="ml_justify.cli condense",
+        description="Сократить набор эталонов (CNN/ENN с учётом порога), решения на эталонах те же",
+    )
+    p.add_argument("--refs", default="refs.csv")
+    p.add_argument("--config", default="config.yaml")
+    p.add_argument("--val", default=None, help="Сравнить решения полного и сжатого набора на валидации")
+    p.add_argument("--out", default="refs.condensed.csv")
+    p.add_argument(
+        "--scaler-out",
+        default=None,
+        help="Скейлер полного набора (по умолчанию <out>.scaler.json); сжатый набор — только с ним",
+    )
+    p.add_argument("--edit", action="store_true", help="Сначала ENN: убрать шумные эталоны на границах")
+    p.add_argument("--reduce", action="store_true", help="После CNN — проход Гейтса (ещё меньше, дольше)")
+    p.add_argument("--max-passes", type=int, default=10)
+    p.add_argument("--report", default=None, help="Записать отчёт (JSON)")
+    strict = p.add_mutually_exclusive_group()
+    strict.add_argument("--strict", dest="strict", action="store_true")
+    strict.add_argument("--no-strict", dest="strict", action="store_false")
+    p.set_defaults(strict=True)
+    p.add_argument("--csv-parser", choices=PARSERS, default="auto")
+    args = p.parse_args(argv)
+    if args.max_passes < 1:
+        raise RuntimeError("❌ --max-passes must be >= 1")
+
+    t0 = time.perf_counter()
+    cfg = read_config(Path(args.config))
+    metric_fn, metric_name = get_metric(cfg["metric"])
+    delta_max = thresholds_from_config(cfg)
+    refs = load_references(
+        cfg, refs_path=Path(args.refs), strict=args.strict, parser=args.csv_parser, config_path=args.config
+    )
+    class_ids, scaled = refs["class_ids"], refs["scaled"]
+    res = condense_references(
+        class_ids,
+        scaled,
+        metric_fn,
+        delta_max,
+        edit=args.edit,
+        reduce=args.reduce,
+        max_passes=args.max_passes,
+    )
+    keep = res["keep"]
+
+    with Path(args.refs).open("r", encoding="utf-8") as f:
+        header = next(csv.reader(f))
+    raw = np.asarray(refs["raw"])
+    with Path(args.out).open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(header)
+        for i in keep.tolist():
+            w.writerow([class_ids[i], *raw[i].tolist()])
+    scaler_out = None
+    if cfg["scale"] != "none":
+        # NB: refit по сжатому набору дал бы другие mins/means — решения бы поехали
+        scaler_out = Path(args.scaler_out or Path(args.out).with_suffix(".scaler.json"))
+        Scaler(cfg["scale"], refs["scale_info"]["params"], refs["stats"]).save(scaler_out)
+
+    report = {k: v for k, v in res.items() if k != "keep"}
+    print(
+        f"[{metric_name} | {cfg['scale']}] condensed {res['n_refs']} → {res['n_kept']} refs "
+        f"(x{res['reduction']:.1f} fewer; edited={res['n_edited']}, passes={res['passes']}) "
+        f"in {time.perf_counter() - t0:.2f}s"
+    )
+    if not res["converged"]:
+        print(
+            f"⚠️  Not converged after --max-passes {args.max_passes}: some refs may change "
+            f"their decision on the condensed set. Raise --max-passes."
+        )
+    if args.val:
+        val_labels, val_X = load_val_array(Path(args.val), expected_dim=refs["d"], parser=args.csv_parser)
+        val_X_s = transform_matrix(refs["scale_info"], val_X)
+        report["validation"] = cmp = compare_decisions(
+            class_ids, scaled, keep, val_X_s, val_labels, metric_fn, delta_max
+        )
+        print(
+            f"Validation: {cmp['changed']}/{cmp['n_val']} decisions changed "
+            f"(class→undecided {cmp['class_to_undecided']}, undecided→class "
+            f"{cmp['undecided_to_class']}, other class {cmp['class_changed']})"
+        )
+        for name in ("full", "condensed"):
+            acc = cmp[name]["accuracy_on_decided"]
+            print(
+                f"  {name:<9}: coverage≈{cmp[name]['coverage']:.2%} | "
+                + (f"acc_decided≈{acc:.2%}" if acc is not None else "acc_decided=n/a")
+            )
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Condensed refs written to: {args.out}")
+    if scaler_out is not None:
+        print(f"➡️  Use them with the full-set scaling: --refs {args.out} --scaler {scaler_out}")
+    return 0
+
+
+def bench_main(argv=None) -> int:
+    # NB: Встроенный бенчмарк по шагам cli.main на синтетике (см. bench.py)
+    import tempfile
+
+    from .bench import compare, run_bench
+
+    p = argparse.ArgumentParser(
+        prog="ml_justify.cli bench",
+        description="Бенчмарк по шагам (загрузка, скейлинг, решение, ranking, калибровка, запись) на синтетике",
+    )
+    p.add_argument("--n", type=int, nargs="+", default=[10000, 100000], help="Размеры набора эталонов")
+    p.add_argument("--d", type=int, default=16)
+    p.add_argument("--classes", type=int, default=10)
+    p.add_argument("--n-val", type=int, default=1000)
+    p.add_argument("--queries", type=int, default=1000, help="Запросов для пакетного шага")
+    p.add_argument("--top-k", type=int, default=None)
+    p.add_argument("--repeat", type=int, default=3, help="Время — лучшее из стольких прогонов")
+    p.add_argument("--no-memory", action="store_true", help="Без замера пика памяти (tracemalloc)")
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--data-dir", default=None, help="Куда писать синтетику (по умолчанию — временная папка)")
+    p.add_argument("--out", default="bench.json")
+    p.add_argument("--compare", default=None, help="bench.json прошлой версии — напечатать отношения")
+    args = p.parse_args(argv)
+    if min(args.n) < 1 or args.d < 1 or args.classes < 1:
+        raise RuntimeError("❌ --n, --d and --classes must be >= 1")
+
+    with tempfile.TemporaryDirectory(prefix="ml-justify-bench-") as tmp:
+        report = run_bench(
+            args.n,
+            args.d,
+            args.classes,
+            Path(args.data_dir or tmp),
+            n_val=args.n_val,
+            n_queries=args.queries,
+            repeat=args.repeat,
+            memory=not args.no_memory,
+            top_k=args.top_k,
+            workers=args.workers or default_workers(),
+            seed=args.seed,
+        )
+    for run in report["runs"]:
+        print(f"n={run['n']} d={args.d} classes={args.classes}:")
+        for name, st in run["stages"].items():
+            mem = f"  peak {st['peak_bytes'] / 2**20:9.1f} MiB" if "peak_bytes" in st else ""
+            print(f"  {name:<15} {st['seconds'] * 1e3:10.2f} ms{mem}")
+    if args.compare:
+        rows = compare(report, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+        report["comparison"] = {"baseline": args.compare, "rows": rows}
+        print(f"vs {args.compare} (ratio > 1 — slower):")
+        for row in rows:
+            ratio = f"x{row['ratio']:.2f}" if row["ratio"] is not None else "n/a"
+            print(f"  n={row['n']:<9} {row['stage']:<15} {ratio}")
+    Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Benchmark report written to: {args.out}")
+    return 0
+
+
+def _coverage_grid(text: str):
+    # NB: "0.5:0.95:0.05" (от:до:шаг, включая концы) или "0.8,0.9,0.95"
+    try:
+        if ":" in text:
+            lo, hi, step = (float(x) for x in text.split(":"))
+            if step <= 0:
+                raise ValueError
+            n = int(round((hi - lo) / step))
+            grid = [round(lo + i * step, 12) for i in range(n + 1)]
+        else:
+            grid = [float(x) for x in text.split(",") if x.strip()]
+    except ValueError:
+        raise RuntimeError(
+            f"❌ Bad --coverage-grid: {text!r}\n➡️  Use start:stop:step (e.g. 0.5:0.95:0.05) or 0.8,0.9,0.95"
+        ) from None
+    if not grid:
+        raise RuntimeError("❌ --coverage-grid is empty")
+    return grid
+
+
+def _print_calibration(info) -> None:
+    print(
+        f"Calibrated δ*: {info['chosen_delta']:.6g} | "
+        f"coverage≈{info['coverage']:.2%} | "
+        f"acc_decided≈{info['accuracy_on_decided']:.2%}"
+    )
+    if "per_class" in info:
+        acc = info["per_class_accuracy_on_decided"]
+        print(
+            f"Per-class δ ({len(info['per_class'])} classes, others δ*): "
+            f"coverage≈{info['per_class_coverage']:.2%} | "
+            + (f"acc_decided≈{acc:.2%}" if acc is not None else "acc_decided=n/a")
+        )
+        for cls, row in info["per_class"].items():
+            print(f"  {cls}: δ={row['delta']:.6g} (n={row['n_val']}, coverage≈{row['coverage']:.2%})")
+
+
+def _print_sweep(sweep) -> None:
+    rs = sweep["resampling"]
+    head = "target   delta        coverage  acc_decided"
+    if rs:
+        head += f"   held-out ({rs['method']} x{rs['rounds']}, {rs['ci']:.0%} CI)"
+    print(head)
+    for row in sweep["grid"]:
+        line = (
+            f"{row['target']:<8.4g} {row['delta']:<12.6g} "
+            f"{row['coverage']:<9.2%} {row['accuracy_on_decided']:<11.2%}"
+        )
+        if rs:
+            cov, acc = row["resampled"]["coverage"], row["resampled"]["accuracy_on_decided"]
+            if acc["mean"] is not None:
+                line += (
+                    f"  cov {cov['mean']:.2%} [{cov['lo']:.2%}, {cov['hi']:.2%}]"
+                    f"  acc {acc['mean']:.2%} [{acc['lo']:.2%}, {acc['hi']:.2%}]"
+                )
+        print(line)
+
+
+def _load_scaler(args):
+    # NB: --scaler — готовый скейлер вместо fit по --refs (у индекса скейлинг свой)
+    if args.scaler is None:
+        return None
+    if args.index is not None:
+        raise RuntimeError("❌ --scaler applies to --refs only (the index already holds its scaling)")
+    return Scaler.load(Path(args.scaler))
+
+
+def serve_main(argv=None) -> int:
+    # NB: импорт тут — http.server нужен только серверу
+    from .model import Model
+    from .server import serve
+
+    p = argparse.ArgumentParser(
+        prog="ml_justify.cli serve",
+        description="Сервер классификации: эталоны грузятся один раз, ответы как result.json",
+    )
+    p.add_argument("--refs", default="refs.csv")
+    p.add_argument("--index", default=None)
+    p.add_argument("--config", default="config.yaml")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--unix", default=None, help="Слушать unix-сокет вместо TCP")
+    p.add_argument("--top-k", type=int, default=None)
+    strict = p.add_mutually_exclusive_group()
+    strict.add_argument("--strict", dest="strict", action="store_true")
+    strict.add_argument("--no-strict", dest="strict", action="store_false")
+    p.set_defaults(strict=None)  # NB: None — для csv строго, у индекса своя
+    p.add_argument("--csv-parser", choices=PARSERS, default="auto")
+    p.add_argument(
+        "--storage",
+        choices=STORAGES,
+        default="float64",
+        help="float32/int8 — компактные эталоны в памяти (ответы те же)",
+    )
+    p.add_argument("--scaler", default=None, help="Подобранный скейлер (--save-scaler) вместо fit по --refs")
+    p.add_argument("--verbose", action="store_true", help="Логировать каждый запрос")
+    p.add_argument(
+        "--cache-mb",
+        type=float,
+        default=0,
+        help="LRU-кэш решений для повторяющихся запросов, бюджет в МБ (0 — выключен)",
+    )
+    p.add_argument("--cache-ttl", type=float, default=None, help="Время жизни записи кэша, сек")
+    p.add_argument(
+        "--cache-quantum",
+        type=float,
+        default=0.0,
+        help="Шаг квантования отскейленного q для ключа (0 — только точные повторы)",
+    )
+    p.add_argument(
+        "--batch-window-ms",
+        type=float,
+        default=None,
+        help="asyncio-фронт с микро-батчингом: ждать столько мс, собирая запросы в пачку",
+    )
+    p.add_argument(
+        "--max-batch", type=int, default=64, help="Максимальный размер пачки (с --batch-window-ms)"
+    )
+    args = p.parse_args(argv)
+    if args.top_k is not None and args.top_k < 1:
+        raise RuntimeError("❌ --top-k must be >= 1")
+    if args.batch_window_ms is not None and args.batch_window_ms < 0:
+        raise RuntimeError("❌ --batch-window-ms must be >= 0")
+    if args.max_batch < 1:
+        raise RuntimeError("❌ --max-batch must be >= 1")
+    if args.cache_mb < 0:
+        raise RuntimeError("❌ --cache-mb must be >= 0")
+    cache = None
+    if args.cache_mb:
+        from .cache import QueryCache
+
+        cache = QueryCache(int(args.cache_mb * 2**20), ttl=args.cache_ttl, quantum=args.cache_quantum)
+
+    model = Model.load(
+        args.config,
+        refs_path=args.refs,
+        index_path=args.index,
+        strict=args.strict,
+        parser=args.csv_parser,
+        storage=args.storage,
+        cache=cache,
+        scaler=_load_scaler(args),
+    )
+    if args.batch_window_ms is not None:
+        from .microbatch import serve_async
+
+        serve_async(
+            model,
+            host=args.host,
+            port=args.port,
+            unix_socket=args.unix,
+            top_k=args.top_k,
+            window_ms=args.batch_window_ms,
+            max_batch=args.max_batch,
+            verbose=args.verbose,
+        )
+        return 0
+    serve(
+        model,
+        host=args.host,
+        port=args.port,
+        unix_socket=args.unix,
+        top_k=args.top_k,
+        verbose=args.verbose,
+    )
+    return 0
+
+
+def run_batch(
+    args,
+    class_ids,
+    ref_vecs_s,
+    scale_info,
+    calibration_info,
+    metric_fn,
+    result_cfg,
+    d: int,
+    delta_max,
+    tree=None,
+    workers: int = 1,
+    tm=NULL_TIMER,
+) -> int:
+    # NB: Пакетный режим: грузим все запросы, решаем одним блочным проходом
+    # и пишем по одному результату (query + summary) на строку JSONL.
+    t0 = time.perf_counter()
+    tm.begin("5_load_queries")
+    Q = load_queries(Path(args.batch), expected_dim=d)
+    Q_s = transform_matrix(scale_info, Q)
+    tm.rows(len(Q))
+    tm.begin("5_decide", rows=len(Q))
+    if tree is not None:
+        # NB: с деревом (или --early-exit) всё дальше delta_max отсекается (min_distance=null у таких)
+        decisions = [
+            (*r, None)
+            for r in nearest_classes(
+                Q_s, ref_vecs_s, class_ids, metric_fn, tree=tree, max_dist=search_bound(delta_max)
+            )
+        ]
+    else:
+        # NB: одно ядро: победитель и (по --top-k) ranking из одного прохода;
+        # с --workers — куски запросов по процессам
+        decisions = decide_block_parallel(
+            Q_s,
+            ref_vecs_s,
+            class_ids,
+            metric_fn,
+            workers,
+            with_ranking=args.top_k is not None,
+            top_k=args.top_k,
+        )
+
+    n_class = 0
+    tm.begin("7_write", rows=len(decisions))
+    with Path(args.out).open("w", encoding="utf-8") as f:
+        for i, (q, q_s, (min_d, winner_class, winner_idx, ranking)) in enumerate(
+            zip(Q, Q_s, decisions)
+        ):
+            res = make_result_dict(
+                {},
+                result_cfg,
+                d,
+                scale_info,
+                calibration_info,
+                list(q),
+                list(q_s),
+                None,
+                ranking,
+                winner_idx,
+                winner_class,
+                delta_max,
+                min_distance=min_d,
+            )
+            n_class += res["summary"]["decision"] == "class"
+            line = {"index": i, "query": res["query"], "summary": res["summary"]}
+            if ranking is not None:
+                line["ranking"] = ranking
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    tm.close()
+    elapsed = time.perf_counter() - t0
+
+    n = len(decisions)
+    print(
+        f"[{result_cfg['metric']} | {result_cfg['scale']}] batch: {n} queries, "
+        f"class={n_class}, undecided={n - n_class} | "
+        f"{elapsed:.3f}s → {n / elapsed if elapsed > 0 else float('inf'):.1f} q/s"
+    )
+    print(f"Saved batch results to: {args.out}")
+    return 0
 
 
 def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+
     p = argparse.ArgumentParser(description="ML-Justify CLI")
     p.add_argument("--refs", default="refs.csv")
+    p.add_argument(
+        "--index",
+        default=None,
+        help="Готовый индекс из build-index (вместо разбора --refs)",
+    )
     p.add_argument("--query", default="q.json")
+    p.add_argument(
+        "--batch",
+        default=None,
+        help="Файл с пачкой запросов (.jsonl/.csv/.npy); --out пишется как JSONL",
+    )
+    p.add_argument(
+        "--top-k",
+        type=int,
+        default=None,
+        help="В ranking только k ближайших эталонов (по умолчанию — все)",
+    )
+    p.add_argument(
+        "--with-distances",
+        action="store_true",
+        help="Положить в result.json полный массив distances (N чисел)",
+    )
+    p.add_argument(
+        "--no-ranking",
+        action="store_true",
+        help="Не писать ranking в result.json (только summary и остальное)",
+    )
+    p.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="pretty",
+        help="result.json: pretty (indent=2), compact (без отступов) или npz (бинарный)",
+    )
+    p.add_argument(
+        "--tree",
+        action="store_true",
+        help="Пакетный режим: искать ближайший через KD-дерево (из индекса или построить на лету)",
+    )
+    p.add_argument(
+        "--early-exit",
+        action="store_true",
+        help="Пакетный режим, только решение: отсечение эталонов по частичной дистанции (большие d)",
+    )
     p.add_argument("--config", default="config.yaml")
     p.add_argument("--out", default="result.json")
 
@@ -29,7 +599,35 @@ def main(argv=None) -> int:
     strict = p.add_mutually_exclusive_group()
     strict.add_argument("--strict", dest="strict", action="store_true")
     strict.add_argument("--no-strict", dest="strict", action="store_false")
-    p.set_defaults(strict=True)
+    p.set_defaults(strict=None)  # NB: None — для csv строго, у индекса своя
+    p.add_argument(
+        "--csv-parser",
+        choices=PARSERS,
+        default="auto",
+        help="auto: pyarrow, если установлен (иначе обычный csv-путь)",
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Процессов для --batch и калибровки (0 — по числу ядер)",
+    )
+    p.add_argument(
+        "--storage",
+        choices=STORAGES,
+        default="float64",
+        help="Хранение эталонов для поиска (--batch, калибровка): float32/int8 — компактно, решения те же",
+    )
+    p.add_argument(
+        "--scaler",
+        default=None,
+        help="Взять подобранный скейлер из файла (без fit по --refs)",
+    )
+    p.add_argument(
+        "--save-scaler",
+        default=None,
+        help="Сохранить подобранный скейлер (JSON) — для следующих запусков с --scaler",
+    )
 
     # калибровка
     p.add_argument("--calibrate", action="store_true")
@@ -41,86 +639,274 @@ def main(argv=None) -> int:
     p.add_argument("--val", default=None)
     p.add_argument("--coverage", type=float, default=0.9)
     p.add_argument("--write-calibrated-config", default=None)
+    p.add_argument(
+        "--per-class",
+        action="store_true",
+        help="Калибровать свой delta_max для каждого класса (delta_max_per_class в конфиге)",
+    )
+    p.add_argument(
+        "--min-per-class",
+        type=int,
+        default=20,
+        help="С --per-class: меньше стольких вал. примеров у класса — общий порог",
+    )
+    p.add_argument(
+        "--coverage-grid",
+        default=None,
+        help="Сетка coverage за один проход (0.5:0.95:0.05 или 0.8,0.9): порог и точность для каждой цели",
+    )
+    p.add_argument(
+        "--resample",
+        choices=RESAMPLING,
+        default="none",
+        help="С --coverage-grid: оценка на отложенных данных (k фолдов или bootstrap/out-of-bag) с интервалами",
+    )
+    p.add_argument("--folds", type=int, default=5)
+    p.add_argument("--n-boot", type=int, default=200)
+    p.add_argument("--ci", type=float, default=0.95, help="Уровень доверительных интервалов")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument(
+        "--curve-out",
+        default=None,
+        help="Куда писать кривую точность–coverage и сетку (.json; .csv — только сетка)",
+    )
+
+    # замеры по шагам
+    p.add_argument(
+        "--timings",
+        action="store_true",
+        help="Время (wall/CPU) и число строк по каждому шагу — блок timings в result.json",
+    )
+    p.add_argument(
+        "--timings-memory",
+        action="store_true",
+        help="Ещё и пик аллокаций по шагам (tracemalloc — заметно медленнее)",
+    )
+    p.add_argument(
+        "--timings-log",
+        action="store_true",
+        help="Строка JSON на шаг в лог ml_justify.timings (stderr)",
+    )
 
     args = p.parse_args(argv)
+    if args.top_k is not None and args.top_k < 1:
+        raise RuntimeError("❌ --top-k must be >= 1")
+    if args.workers < 0:
+        raise RuntimeError("❌ --workers must be >= 0")
+    workers = args.workers or default_workers()
+    if args.timings_log:
+        import logging
+
+        logger = logging.getLogger(LOGGER)
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+    # NB: без флагов (и без хука профилировщика) — пустышка, замеров нет
+    tm = make_timer(args.timings, memory=args.timings_memory, log=args.timings_log)
+    try:
+        return _classify(args, tm, workers)
+    finally:
+        # NB: и при ошибке: --timings-memory не оставляет tracemalloc включённым
+        tm.close()
 
+
+def _classify(args, tm, workers: int) -> int:
+    # NB: шаги main после разбора аргументов (tm закрывает main)
     # 1) читаю конфиг
+    tm.begin("1_config")
     cfg = read_config(Path(args.config))
     metric_fn, metric_name = get_metric(cfg["metric"])
-    delta_max = cfg["delta_max"]
+    # NB: число/None или ClassThresholds (delta_max_per_class)
+    delta_max = thresholds_from_config(cfg)
     tie_break = cfg["tie_break"]
     scale = cfg["scale"]
 
-    # 2) грузим эталоны и q
-    class_ids, ref_vecs = load_refs_csv(Path(args.refs), strict=args.strict)
-    d = len(ref_vecs[0])
-    q = load_query(Path(args.query), expected_dim=d)
+    # 2) грузим эталоны (csv или mmap-индекс; для csv тут же fit скейлинга) и q
+    tm.begin("2_load")
+    refs = load_references(
+        cfg,
+        refs_path=Path(args.refs),
+        index_path=args.index,
+        strict=args.strict,
+        parser=args.csv_parser,
+        config_path=args.config,
+        storage=args.storage,
+        scaler=_load_scaler(args),
+    )
+    if args.save_scaler:
+        Scaler(scale, refs["scale_info"].get("params"), refs["stats"]).save(Path(args.save_scaler))
+    index = refs["index"]
+    class_ids, d = refs["class_ids"], refs["d"]
+    args.strict = refs["strict"]  # NB: фактическая (у индекса — с которой собран)
+    tm.rows(len(class_ids))
+    q = None
+    if not args.batch:
+        q = load_query(Path(args.query), expected_dim=d)
+    elif args.plot:
+        raise RuntimeError("❌ --plot is not supported with --batch")
+
+    # 3) скейлим (параметры уже подобраны по эталонам — трансформирую только q)
+    tm.begin("3_scale")
+    ref_vecs_s, scale_info = refs["scaled"], refs["scale_info"]
+    q_s = transform_vector(scale_info, q) if q is not None else None
+
+    tree = None
+    if args.tree and args.early_exit:
+        raise RuntimeError("❌ Choose one of --tree / --early-exit")
+    if args.tree and not args.batch:
+        # NB: одиночный q и так считает все дистанции (ranking) — дереву тут делать нечего
+        raise RuntimeError("❌ --tree requires --batch")
+    if args.early_exit and not args.batch:
+        # NB: режим «только решение», а одиночный q всегда пишет ranking
+        raise RuntimeError("❌ --early-exit requires --batch")
+    if args.tree and args.batch:
+        if args.top_k is not None:
+            raise RuntimeError("❌ --tree cannot be combined with --top-k in --batch mode")
+        from .kdtree import KDTree
+
+        if index is not None and index["tree"] is not None:
+            tree = KDTree.from_arrays(ref_vecs_s, index["tree"])
+        else:
+            tree = KDTree.build(ref_vecs_s)
+    if args.early_exit and args.batch:
+        if args.top_k is not None:
+            raise RuntimeError("❌ --early-exit is decision-only and cannot be combined with --top-k")
+        from .early_exit import PartialDistanceSearch
 
-    # 3) скейлим
-    ref_vecs_s, q_s, scale_info = apply_scaling(scale, ref_vecs, q)
+        # NB: тот же интерфейс nearest(q, metric, max_dist), что у KD-дерева
+        tree = PartialDistanceSearch.build(ref_vecs_s)
 
     # 4) калибровка (если просили)
     calibration_info = None
     if args.calibrate or args.calibrate_only:
         if not args.val:
             raise RuntimeError("❌ --calibrate requires --val path to validation csv")
-        val_labels, val_X = load_val_csv(Path(args.val), expected_dim=d)
-        # NB: применяю ТО ЖЕ преобразование, что и к эталонам/q
-        if scale == "none":
-            val_X_s = val_X
-        elif scale == "minmax":
-            mins = scale_info["params"]["mins"]
-            ranges = scale_info["params"]["ranges"]
-            val_X_s = [transform_minmax(v, mins, ranges) for v in val_X]
-        else:
-            means = scale_info["params"]["means"]
-            stds = scale_info["params"]["stds"]
-            val_X_s = [transform_standard(v, means, stds) for v in val_X]
+        from .calibrate import (
+            calibrate_delta,
+            calibrate_sweep,
+            calibrated_thresholds,
+            write_calibrated_config,
+            write_curve,
+        )
 
-        calibration_info = calibrate_delta(
-            class_ids,
-            ref_vecs_s,
-            val_labels,
-            val_X_s,
-            metric_fn,
-            min_coverage=args.coverage,
+        tm.begin("4_calibrate")
+        val_labels, val_X = load_val_array(
+            Path(args.val), expected_dim=d, parser=args.csv_parser
         )
-        delta_max = calibration_info["chosen_delta"]
+        tm.rows(len(val_labels))
+        # NB: применяю ТО ЖЕ преобразование, что и к эталонам/q
+        val_X_s = transform_matrix(scale_info, val_X)
+
+        if args.coverage_grid is None and (args.resample != "none" or args.curve_out):
+            raise RuntimeError("❌ --resample/--curve-out need --coverage-grid")
+        if args.coverage_grid is None:
+            calibration_info = calibrate_delta(
+                class_ids,
+                search_refs(refs),
+                val_labels,
+                val_X_s,
+                metric_fn,
+                min_coverage=args.coverage,
+                workers=workers,
+                per_class=args.per_class,
+                min_per_class=args.min_per_class,
+            )
+        else:
+            # NB: дистанции валидации — один раз на всю сетку и точку --coverage
+            sweep = calibrate_sweep(
+                class_ids,
+                search_refs(refs),
+                val_labels,
+                val_X_s,
+                metric_fn,
+                _coverage_grid(args.coverage_grid),
+                min_coverage=args.coverage,
+                workers=workers,
+                per_class=args.per_class,
+                min_per_class=args.min_per_class,
+                resample=args.resample,
+                folds=args.folds,
+                n_boot=args.n_boot,
+                ci=args.ci,
+                seed=args.seed,
+            )
+            calibration_info = sweep.pop("calibration")
+            _print_sweep(sweep)
+            if args.curve_out:
+                write_curve(Path(args.curve_out), sweep)
+                print(f"Coverage curve written to: {args.curve_out}")
+        delta_max = calibrated_thresholds(calibration_info)
 
         if args.write_calibrated_config:
             new_cfg = {
                 "metric": cfg["metric"],
-                "delta_max": float(delta_max),
+                "delta_max": float(calibration_info["chosen_delta"]),
                 "tie_break": tie_break,
                 "scale": scale,
             }
+            if isinstance(delta_max, ClassThresholds):
+                new_cfg["delta_max_per_class"] = delta_max.per_class
             write_calibrated_config(Path(args.write_calibrated_config), new_cfg)
             print(f"Calibrated config written to: {args.write_calibrated_config}")
 
         if args.calibrate_only:
             # NB: По запросу — заканчиваю на калибровке, не классифицирую q
-            print(
-                f"Calibrated δ*: {calibration_info['chosen_delta']:.6g} | "
-                f"coverage≈{calibration_info['coverage']:.2%} | "
-                f"acc_decided≈{calibration_info['accuracy_on_decided']:.2%}"
-            )
+            _print_calibration(calibration_info)
+            tm.close()
             return 0
 
-    # 5) считаю решение для q (уже в скейленом пространстве)
-    min_d, winner_class, winner_idx = nearest_class(
+    result_cfg = {
+        "metric": metric_name,
+        "tie_break": tie_break,
+        "scale": scale,
+        "strict": args.strict,
+    }
+    if isinstance(delta_max, ClassThresholds):
+        # NB: порог по каждой строке эталонов — один раз, дальше чтение по winner_index
+        delta_max = delta_max.bind(class_ids)
+
+    # 5*) пакетный режим — отдельная ветка, дальше только одиночный q
+    if args.batch:
+        return run_batch(
+            args,
+            class_ids,
+            ref_vecs_s if tree is not None else search_refs(refs),
+            scale_info,
+            calibration_info,
+            metric_fn,
+            result_cfg,
+            d,
+            delta_max,
+            tree=tree,
+            workers=workers,
+            tm=tm,
+        )
+
+    # 5) считаю решение для q (уже в скейленом пространстве):
+    # дистанции один раз → победитель + ranking (дереву тут делать нечего).
+    # ranking — ленивый (порядок + дистанции), словари строит только писатель
+    tm.begin("5_decide", rows=len(class_ids))
+    min_d, winner_class, winner_idx, distances, _ = decide(
         q_s, ref_vecs_s, class_ids, metric_fn
     )
-    distances, ranking = build_ranking(class_ids, ref_vecs_s, q_s, metric_fn)
+    ranking = None
+    if not args.no_ranking:
+        ranking = RankingView(top_k_order(distances, args.top_k), distances, class_ids)
 
     # 6) визуализация (если надо)
     if args.plot:
+        tm.begin("6_plot")
         if d != 2:
             raise RuntimeError("❌ --plot works only when d==2")
+        from .plot2d import plot_2d
+
         plot_2d(
             ref_vecs_s,
             class_ids,
             q_s,
-            delta_max,
+            applied_threshold(delta_max, winner_idx, winner_class),
             metric_name,
             scale,
             Path(args.plot_file),
@@ -128,20 +914,17 @@ def main(argv=None) -> int:
         print(f"Saved plot to: {args.plot_file}")
 
     # 7) собираю и пишу result.json
+    tm.end()
     files = {
         "refs": args.refs,
+        "index": args.index,
         "query": args.query,
         "config": args.config,
         "val": args.val,
     }
     result = make_result_dict(
         files,
-        {
-            "metric": metric_name,
-            "tie_break": tie_break,
-            "scale": scale,
-            "strict": args.strict,
-        },
+        result_cfg,
         d,
         scale_info,
         calibration_info,
@@ -152,31 +935,44 @@ def main(argv=None) -> int:
         winner_idx,
         winner_class,
         delta_max,
+        # NB: хук профилировщика сам по себе блок в result.json не добавляет
+        timings=tm.as_dict() if args.timings or args.timings_memory else None,
     )
-    with Path(args.out).open("w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.no_ranking:
+        del result["ranking"]
+    if args.with_distances:
+        result["distances"] = distances  # NB: массив — писатель выдаст его кусками
+    tm.begin("7_write", rows=len(ranking) if ranking is not None else 0)
+    write_result(Path(args.out), result, fmt=args.format)
+    tm.close()
 
     # 8) краткий итог в консоль
-    if delta_max is None or min_d <= float(delta_max):
+    threshold = applied_threshold(delta_max, winner_idx, winner_class)
+    if result["summary"]["decision"] == "class":
         print(
             f"[{metric_name} | {scale}] min δ={min_d:.6g} at #{winner_idx} → class='{winner_class}'"
         )
     else:
         print(
-            f"[{metric_name} | {scale}] min δ={min_d:.6g}  > δ_max={delta_max} → decision: UNDECIDED"
+            f"[{metric_name} | {scale}] min δ={min_d:.6g}  > δ_max={threshold} → decision: UNDECIDED"
         )
 
     if calibration_info:
-        print(
-            f"Calibrated δ*: {calibration_info['chosen_delta']:.6g} | "
-            f"coverage≈{calibration_info['coverage']:.2%} | "
-            f"acc_decided≈{calibration_info['accuracy_on_decided']:.2%}"
-        )
+        _print_calibration(calibration_info)
 
     print(f"Saved detailed result to: {args.out}")
     return 0
 
 
+COMMANDS = {
+    "bench": bench_main,
+    "condense": condense_main,
+    "build-index": build_index_main,
+    "update-index": update_index_main,
+    "serve": serve_main,
+}
+
+
 if __name__ == "__main__":
     try:
         raise SystemExit(main())
@@ -0,0 +1,238 @@
+# NB: Сжатие набора эталонов (prototype condensation) для 1-NN с порогом.
+# Внутренние эталоны класса почти никогда не побеждают, но каждый запрос
+# платит за них в nearest_class. Оставляю подмножество S, которое для каждого
+# исходного эталона x даёт то же решение, что полный набор (а полный для x —
+# это сам x: class = его метка):
+#   * edit (ENN, Уилсон/Гейтс-стиль) — по желанию сначала выбрасываю эталоны,
+#     чей ближайший сосед (из остальных, в пределах порога) другого класса:
+#     шум на границах классов, который только раздувает S;
+#   * condense (CNN, Харт) — x «поглощён», если ближайший в S того же класса
+#     И на дистанции ≤ delta_max (порог класса x); иначе x добавляется в S.
+#     Проходы повторяю, пока добавлений нет (добавленный эталон другого
+#     класса может «отобрать» уже поглощённые точки);
+#   * reduce (Гейтс, RNN) — по желанию пробую выкинуть каждый эталон S, если
+#     все точки, для которых он ближайший, остаются поглощёнными без него.
+# Всё считается в отскейленном пространстве полного набора: сжатый набор
+# надо использовать с ТЕМ ЖЕ скейлингом (сохраняю скейлер, --scaler).
+
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+import math
+
+from .metrics import BLOCK_ELEMS, DistanceEngine, as_matrix
+
+
+def _fail(msg: str):
+    raise RuntimeError(msg)
+
+
+def _thresholds(labels: List[str], delta_max):
+    # NB: порог класса каждой строки (inf — без порога); delta_max — число/None
+    # или ClassThresholds
+    import numpy as np
+
+    from .thresholds import ClassThresholds
+
+    if isinstance(delta_max, ClassThresholds):
+        return delta_max.bind(labels).by_ref
+    value = math.inf if delta_max is None else float(delta_max)
+    return np.full(len(labels), value)
+
+
+def _nearest(engine: DistanceEngine, Q, R):
+    # NB: (дистанции, индексы) ближайшего в R для каждой строки Q — тайлами
+    import numpy as np
+
+    if len(R) == 0:
+        return np.full(len(Q), np.inf), np.full(len(Q), -1, dtype=np.int64)
+    return engine.nearest(Q, R)
+
+
+def _edit(engine, X, y, thr) -> Any:
+    # NB: ENN: маска «оставить». Ближайший сосед среди остальных (не сам x):
+    # другого класса и в пределах порога — x шумный, выкидываю.
+    import numpy as np
+
+    n = len(X)
+    keep = np.ones(n, dtype=bool)
+    step = max(1, BLOCK_ELEMS // max(1, n))
+    for s in range(0, n, step):
+        D = engine.pairwise(X[s : s + step], X)
+        rows = np.arange(len(D))
+        D[rows, s + rows] = np.inf
+        j = D.argmin(axis=1)
+        dj = D[rows, j]
+        keep[s : s + step] = ~((y[j] != y[s : s + step]) & (dj <= thr[s : s + step]))
+    return keep
+
+
+def _absorbed(y_cand, y_pt, d, thr):
+    return (y_cand == y_pt) & (d <= thr)
+
+
+def _condense(engine, X, y, thr, max_passes: int):
+    # NB: Харт: S стартует с первого эталона каждого класса (порядок файла —
+    # результат детерминирован). Точки обрабатываю блоками: ближайший в S —
+    # одной матрицей, а непоглощённые в блоке добавляю по очереди, сверяя
+    # каждую только с добавленными в этом же блоке. S держу отсортированным по
+    # исходному индексу, ничьи — по (дистанция, индекс): как потом решает
+    # nearest_class на сжатом наборе (tie-first), а не по порядку поглощения.
+    # Возвращаю (S, проходов, сошлось ли до max_passes).
+    import numpy as np
+
+    n = len(X)
+    _, first = np.unique(y, return_index=True)
+    in_s = np.zeros(n, dtype=bool)
+    in_s[first] = True
+    S = np.sort(first)
+    block = max(64, min(4096, BLOCK_ELEMS // max(1, len(X[0]) * 64)))
+    passes, converged = 0, False
+    for passes in range(1, max_passes + 1):
+        added = 0
+        for s in range(0, n, block):
+            idx = np.arange(s, min(n, s + block))
+            idx = idx[~in_s[idx]]
+            if len(idx) == 0:
+                continue
+            d, j = _nearest(engine, X[idx], X[S])
+            win = S[j]
+            fresh: List[int] = []
+            for k in np.flatnonzero(~_absorbed(y[win], y[idx], d, thr[idx])).tolist():
+                i = int(idx[k])
+                dk, wk = d[k], int(win[k])
+                if fresh:
+                    df = engine.to_refs(X[i], X[fresh])
+                    jf = int(df.argmin())  # NB: fresh — по возрастанию индекса
+                    if (df[jf], fresh[jf]) < (dk, wk):
+                        dk, wk = df[jf], fresh[jf]
+                if not _absorbed(y[wk], y[i], dk, thr[i]):
+                    fresh.append(i)
+                    in_s[i] = True
+            if fresh:
+                S = np.union1d(S, fresh)
+            added += len(fresh)
+        if not added:
+            converged = True
+            break
+    return S, passes, converged
+
+
+def _reduce(engine, X, y, thr, S):
+    # NB: Гейтс: эталон из S лишний, если все точки, для которых он ближайший
+    # в S, остаются поглощёнными без него
+    import numpy as np
+
+    keep = np.ones(len(S), dtype=bool)
+    d, j = _nearest(engine, X, X[S])
+    for k in range(len(S)):
+        keep[k] = False
+        owned = np.flatnonzero(j == k)
+        cur = np.flatnonzero(keep)
+        if len(cur) == 0:
+            keep[k] = True
+            continue
+        d2, j2 = _nearest(engine, X[owned], X[S[cur]])
+        if _absorbed(y[S[cur[j2]]], y[owned], d2, thr[owned]).all():
+            # NB: владельцы переходят к новым ближайшим
+            j[owned] = cur[j2]
+        else:
+            keep[k] = True
+    return S[keep]
+
+
+def condense_references(
+    class_ids: List[str],
+    refs_s,
+    metric_fn,
+    delta_max=None,
+    edit: bool = False,
+    reduce: bool = False,
+    max_passes: int = 10,
+) -> Dict[str, Any]:
+    # NB: Возвращаю индексы оставленных эталонов (по возрастанию) + счётчики;
+    # converged=False — не хватило max_passes (стоит поднять).
+    # refs_s — отскейленная матрица; delta_max — число/None или ClassThresholds.
+    import numpy as np
+
+    if not isinstance(metric_fn, DistanceEngine):
+        _fail("❌ Condensation supports only built-in metrics: L1 | L2 | Linf")
+    X = as_matrix(refs_s)
+    y = np.asarray(class_ids, dtype=object)
+    n = len(X)
+    if n == 0:
+        _fail("❌ Nothing to condense: reference set is empty")
+    thr = _thresholds(list(class_ids), delta_max)
+
+    pool = np.arange(n)
+    if edit:
+        pool = pool[_edit(metric_fn, X, y, thr)]
+        if len(pool) == 0:
+            _fail("❌ Editing removed every reference (classes overlap completely)")
+    S_local, passes, converged = _condense(metric_fn, X[pool], y[pool], thr[pool], max_passes)
+    n_condensed = len(S_local)
+    if reduce:
+        S_local = _reduce(metric_fn, X[pool], y[pool], thr[pool], S_local)
+    keep = pool[S_local]
+    return {
+        "keep": keep,
+        "n_refs": n,
+        "n_edited": n - len(pool),
+        "n_condensed": n_condensed,
+        "n_kept": len(keep),
+        "passes": passes,
+        # NB: False — max_passes кончились раньше, решения на эталонах не гарантированы
+        "converged": converged,
+        "reduction": n / len(keep),
+    }
+
+
+def compare_decisions(
+    class_ids: List[str],
+    refs_s,
+    keep,
+    val_X_s,
+    val_labels: Optional[List[str]],
+    metric_fn,
+    delta_max=None,
+) -> Dict[str, Any]:
+    # NB: Сколько решений class/undecided (и классов) на валидации меняется
+    # у сжатого набора против полного; с метками — ещё и точность/coverage.
+    import numpy as np
+
+    from .decision import nearest_classes
+    from .thresholds import ClassThresholds, applied_threshold
+
+    X = as_matrix(refs_s)
+    small_ids = [class_ids[i] for i in keep]
+
+    def decisions(R, labels):
+        out = []
+        bound = delta_max
+        if isinstance(delta_max, ClassThresholds):
+            bound = delta_max.bind(labels)
+        for m, c, i in nearest_classes(val_X_s, R, labels, metric_fn):
+            t = applied_threshold(bound, i, c)
+            out.append(c if t is None or m <= t else None)
+        return out
+
+    full = decisions(X, list(class_ids))
+    small = decisions(X[np.asarray(keep)], small_ids)
+    report = {
+        "n_val": len(full),
+        "changed": sum(a != b for a, b in zip(full, small)),
+        "class_to_undecided": sum(a is not None and b is None for a, b in zip(full, small)),
+        "undecided_to_class": sum(a is None and b is not None for a, b in zip(full, small)),
+        "class_changed": sum(
+            a is not None and b is not None and a != b for a, b in zip(full, small)
+        ),
+    }
+    if val_labels is not None:
+        for name, dec in (("full", full), ("condensed", small)):
+            decided = [(p, t) for p, t in zip(dec, val_labels) if p is not None]
+            report[name] = {
+                "coverage": len(decided) / len(dec) if dec else None,
+                "accuracy_on_decided": (
+                    sum(p == t for p, t in decided) / len(decided) if decided else None
+                ),
+            }
+    return report
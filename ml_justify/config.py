@@ -1,35 +1,98 @@
 # NB: Чтение и валидация конфига (yaml/json).
 # Стараюсь падать ПОНЯТНО — чтобы сразу видно было, что исправить.
+# YAML разбирается один раз: уже провалидированный конфиг кладу в
+# пользовательский кэш (ML_JUSTIFY_CACHE_DIR, иначе $XDG_CACHE_HOME или
+# ~/.cache — подпапка ml_justify/config), имя файла — хэш байтов исходника.
+# Следующие запуски читают его stdlib-json и не импортируют PyYAML (~20-30 мс
+# на каждом запуске cli). Ключ — содержимое, а не mtime/размер: cp -p, rsync -t
+# или две правки в пределах точности часов ФС кэш не обманут. Каталог конфига
+# не трогаю; не удалось записать — просто работаю без кэша.
 
 from __future__ import annotations
 from pathlib import Path
-import json
+import hashlib, json, os
+
+CACHE_FORMAT = "ml-justify-config"
+CACHE_VERSION = 1  # NB: поднять, если меняется валидация/вид cfg
+ENV_CACHE_DIR = "ML_JUSTIFY_CACHE_DIR"
+
+# NB: методы перевыборки для калибровки (calibrate.coverage_sweep, --resample);
+# здесь, а не в calibrate — cli нужен список для argparse без импорта калибровки
+RESAMPLING = ("none", "kfold", "bootstrap")
 
 
 def _fail(msg: str):
     raise RuntimeError(msg)
 
 
-def read_config(path: Path):
+def cache_dir() -> Path:
+    root = os.environ.get(ENV_CACHE_DIR)
+    if root:
+        return Path(root)
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "ml_justify" / "config"
+
+
+def cache_path(source: bytes) -> Path:
+    digest = hashlib.blake2b(source, digest_size=16).hexdigest()
+    return cache_dir() / f"{digest}.v{CACHE_VERSION}.json"
+
+
+def _read_cached(source: bytes):
+    try:
+        with cache_path(source).open("r", encoding="utf-8") as f:
+            doc = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(doc, dict) or doc.get("format") != CACHE_FORMAT:
+        return None
+    return doc.get("config")
+
+
+def _write_cached(source: bytes, cfg) -> None:
+    # NB: через временный файл + replace: параллельные запуски не увидят половину
+    out = cache_path(source)
+    tmp = out.with_name(f"{out.name}.{os.getpid()}.tmp")
+    doc = {"format": CACHE_FORMAT, "version": CACHE_VERSION, "config": cfg}
+    try:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps(doc, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, out)
+    except OSError:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def read_config(path: Path, cache: bool = True):
     if not path.exists():
         _fail(
             f"❌ Config not found: {path}\n➡️  Create config.yaml or pass --config config.json"
         )
 
-    # NB: YAML -> нужна библиотека pyyaml; JSON -> stdlib
+    # NB: YAML -> нужна библиотека pyyaml (или кэш того же содержимого); JSON -> stdlib
     if path.suffix.lower() in (".yaml", ".yml"):
+        source = path.read_bytes()
+        if cache:
+            cfg = _read_cached(source)
+            if cfg is not None:
+                return cfg
         try:
             import yaml  # type: ignore
         except Exception as e:
             _fail(
                 "❌ YAML config but PyYAML is not installed. Install: python3 -m pip install pyyaml"
             )
-        with path.open("r", encoding="utf-8") as f:
-            cfg = yaml.safe_load(f) or {}
-    else:
-        with path.open("r", encoding="utf-8") as f:
-            cfg = json.load(f)
+        cfg = _validate(yaml.safe_load(source.decode("utf-8")) or {})
+        if cache:
+            _write_cached(source, cfg)
+        return cfg
+    with path.open("r", encoding="utf-8") as f:
+        return _validate(json.load(f))
+
 
+def _validate(cfg):
     # NB: Валидация и дефолты
     metric = str(cfg.get("metric", "L2")).strip().upper()
     if metric not in {"L1", "L2", "LINF"}:
@@ -44,6 +107,22 @@ def read_config(path: Path):
         if delta_max < 0:
             _fail("❌ config.delta_max must be >= 0")
 
+    # NB: свои пороги для отдельных классов (остальным — delta_max)
+    per_class = cfg.get("delta_max_per_class", None)
+    if per_class is not None:
+        if not isinstance(per_class, dict):
+            _fail("❌ config.delta_max_per_class must be a mapping {class_id: delta}")
+        parsed = {}
+        for cls, value in per_class.items():
+            try:
+                value = float(value)
+            except Exception:
+                _fail(f"❌ config.delta_max_per_class[{cls!r}] must be a number (>= 0)")
+            if value < 0:
+                _fail(f"❌ config.delta_max_per_class[{cls!r}] must be >= 0")
+            parsed[str(cls).strip()] = value
+        per_class = parsed or None
+
     tie_break = str(cfg.get("tie_break", "first")).strip().lower()
     if tie_break not in {"first"}:
         _fail("❌ config.tie_break must be 'first'")
@@ -55,6 +134,7 @@ def read_config(path: Path):
     return {
         "metric": metric,
         "delta_max": delta_max,
+        "delta_max_per_class": per_class,
         "tie_break": tie_break,
         "scale": scale,
     }
@@ -1,9 +1,25 @@
 # NB: Всё чтение данных сюда. Единые проверки, единый стиль ошибок.
+# load_*_csv — списки списков (как было); load_*_array — потоковое чтение
+# кусками по CHUNK_ROWS строк сразу в непрерывную float64/float32 матрицу,
+# с теми же правилами strict/non-strict и теми же сообщениями об ошибках.
+# Быстрый путь (parser="auto"|"pyarrow"): pyarrow читает class_id,p1..pd целиком
+# блоками; при любой «грязи» в файле (или без pyarrow) — обычный путь выше,
+# он и укажет номер проблемной строки.
+# "auto" берёт pyarrow только для файлов от PYARROW_MIN_BYTES (или если он уже
+# импортирован): сам импорт pyarrow — 50-100 мс, на маленьком csv это дороже разбора.
 
 from __future__ import annotations
 from pathlib import Path
 from typing import List, Tuple, Any
-import csv, json, math
+import csv, importlib.util, json, math, sys
+
+
+# NB: Кусок ограничен и по строкам, и по ячейкам: строки csv как Python str
+# весят ~50-70 байт каждая, так что держу в памяти не больше CHUNK_CELLS.
+CHUNK_ROWS = 65536
+CHUNK_CELLS = 1 << 18
+PARSERS = ("auto", "python", "pyarrow")
+PYARROW_MIN_BYTES = 2 << 20  # NB: замер: ~600 КБ — python быстрее на ~40 мс, ~3 МБ — уже pyarrow
 
 
 def _fail(msg: str):
@@ -68,18 +84,279 @@ def load_refs_csv(
     return class_ids, vecs
 
 
-def load_query(path: Path, expected_dim: int) -> List[float]:
+def _count_lines(path: Path) -> int:
+    # NB: верхняя граница числа строк данных — чтобы выделить матрицу один раз
+    n = 0
+    with path.open("rb") as f:
+        for buf in iter(lambda: f.read(1 << 20), b""):
+            n += buf.count(b"\n")
+    return n + 1
+
+
+def _row_chunks(reader, chunk_rows: int):
+    # NB: (line_no, row) кусками; пустые строки пропускаю сразу
+    chunk, cells = [], 0
+    for line_no, row in enumerate(reader, start=2):
+        if not row or all((c or "").strip() == "" for c in row):
+            continue
+        chunk.append((line_no, row))
+        cells += len(row)
+        if len(chunk) >= chunk_rows or cells >= CHUNK_CELLS:
+            yield chunk
+            chunk, cells = [], 0
+    if chunk:
+        yield chunk
+
+
+def _fast_block(chunk, d, dtype):
+    # NB: Быстрый путь: весь кусок разом через numpy (парсит строки как float()).
+    # None — в куске есть что-то «плохое», тогда разбираю построчно ради
+    # правил strict/non-strict и номера строки в ошибке.
+    import numpy as np
+
+    try:
+        B = np.array([row[1:] for _ln, row in chunk], dtype=dtype)
+    except ValueError:
+        return None
+    if B.ndim != 2 or (d is not None and B.shape[1] != d):
+        return None
+    if not np.isfinite(B).all():
+        return None
+    return B
+
+
+class _MatrixBuilder:
+    # NB: Матрица выделяется один раз (по числу строк файла) и заполняется
+    # кусками; в конце — срез по реально прочитанным строкам.
+
+    def __init__(self, max_rows: int, dtype):
+        self.max_rows = max_rows
+        self.dtype = dtype
+        self.X = None
+        self.n = 0
+
+    @property
+    def d(self):
+        return None if self.X is None else self.X.shape[1]
+
+    def add(self, B):
+        import numpy as np
+
+        if self.X is None:
+            self.X = np.empty((self.max_rows, B.shape[1]), dtype=self.dtype)
+        self.X[self.n : self.n + len(B)] = B
+        self.n += len(B)
+
+    def result(self):
+        X = self.X[: self.n]
+        # NB: если много строк отсеяно (non-strict), не держу лишнюю память
+        return X.copy() if self.n < 0.9 * len(self.X) else X
+
+
+def _parse_pyarrow(path: Path, header: List[str], dtype, max_rows: int):
+    import numpy as np
+    import pyarrow as pa  # type: ignore
+    import pyarrow.csv as pacsv  # type: ignore
+
+    # NB: свои имена колонок — заголовок может содержать дубли/что угодно
+    cols = [f"c{i}" for i in range(len(header))]
+    types = {c: pa.float64() for c in cols[1:]}
+    types[cols[0]] = pa.string()
+    reader = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(
+            skip_rows=1, column_names=cols, block_size=1 << 22
+        ),
+        convert_options=pacsv.ConvertOptions(
+            column_types=types,
+            strings_can_be_null=False,
+            quoted_strings_can_be_null=False,
+        ),
+    )
+    labels: List[str] = []
+    X = np.empty((max_rows, len(cols) - 1), dtype=dtype)
+    n = 0
+    for batch in reader:
+        k = batch.num_rows
+        for j in range(1, len(cols)):
+            col = batch.column(j)
+            if col.null_count:
+                return None  # NB: пустая ячейка — пусть разбирается обычный путь
+            X[n : n + k, j - 1] = col.to_numpy(zero_copy_only=False)
+        labels.extend(batch.column(0).to_pylist())
+        n += k
+    return labels, X[:n]
+
+
+def _fast_parse(path: Path, parser: str, dtype):
+    # NB: (labels, X) если файл целиком «чистый», иначе None → обычный путь
+    import numpy as np
+
+    if parser not in PARSERS:
+        _fail(f"❌ Unknown csv parser: {parser}. Use one of: {' | '.join(PARSERS)}")
+    if parser == "python":
+        return None
+    if (
+        parser == "auto"
+        and "pyarrow.csv" not in sys.modules
+        and path.stat().st_size < PYARROW_MIN_BYTES
+    ):
+        return None
+    # NB: find_spec только ищет пакет, не импортирует — импорт в _parse_pyarrow
+    if importlib.util.find_spec("pyarrow") is None:
+        if parser == "pyarrow":
+            _fail(
+                "❌ csv parser 'pyarrow' requested but pyarrow is not installed. Install: python3 -m pip install pyarrow"
+            )
+        return None
+
+    with path.open("r", encoding="utf-8", newline="") as f:
+        header = next(csv.reader(f), None)
+    if not header or header[0] != "class_id" or len(header) < 2:
+        return None  # NB: правильное сообщение про заголовок даст обычный путь
+    from pyarrow import ArrowException  # type: ignore
+
+    try:
+        res = _parse_pyarrow(path, header, np.dtype(dtype), _count_lines(path))
+    except (ArrowException, ValueError):
+        # NB: не разобралось (не число, битый utf-8, лишние колонки) — обычный путь
+        return None
+    if res is None:
+        return None
+    labels, X = res
+    if len(X) == 0 or not np.isfinite(X).all():
+        return None
+    return [(c or "").strip() for c in labels], X
+
+
+def load_refs_array(
+    path: Path,
+    strict: bool = True,
+    dtype="float64",
+    chunk_rows: int = CHUNK_ROWS,
+    parser: str = "auto",
+):
+    # NB: То же, что load_refs_csv, но признаки — сразу в (N, d) numpy-матрицу
+    import numpy as np
+
     if not path.exists():
-        _fail(
-            f'❌ query file not found: {path}\n➡️  Create q.json like: {{"vector": [..{expected_dim} numbers..]}}'
-        )
+        _fail(f"❌ refs.csv not found at: {path}")
+
+    fast = _fast_parse(path, parser, dtype)
+    if fast is not None and all(fast[0]):
+        return fast
+
+    class_ids: List[str] = []
+    mb = _MatrixBuilder(_count_lines(path), np.dtype(dtype))
     with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-    if "vector" not in data or not isinstance(data["vector"], list):
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            _fail("❌ refs.csv is empty.\n➡️  Expected header: class_id,p1,p2,...,pd")
+        if header[0] != "class_id":
+            _fail(
+                "❌ refs.csv header invalid.\n➡️  First column must be 'class_id', then p1,p2,...,pd"
+            )
+
+        for chunk in _row_chunks(reader, chunk_rows):
+            labels = [(row[0] or "").strip() for _ln, row in chunk]
+            B = _fast_block(chunk, mb.d, mb.dtype) if all(labels) else None
+            if B is not None:
+                class_ids.extend(labels)
+                mb.add(B)
+                continue
+            for (line_no, row), cls in zip(chunk, labels):
+                if cls == "":
+                    msg = f"⚠️  Empty class_id at line {line_no} — row skipped."
+                    if strict:
+                        _fail("❌ " + msg)
+                    else:
+                        continue
+                try:
+                    vec = [float(x) for x in row[1:]]
+                except ValueError:
+                    if strict:
+                        _fail(f"❌ Non-numeric feature at refs line {line_no}: {row}")
+                    else:
+                        continue
+                if any(_is_bad_number(v) for v in vec):
+                    if strict:
+                        _fail(f"❌ NaN/inf in refs at line {line_no}")
+                    else:
+                        continue
+                b = np.asarray([vec], dtype=mb.dtype)
+                if mb.d is not None and b.shape[1] != mb.d:
+                    _fail(
+                        f"❌ All reference vectors must have the same dimensionality (line {line_no}: expected d={mb.d}, got {b.shape[1]})."
+                    )
+                if not np.isfinite(b).all():
+                    # NB: в float32 большое число может переполниться в inf
+                    _fail(f"❌ NaN/inf in refs at line {line_no} (overflow in {mb.dtype})")
+                class_ids.append(cls)
+                mb.add(b)
+
+    if mb.n == 0:
+        _fail("❌ refs.csv contains no valid data rows.")
+    if mb.d == 0:
+        _fail("❌ refs.csv has no feature columns (need p1,...,pd).")
+    return class_ids, mb.result()
+
+
+def load_val_array(
+    path: Path,
+    expected_dim: int,
+    dtype="float64",
+    chunk_rows: int = CHUNK_ROWS,
+    parser: str = "auto",
+):
+    # NB: То же, что load_val_csv, но X — сразу (M, d) numpy-матрица
+    import numpy as np
+
+    if not path.exists():
+        _fail(f"❌ val.csv not found at: {path}")
+
+    fast = _fast_parse(path, parser, dtype)
+    if fast is not None and fast[1].shape[1] == expected_dim:
+        return fast
+    ys: List[str] = []
+    mb = _MatrixBuilder(_count_lines(path), np.dtype(dtype))
+    with path.open("r", encoding="utf-8") as f:
+        r = csv.reader(f)
+        header = next(r, None)
+        if not header or header[0] != "class_id":
+            _fail("❌ val.csv must start with header: class_id,p1,p2,...,pd")
+        for chunk in _row_chunks(r, chunk_rows):
+            B = _fast_block(chunk, expected_dim, mb.dtype)
+            if B is not None:
+                ys.extend((row[0] or "").strip() for _ln, row in chunk)
+                mb.add(B)
+                continue
+            for line_no, row in chunk:
+                try:
+                    v = [float(x) for x in row[1:]]
+                except ValueError:
+                    _fail(f"❌ Non-numeric feature at val line {line_no}: {row}")
+                if len(v) != expected_dim:
+                    _fail(
+                        f"❌ Dimensionality mismatch in val at line {line_no}: expected d={expected_dim}, got {len(v)}"
+                    )
+                b = np.asarray([v], dtype=mb.dtype)
+                if any(_is_bad_number(z) for z in v) or not np.isfinite(b).all():
+                    _fail(f"❌ NaN/inf in val at line {line_no}")
+                ys.append((row[0] or "").strip())
+                mb.add(b)
+    if mb.n == 0:
+        _fail("❌ val.csv has no data")
+    return ys, mb.result()
+
+
+def parse_query(data: Any, expected_dim: int) -> List[float]:
+    # NB: Проверки содержимого q.json — отдельно от чтения файла (нужно серверу)
+    if not isinstance(data, dict) or not isinstance(data.get("vector"), list):
         _fail('❌ q.json must be of form: {"vector": [ ... ]}')
     try:
         q = [float(x) for x in data["vector"]]
-    except ValueError:
+    except (TypeError, ValueError):
         _fail("❌ q.vector must contain only numbers")
     if any(_is_bad_number(v) for v in q):
         _fail("❌ q.vector has NaN/inf — fix the input numbers")
@@ -90,6 +367,88 @@ def load_query(path: Path, expected_dim: int) -> List[float]:
     return q
 
 
+def load_query(path: Path, expected_dim: int) -> List[float]:
+    if not path.exists():
+        _fail(
+            f'❌ query file not found: {path}\n➡️  Create q.json like: {{"vector": [..{expected_dim} numbers..]}}'
+        )
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    return parse_query(data, expected_dim)
+
+
+def load_queries(path: Path, expected_dim: int):
+    # NB: Пакет запросов: .jsonl (по {"vector": [...]} на строку), .csv
+    # (заголовок p1..pd; колонку class_id, если есть, пропускаю) или .npy (n x d).
+    if not path.exists():
+        _fail(f"❌ batch file not found: {path}")
+    suffix = path.suffix.lower()
+    Q: List[List[float]] = []
+
+    if suffix == ".npy":
+        import numpy as np
+
+        arr = np.load(path, allow_pickle=False)
+        if arr.ndim == 1:
+            arr = arr.reshape(1, -1)
+        if arr.ndim != 2 or arr.dtype.kind not in "fiu":
+            _fail("❌ batch .npy must be a 2D numeric array (n x d)")
+        if arr.shape[1] != expected_dim:
+            _fail(
+                f"❌ Dimensionality mismatch: refs have d={expected_dim}, but batch has d={arr.shape[1]}."
+            )
+        arr = arr.astype(np.float64, copy=False)
+        bad = ~np.isfinite(arr).all(axis=1)
+        if bad.any():
+            i = int(bad.argmax())
+            # NB: номер строки с 1, как line у csv/jsonl; индекс массива — в скобках
+            _fail(f"❌ NaN/inf in batch at row {i + 1} (array index {i})")
+        if arr.shape[0] == 0:
+            _fail("❌ batch file has no queries")
+        return arr
+
+    with path.open("r", encoding="utf-8") as f:
+        if suffix == ".csv":
+            r = csv.reader(f)
+            header = next(r, None)
+            if not header:
+                _fail("❌ batch csv is empty.\n➡️  Expected header: p1,p2,...,pd")
+            skip = 1 if header[0] == "class_id" else 0
+            rows = ((line_no, row[skip:]) for line_no, row in enumerate(r, start=2))
+        else:
+            rows = []
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except ValueError:
+                    _fail(f"❌ Invalid JSON at batch line {line_no}")
+                if not isinstance(data, dict) or not isinstance(data.get("vector"), list):
+                    _fail(
+                        f'❌ batch line {line_no} must be of form: {{"vector": [ ... ]}}'
+                    )
+                rows.append((line_no, data["vector"]))
+
+        for line_no, row in rows:
+            if not row or all(str(c).strip() == "" for c in row):
+                continue
+            try:
+                v = [float(x) for x in row]
+            except (TypeError, ValueError):
+                _fail(f"❌ Non-numeric feature at batch line {line_no}: {row}")
+            if len(v) != expected_dim:
+                _fail(
+                    f"❌ Dimensionality mismatch in batch at line {line_no}: expected d={expected_dim}, got {len(v)}"
+                )
+            if any(_is_bad_number(z) for z in v):
+                _fail(f"❌ NaN/inf in batch at line {line_no}")
+            Q.append(v)
+    if not Q:
+        _fail("❌ batch file has no queries")
+    return Q
+
+
 def load_val_csv(path: Path, expected_dim: int):
     if not path.exists():
         _fail(f"❌ val.csv not found at: {path}")
@@ -2,31 +2,163 @@
 
 from __future__ import annotations
 from typing import List, Dict, Any, Tuple
+import math
+
+from .metrics import BLOCK_ELEMS, DistanceEngine, as_matrix, distances_to_refs
+from .thresholds import ClassThresholds, applied_threshold
+
+
+def top_k_order(dists, top_k: int = None) -> List[int]:
+    # NB: Индексы k ближайших по (дистанция, индекс) — ровно префикс полной
+    # stable-сортировки, но через argpartition: O(N + k log k) вместо O(N log N).
+    import numpy as np
+
+    n = len(dists)
+    if top_k is None or top_k >= n:
+        # NB: stable — при равных дистанциях порядок по индексу, как у sorted()
+        return dists.argsort(kind="stable").tolist()
+    if top_k <= 0:
+        return []
+    kth = dists[np.argpartition(dists, top_k - 1)[top_k - 1]]
+    less = np.flatnonzero(dists < kth)
+    # NB: на границе k берём равные по возрастанию индекса (tie-first)
+    eq = np.flatnonzero(dists == kth)[: top_k - len(less)]
+    cand = np.concatenate([less, eq])
+    return cand[np.lexsort((cand, dists[cand]))].tolist()
+
+
+def _ranking(dists, ref_labels: List[str], top_k: int = None):
+    return [
+        {"index": i, "class_id": ref_labels[i], "distance": float(dists[i])}
+        for i in top_k_order(dists, top_k)
+    ]
+
+
+def decide(
+    q_s: List[float],
+    refs_s: List[List[float]],
+    ref_labels: List[str],
+    metric_fn,
+    with_ranking: bool = False,
+    top_k: int = None,
+):
+    # NB: Единое «ядро» решения: дистанции считаю ОДИН раз и из них же беру
+    # победителя (tie-first через argmin) и, если нужно, ranking.
+    # Возвращаю (min_distance, predicted_class, winner_index, distances, ranking|None)
+    # С компактными эталонами (storage.CompactRefs) полного массива distances нет — None.
+    if _is_compact(refs_s):
+        if not isinstance(metric_fn, DistanceEngine):
+            refs_s = refs_s.full  # NB: своя метрика — по полной матрице
+        else:
+            m, cls, idx, ranking = decide_block(
+                [q_s], refs_s, ref_labels, metric_fn, with_ranking, top_k
+            )[0]
+            return m, cls, idx, None, ranking
+    dists = distances_to_refs(metric_fn, q_s, refs_s)
+    idx = int(dists.argmin())  # политика tie-break: first (argmin берёт первый)
+    ranking = _ranking(dists, ref_labels, top_k) if with_ranking else None
+    return float(dists[idx]), ref_labels[idx], idx, dists, ranking
+
+
+def _is_compact(refs_s) -> bool:
+    from .storage import CompactRefs  # NB: тут — storage сам импортирует decision
+
+    return isinstance(refs_s, CompactRefs)
+
+
+def decide_block(
+    Q_s,
+    refs_s,
+    ref_labels: List[str],
+    metric_fn,
+    with_ranking: bool = False,
+    top_k: int = None,
+) -> List[Tuple[float, str, int, Any]]:
+    # NB: То же ядро для пачки запросов: считаю блоками запросов (матрица
+    # блок x N), чтобы память не зависела от числа запросов.
+    # Возвращаю по запросу (min_distance, predicted_class, winner_index, ranking|None)
+    if not isinstance(metric_fn, DistanceEngine):
+        out = []
+        for q in Q_s:
+            m, cls, idx, _d, ranking = decide(
+                q, refs_s, ref_labels, metric_fn, with_ranking, top_k
+            )
+            out.append((m, cls, idx, ranking))
+        return out
+    if len(Q_s) == 0:
+        return []
+    if _is_compact(refs_s):
+        out = []
+        for m, idx, order, dists in refs_s.nearest_block(metric_fn, Q_s, top_k, with_ranking):
+            ranking = None
+            if with_ranking:
+                ranking = [
+                    {"index": i, "class_id": ref_labels[i], "distance": dd}
+                    for i, dd in zip(order, dists)
+                ]
+            out.append((m, ref_labels[idx], idx, ranking))
+        return out
+    R = as_matrix(refs_s)
+    Q = as_matrix(Q_s)
+    if not with_ranking:
+        # NB: только решение — тайлами с бегущим min/argmin, без строк дистанций
+        mins, idxs = metric_fn.nearest(Q, R)
+        return [(m, ref_labels[i], i, None) for m, i in zip(mins.tolist(), idxs.tolist())]
+    step = max(1, BLOCK_ELEMS // max(1, R.shape[0]))
+    out = []
+    for s in range(0, Q.shape[0], step):
+        D = metric_fn.pairwise(Q[s : s + step], R)
+        idxs = D.argmin(axis=1)  # tie-break: first
+        mins = D[range(len(idxs)), idxs]
+        for row, m, idx in zip(D, mins.tolist(), idxs.tolist()):
+            out.append((m, ref_labels[idx], idx, _ranking(row, ref_labels, top_k)))
+    return out
 
 
 def nearest_class(
-    q_s: List[float], refs_s: List[List[float]], ref_labels: List[str], metric_fn
+    q_s: List[float],
+    refs_s: List[List[float]],
+    ref_labels: List[str],
+    metric_fn,
+    tree=None,
+    max_dist=None,
 ) -> Tuple[float, str, int]:
     # NB: Возвращаю (min_distance, predicted_class, index_of_winner_by_tie_first)
-    dists = [metric_fn(q_s, r) for r in refs_s]
-    m = min(dists)
-    idx = dists.index(m)  # политика tie-break: first
-    return m, ref_labels[idx], idx
+    # С KD-деревом и max_dist: если в пределах порога никого — (inf, None, -1).
+    # tree — любой поиск с nearest(q, metric_fn, max_dist): kdtree.KDTree или
+    # early_exit.PartialDistanceSearch (режим «только решение»).
+    if tree is not None:
+        m, idx = tree.nearest(q_s, metric_fn, max_dist=max_dist)
+        return m, (ref_labels[idx] if idx >= 0 else None), idx
+    return decide(q_s, refs_s, ref_labels, metric_fn)[:3]
+
+
+def nearest_classes(
+    Q_s, refs_s, ref_labels: List[str], metric_fn, tree=None, max_dist=None
+) -> List[Tuple[float, str, int]]:
+    # NB: nearest_class для пачки запросов (см. decide_block)
+    if tree is not None:
+        return [
+            nearest_class(q, refs_s, ref_labels, metric_fn, tree, max_dist)
+            for q in Q_s
+        ]
+    return [r[:3] for r in decide_block(Q_s, refs_s, ref_labels, metric_fn)]
 
 
 def build_ranking(
-    ref_labels: List[str], refs_s: List[List[float]], q_s: List[float], metric_fn
+    ref_labels: List[str],
+    refs_s: List[List[float]],
+    q_s: List[float],
+    metric_fn,
+    top_k: int = None,
 ):
-    # NB: Список «кто ближе» — полезно для обоснования
-    distances = [metric_fn(q_s, v) for v in refs_s]
-    ranking = sorted(
-        [
-            {"index": i, "class_id": ref_labels[i], "distance": distances[i]}
-            for i in range(len(distances))
-        ],
-        key=lambda r: r["distance"],
+    # NB: Список «кто ближе» — полезно для обоснования.
+    # top_k — только k ближайших (для больших N весь список не нужен).
+    # distances возвращаю массивом: в list/JSON — только если попросили.
+    _m, _cls, _idx, dists, ranking = decide(
+        q_s, refs_s, ref_labels, metric_fn, with_ranking=True, top_k=top_k
     )
-    return distances, ranking
+    return dists, ranking
 
 
 def make_result_dict(
@@ -42,33 +174,58 @@ def make_result_dict(
     winner_idx: int,
     winner_class: str,
     delta_max,
+    min_distance: float = None,
+    include_distances: bool = False,
+    timings: Dict[str, Any] = None,
 ):
-    # NB: Решение class/undecided + упаковка детального результата
-    min_d = min(distances)
+    # NB: Решение class/undecided + упаковка детального результата.
+    # В пакетном режиме distances/ranking нет — тогда передают min_distance.
+    # Полный массив distances кладу в результат только по include_distances.
+    if min_distance is not None:
+        min_d = min_distance
+    elif hasattr(distances, "min"):
+        min_d = float(distances.min())
+    else:
+        min_d = min(distances)
+    # NB: delta_max — число/None или ClassThresholds (порог класса-победителя)
+    threshold = applied_threshold(delta_max, winner_idx, winner_class)
     decision = "undecided"
     winner = None
-    if (delta_max is None) or (min_d <= float(delta_max)):
+    if (threshold is None) or (min_d <= float(threshold)):
         decision = "class"
         winner = winner_class
 
-    return {
+    config = {
+        "metric": cfg["metric"],
+        "delta_max": delta_max,
+        "tie_break": cfg["tie_break"],
+        "strict": cfg.get("strict", True),
+        "scale": cfg["scale"],
+    }
+    per_class = isinstance(delta_max, ClassThresholds)
+    if per_class:
+        config.update(delta_max.to_config())
+    result = {
         "files": files,
-        "config": {
-            "metric": cfg["metric"],
-            "delta_max": delta_max,
-            "tie_break": cfg["tie_break"],
-            "strict": cfg.get("strict", True),
-            "scale": cfg["scale"],
-        },
+        "config": config,
         "dimensions": d,
         "scaling": scaling_info,
         "calibration": calibration_info,
         "query": {"raw": q_raw, "scaled": q_scaled},
         "summary": {
-            "min_distance": min_d,
-            "winner_index": winner_idx,
+            # NB: inf/-1 — дерево отсекло всё дальше delta_max (точно undecided)
+            "min_distance": min_d if math.isfinite(min_d) else None,
+            "winner_index": winner_idx if winner_idx >= 0 else None,
             "winner_class_id": winner,
             "decision": decision,
         },
         "ranking": ranking,
     }
+    if per_class:
+        result["summary"]["delta_max"] = threshold
+    if include_distances:
+        result["distances"] = [float(x) for x in distances]
+    if timings is not None:
+        # NB: замеры по шагам (instrument.StepTimer) — только если включены
+        result["timings"] = timings
+    return result
@@ -0,0 +1,90 @@
+# NB: Режим «только решение» (class/undecided + ближайший) с ранним выходом.
+# Частичная сумма L1 / L2² по части признаков только растёт (частичный max
+# у Linf — тоже), поэтому эталон можно выбросить, как только его частичная
+# дистанция превысила лучшую полную дистанцию на текущий момент (или delta_max).
+# Признаки перебираю блоками в порядке убывания дисперсии — у таких признаков
+# разброс разностей больше, и далёкие эталоны отсеиваются за первые блоки.
+# Выжившие кандидаты досчитываю обычным движком по исходной матрице, так что
+# min_distance / winner_index (и tie-first) те же, что у полного перебора.
+# Интерфейс как у KDTree.nearest — подставляется туда же (nearest_class(tree=...)).
+
+from __future__ import annotations
+from typing import Tuple
+import math
+
+from .metrics import DistanceEngine, as_matrix
+
+CHUNK_FEATURES = 16
+# NB: столько кандидатов осталось — дальше дешевле досчитать их целиком
+EXACT_BELOW = 32
+
+
+class PartialDistanceSearch:
+    def __init__(self, data, perm, chunks):
+        self.data = data
+        self.perm = perm
+        self.chunks = chunks
+
+    @classmethod
+    def build(cls, refs_s, chunk: int = CHUNK_FEATURES) -> "PartialDistanceSearch":
+        import numpy as np
+
+        X = as_matrix(refs_s)
+        perm = np.argsort(-X.var(axis=0), kind="stable")
+        # NB: каждый блок признаков — отдельная C-contiguous матрица N x chunk,
+        # чтобы выборка выживших строк читала подряд лежащую память
+        chunks = [
+            (perm[s : s + chunk], np.ascontiguousarray(X[:, perm[s : s + chunk]]))
+            for s in range(0, X.shape[1], chunk)
+        ]
+        return cls(X, perm, chunks)
+
+    def nearest(self, q, metric_fn, max_dist=None) -> Tuple[float, int]:
+        # NB: (дистанция, индекс) ближайшего; ничего в пределах max_dist — (inf, -1)
+        import numpy as np
+
+        if not isinstance(metric_fn, DistanceEngine):
+            raise RuntimeError("❌ Early-exit search supports only built-in metrics: L1 | L2 | Linf")
+        engine = metric_fn
+        X = self.data
+        qv = np.asarray(q, dtype=X.dtype)
+        name = engine.name
+        # NB: порядок суммирования тут другой, чем у движка — отсекаю с запасом
+        # на округление, а финальные дистанции всё равно считает движок
+        slack = 1.0 + 4 * (X.shape[1] + 4) * float(np.finfo(X.dtype).eps)
+
+        bound = math.inf if max_dist is None else float(max_dist)
+        ids = np.arange(X.shape[0])
+        pruned = False  # NB: пока никого не отсекли — блоки читаю без выборки строк
+        acc = None
+        for cols, block in self.chunks:
+            diff = (block[ids] if pruned else block) - qv[cols]
+            if name == "L2":
+                part = np.einsum("ij,ij->i", diff, diff)
+            else:
+                np.abs(diff, out=diff)
+                part = diff.sum(axis=1) if name == "L1" else diff.max(axis=1)
+            if acc is None:
+                acc = part
+            elif name == "Linf":
+                np.maximum(acc, part, out=acc)
+            else:
+                acc += part
+            # NB: лучший по частичной сумме — хороший кандидат: его полная
+            # дистанция сразу подтягивает границу отсечения
+            j = int(acc.argmin())
+            bound = min(bound, float(engine.to_refs(qv, X[ids[j] : ids[j] + 1])[0]))
+            lim = (bound * bound if name == "L2" else bound) * slack
+            keep = acc <= lim
+            if not keep.all():
+                ids, acc, pruned = ids[keep], acc[keep], True
+            if len(ids) <= EXACT_BELOW:
+                break
+        if len(ids) == 0:
+            return math.inf, -1
+        exact = engine.to_refs(qv, X[ids])
+        j = int(exact.argmin())  # tie-break: first (ids по возрастанию)
+        m = float(exact[j])
+        if max_dist is not None and m > float(max_dist):
+            return math.inf, -1
+        return m, int(ids[j])
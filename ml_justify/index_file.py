@@ -0,0 +1,198 @@
+# NB: Бинарный индекс эталонов: строю один раз из refs.csv, дальше только mmap.
+# В файле: провалидированные метки, сырая и отмасштабированная матрицы,
+# параметры скейлинга (и, по желанию, KD-дерево). Никакого csv/fit на каждый запрос.
+#
+# Формат (little-endian):
+#   8 байт  MAGIC
+#   8 байт  длина JSON-заголовка (uint64)
+#   JSON    заголовок: версия, scale/params, классы, смещения массивов
+#   pad     до ALIGN, дальше массивы подряд (каждый тоже выровнен на ALIGN)
+
+from __future__ import annotations
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, List
+import hashlib, json, os, struct
+
+from .data_io import load_refs_array
+from .kdtree import KDTree
+from .scaling import Scaler
+
+MAGIC = b"MLJIDX01"
+FORMAT_VERSION = 1
+ALIGN = 64
+
+
+def _fail(msg: str):
+    raise RuntimeError(msg)
+
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+class LabelView(Sequence):
+    # NB: Метки храню кодами (int32) + список уникальных классов — не надо
+    # парсить 200k строк из JSON при каждом старте. Снаружи выглядит как list.
+
+    def __init__(self, classes: List[str], codes):
+        self.classes = classes
+        self.codes = codes
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.classes[c] for c in self.codes[i].tolist()]
+        return self.classes[int(self.codes[i])]
+
+    def __iter__(self):
+        classes = self.classes
+        return (classes[c] for c in self.codes.tolist())
+
+
+def fingerprint(class_ids, raw) -> str:
+    # NB: Отпечаток набора эталонов (метки + сырые признаки)
+    import numpy as np
+
+    h = hashlib.sha256()
+    h.update("\n".join(class_ids).encode("utf-8"))
+    h.update(np.ascontiguousarray(raw, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+def build_index(
+    refs_path: Path,
+    out_path: Path,
+    scale: str,
+    strict: bool = True,
+    tree: bool = False,
+    parser: str = "auto",
+) -> Dict[str, Any]:
+    class_ids, raw = load_refs_array(refs_path, strict=strict, parser=parser)
+    # NB: один fit даёт и params, и stats для инкрементальных апдейтов
+    scaler = Scaler(scale).fit(raw)
+    scaled = scaler.transform(raw)
+    st = refs_path.stat()
+    source = {
+        "path": str(refs_path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+    return write_index(
+        out_path,
+        class_ids,
+        raw,
+        scaled,
+        scaler.info,
+        strict=strict,
+        source=source,
+        tree=tree,
+        stats=scaler.stats,
+    )
+
+
+def write_index(
+    out_path: Path,
+    class_ids,
+    raw,
+    scaled,
+    scale_info: Dict[str, Any],
+    strict: bool = True,
+    source: Dict[str, Any] = None,
+    tree: bool = False,
+    stats: Dict[str, Any] = None,
+) -> Dict[str, Any]:
+    # NB: Запись уже готовых массивов (build_index, update-index)
+    import numpy as np
+
+    class_ids = list(class_ids)
+    classes = list(dict.fromkeys(class_ids))
+    code_of = {c: i for i, c in enumerate(classes)}
+    codes = np.asarray([code_of[c] for c in class_ids], dtype="<i4")
+
+    arrays = {"codes": codes, "raw": raw, "scaled": scaled}
+    if tree:
+        arrays.update(KDTree.build(scaled).to_arrays())
+    layout, offset = {}, 0
+    for name, arr in arrays.items():
+        layout[name] = {
+            "offset": offset,
+            "dtype": arr.dtype.str,
+            "shape": list(arr.shape),
+        }
+        offset = _align(offset + arr.nbytes)
+
+    header = {
+        "version": FORMAT_VERSION,
+        "n": int(raw.shape[0]),
+        "d": int(raw.shape[1]),
+        "strict": bool(strict),
+        "scaling": scale_info,
+        "classes": classes,
+        "fingerprint": fingerprint(class_ids, raw),
+        "source": source,
+        "stats": stats,
+        "arrays": layout,
+    }
+    blob = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start = _align(len(MAGIC) + 8 + len(blob))
+
+    # NB: пишу во временный файл и атомарно подменяю — читатели не увидят половинку
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(blob)))
+        f.write(blob)
+        for name, arr in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            np.ascontiguousarray(arr).tofile(f)
+    os.replace(tmp, out_path)
+    return header
+
+
+def open_index(path: Path) -> Dict[str, Any]:
+    import numpy as np
+
+    if not path.exists():
+        _fail(
+            f"❌ index not found at: {path}\n➡️  Build it: python3 -m ml_justify.cli build-index --refs refs.csv --out {path}"
+        )
+    with path.open("rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            _fail(f"❌ Not an ML-Justify index file: {path}")
+        (hlen,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(hlen).decode("utf-8"))
+    if header.get("version") != FORMAT_VERSION:
+        _fail(
+            f"❌ Unsupported index version {header.get('version')} (expected {FORMAT_VERSION}).\n➡️  Rebuild the index with build-index"
+        )
+    data_start = _align(len(MAGIC) + 8 + hlen)
+
+    def _map(name):
+        spec = header["arrays"][name]
+        return np.memmap(
+            path,
+            mode="r",
+            dtype=np.dtype(spec["dtype"]),
+            offset=data_start + spec["offset"],
+            shape=tuple(spec["shape"]),
+        )
+
+    tree_names = [k for k in header["arrays"] if k.startswith("tree_")]
+    return {
+        "path": str(path),
+        "class_ids": LabelView(header["classes"], _map("codes")),
+        "raw": _map("raw"),
+        "scaled": _map("scaled"),
+        "tree": {k: _map(k) for k in tree_names} if tree_names else None,
+        "scale_info": header["scaling"],
+        "strict": header["strict"],
+        "fingerprint": header["fingerprint"],
+        "source": header["source"],
+        # NB: у индексов до инкрементальных апдейтов stats нет
+        "stats": header.get("stats"),
+        "n": header["n"],
+        "d": header["d"],
+    }
@@ -0,0 +1,161 @@
+# NB: Замеры по шагам (opt-in): wall/CPU-время, сколько строк обработано и
+# пик аллокаций (tracemalloc — только по отдельному флагу, он сам не бесплатный).
+# Шаги — те же нумерованные шаги cli.main: begin("2_load_refs") открывает шаг
+# (и закрывает предыдущий), end() — закрывает последний. Выключено — NULL_TIMER,
+# у которого все методы пустые: цена — один вызов метода на шаг.
+# Итог — блок "timings" в result.json и по строке JSON на шаг в логгере
+# ml_justify.timings. Внешние профилировщики подключаются хуком:
+# add_profiler_hook(fn) или переменная окружения ML_JUSTIFY_PROFILE_HOOK=module:func;
+# fn(event, step, record) зовётся на "start" (record=None) и "end".
+# logging и tracemalloc импортирую только по флагам — модуль на пути запуска cli.
+
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional
+import json, os, time
+
+LOGGER = "ml_justify.timings"
+ENV_HOOK = "ML_JUSTIFY_PROFILE_HOOK"
+
+_HOOKS: List[Callable[[str, str, Optional[Dict[str, Any]]], None]] = []
+_ENV_LOADED = False
+
+
+def add_profiler_hook(fn) -> None:
+    if fn not in _HOOKS:
+        _HOOKS.append(fn)
+
+
+def remove_profiler_hook(fn) -> None:
+    if fn in _HOOKS:
+        _HOOKS.remove(fn)
+
+
+def _load_env_hook() -> None:
+    global _ENV_LOADED
+    if _ENV_LOADED:
+        return
+    _ENV_LOADED = True
+    spec = os.environ.get(ENV_HOOK)
+    if not spec:
+        return
+    import importlib
+
+    mod, _, attr = spec.partition(":")
+    try:
+        fn = getattr(importlib.import_module(mod), attr or "hook")
+    except Exception as e:
+        raise RuntimeError(f"❌ Cannot load profiler hook {ENV_HOOK}={spec}: {e}") from None
+    add_profiler_hook(fn)
+
+
+class _NullTimer:
+    enabled = False
+
+    def begin(self, name: str, rows: Optional[int] = None) -> None:
+        pass
+
+    def rows(self, n: int) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+    def as_dict(self) -> None:
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+class StepTimer:
+    enabled = True
+
+    def __init__(self, memory: bool = False, log: bool = False):
+        self.memory = memory
+        self.log = None
+        if log:
+            import logging
+
+            self.log = logging.getLogger(LOGGER)
+        self.steps: List[Dict[str, Any]] = []
+        self._cur: Optional[Dict[str, Any]] = None
+        self._t0 = time.perf_counter()
+        self._c0 = time.process_time()
+        self._own_trace = False
+        if memory:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._own_trace = True
+
+    def begin(self, name: str, rows: Optional[int] = None) -> None:
+        if self._cur is not None:
+            self.end()
+        for hook in _HOOKS:
+            hook("start", name, None)
+        mem = 0
+        if self.memory:
+            import tracemalloc
+
+            tracemalloc.reset_peak()
+            mem = tracemalloc.get_traced_memory()[0]
+        self._cur = {
+            "step": name,
+            "rows": rows,
+            "_mem": mem,
+            "_wall": time.perf_counter(),
+            "_cpu": time.process_time(),
+        }
+
+    def rows(self, n: int) -> None:
+        if self._cur is not None:
+            self._cur["rows"] = int(n)
+
+    def end(self) -> None:
+        cur, self._cur = self._cur, None
+        if cur is None:
+            return
+        rec = {
+            "step": cur["step"],
+            "wall_s": time.perf_counter() - cur["_wall"],
+            "cpu_s": time.process_time() - cur["_cpu"],
+            "rows": cur["rows"],
+        }
+        if self.memory:
+            import tracemalloc
+
+            # NB: пик сверх того, что уже было занято на входе в шаг
+            rec["peak_bytes"] = max(0, tracemalloc.get_traced_memory()[1] - cur["_mem"])
+        self.steps.append(rec)
+        for hook in _HOOKS:
+            hook("end", rec["step"], rec)
+        if self.log is not None:
+            self.log.info(json.dumps({"event": "step", **rec}, ensure_ascii=False))
+
+    def as_dict(self) -> Dict[str, Any]:
+        # NB: только закрытые шаги (запись result.json сама в себя не попадает)
+        return {
+            "steps": [dict(s) for s in self.steps],
+            "total_wall_s": time.perf_counter() - self._t0,
+            "total_cpu_s": time.process_time() - self._c0,
+        }
+
+    def close(self) -> None:
+        self.end()
+        if self._own_trace:
+            import tracemalloc
+
+            tracemalloc.stop()
+            self._own_trace = False
+
+
+def make_timer(enabled: bool = False, memory: bool = False, log: bool = False):
+    # NB: хук профилировщика включает замеры и без --timings (но без логов)
+    _load_env_hook()
+    if not (enabled or memory or log or _HOOKS):
+        return NULL_TIMER
+    return StepTimer(memory=memory, log=log)
@@ -0,0 +1,141 @@
+# NB: KD-дерево для поиска ближайшего эталона быстрее, чем O(N·d) на запрос.
+# Узел хранит bounding box своих точек; нижняя граница расстояния от q до
+# бокса — норма вектора «зазоров» по осям, поэтому одно и то же дерево
+# работает для L1, L2 и Linf (Чебышёв).
+# Правило tie_break: first сохраняю: при равных дистанциях побеждает меньший
+# индекс эталона (в каждом узле храню min индекс, чтобы правильно отсекать).
+# С max_dist (= delta_max) ветки дальше порога отсекаются сразу, и явно
+# «undecided» запросы заканчиваются рано.
+# NB: при d в сотни KD-дерево вырождается в полный перебор — там берите
+# обычный DistanceEngine; дерево даёт выигрыш на малых/средних d.
+
+from __future__ import annotations
+from typing import Dict, Tuple
+import math
+
+from .metrics import DistanceEngine, as_matrix
+
+LEAF_SIZE = 32
+
+# колонки массива nodes
+_START, _END, _LEFT, _RIGHT, _MIN_ID = range(5)
+
+
+class KDTree:
+    def __init__(self, data, nodes, lo, hi, perm):
+        self.data = data
+        self.nodes = nodes
+        self.lo = lo
+        self.hi = hi
+        self.perm = perm
+
+    @classmethod
+    def build(cls, refs_s, leaf_size: int = LEAF_SIZE) -> "KDTree":
+        import numpy as np
+
+        X = as_matrix(refs_s)
+        n = X.shape[0]
+        perm = np.arange(n, dtype=np.int64)
+        nodes, los, his = [], [], []
+        stack = [(0, n, -1, 0)]  # (start, end, parent, is_right)
+        while stack:
+            start, end, parent, is_right = stack.pop()
+            node_id = len(nodes)
+            if parent >= 0:
+                nodes[parent][_RIGHT if is_right else _LEFT] = node_id
+            ids = perm[start:end]
+            pts = X[ids]
+            lo, hi = pts.min(axis=0), pts.max(axis=0)
+            nodes.append([start, end, -1, -1, int(ids.min())])
+            los.append(lo)
+            his.append(hi)
+            if end - start <= leaf_size:
+                continue
+            # NB: режу по оси с максимальным разбросом, по медиане
+            axis = int((hi - lo).argmax())
+            if hi[axis] == lo[axis]:
+                continue  # все точки совпали — оставляю листом
+            mid = (end - start) // 2
+            order = np.argpartition(pts[:, axis], mid)
+            perm[start:end] = ids[order]
+            stack.append((start + mid, end, node_id, 1))
+            stack.append((start, start + mid, node_id, 0))
+        tree = cls(
+            X,
+            np.asarray(nodes, dtype=np.int64),
+            np.asarray(los),
+            np.asarray(his),
+            perm,
+        )
+        # NB: внутри листа индексы по возрастанию — меньше случайного доступа
+        for i in range(len(nodes)):
+            if tree.nodes[i, _LEFT] < 0:
+                s, e = tree.nodes[i, _START], tree.nodes[i, _END]
+                perm[s:e].sort()
+        return tree
+
+    def to_arrays(self) -> Dict[str, object]:
+        return {
+            "tree_nodes": self.nodes,
+            "tree_lo": self.lo,
+            "tree_hi": self.hi,
+            "tree_perm": self.perm,
+        }
+
+    @classmethod
+    def from_arrays(cls, refs_s, arrays) -> "KDTree":
+        return cls(
+            as_matrix(refs_s),
+            arrays["tree_nodes"],
+            arrays["tree_lo"],
+            arrays["tree_hi"],
+            arrays["tree_perm"],
+        )
+
+    def nearest(self, q, metric_fn, max_dist=None) -> Tuple[float, int]:
+        # NB: (дистанция, индекс) ближайшего; если ничего нет в пределах
+        # max_dist — (inf, -1).
+        import numpy as np
+
+        if not isinstance(metric_fn, DistanceEngine):
+            raise RuntimeError("❌ KD-tree supports only built-in metrics: L1 | L2 | Linf")
+        engine = metric_fn
+        qv = np.asarray(q, dtype=self.data.dtype)
+        nodes, lo, hi, perm, X = self.nodes, self.lo, self.hi, self.perm, self.data
+        n = X.shape[0]
+
+        def bound(i: int) -> float:
+            gap = np.maximum(lo[i] - qv, 0.0)
+            gap += np.maximum(qv - hi[i], 0.0)
+            return float(engine._reduce(gap))
+
+        best_d = math.inf if max_dist is None else float(max_dist)
+        best_i = n  # NB: сторож: точка ровно на max_dist тоже годится (<=)
+
+        stack = [(bound(0), 0)]
+        while stack:
+            b, i = stack.pop()
+            if b > best_d or (b == best_d and nodes[i, _MIN_ID] > best_i):
+                continue
+            left, right = nodes[i, _LEFT], nodes[i, _RIGHT]
+            if left < 0:
+                ids = perm[nodes[i, _START] : nodes[i, _END]]
+                dists = engine._reduce(X[ids] - qv)
+                m = float(dists.min())
+                if m <= best_d:
+                    cand = int(ids[dists == m].min())
+                    if m < best_d or cand < best_i:
+                        best_d, best_i = m, cand
+                continue
+            bl, br = bound(left), bound(right)
+            # NB: сначала (сверху стека) идёт ближний ребёнок
+            if bl <= br:
+                stack.append((br, right))
+                stack.append((bl, left))
+            else:
+                stack.append((bl, left))
+                stack.append((br, right))
+
+        if best_i == n:
+            return math.inf, -1
+        return best_d, best_i
@@ -1,8 +1,19 @@
 # NB: Метрики держу отдельно, чтобы легко добавлять свои.
+# Пер-парные l1/l2/linf оставляю как «эталон» (и как образец для своих метрик),
+# а get_metric() отдаёт DistanceEngine: та же функция (a, b) -> float,
+# но умеет считать расстояния сразу до всей матрицы эталонов (NumPy).
 
 from typing import List, Tuple
 import math
 
+# NB: Бюджет на временный блок разностей (элементов float64, ~32 МБ).
+# Больше — упираемся в память, меньше — в накладные расходы Python.
+BLOCK_ELEMS = 1 << 22
+# NB: Тайл для nearest (только min/argmin): разности mb x nb x d в ~512 КБ
+# (L2-кэш), эталонов в тайле не больше TILE_REFS — замер bench_calibrate_blocked.
+TILE_ELEMS = 1 << 16
+TILE_REFS = 4096
+
 
 def l1(a: List[float], b: List[float]) -> float:
     return sum(abs(x - y) for x, y in zip(a, b))
@@ -16,12 +27,130 @@ def linf(a: List[float], b: List[float]) -> float:
     return max(abs(x - y) for x, y in zip(a, b))
 
 
+def as_matrix(X):
+    # NB: list of lists -> 2D float64; готовый float-массив (в т.ч. memmap) не копирую
+    import numpy as np
+
+    M = np.asarray(X)
+    if M.dtype.kind != "f":
+        M = M.astype(np.float64)
+    if M.ndim == 1:
+        M = M.reshape(1, -1)
+    return M
+
+
+class DistanceEngine:
+    # NB: Вызывается как обычная метрика engine(a, b), плюс матричные методы:
+    #   to_refs(q, refs)   -> (N,)   расстояния от одного q до всех эталонов
+    #   pairwise(Q, refs)  -> (M, N) расстояния от блока запросов до всех эталонов
+    #   nearest(Q, refs)   -> (M,), (M,) только min/argmin, память не зависит от M x N
+    # Считаю по разностям (а не через |a|²-2ab+|b|²), чтобы не терять точность
+    # около порога delta_max. Порядок сложения по признакам — numpy, не как в
+    # l1/l2/linf: результат может отличаться в последних битах, и tie-first
+    # действует на округлённые float64 (точные ничьи — как у попарных функций).
+
+    def __init__(self, name: str, pair_fn):
+        self.name = name
+        self.pair_fn = pair_fn
+
+    def __call__(self, a: List[float], b: List[float]) -> float:
+        return self.pair_fn(a, b)
+
+    def __repr__(self) -> str:
+        return f"DistanceEngine({self.name})"
+
+    def _reduce(self, diff):
+        # NB: diff — всегда свежий временный блок, поэтому abs делаю на месте
+        import numpy as np
+
+        if self.name == "L2":
+            return np.sqrt(np.einsum("...j,...j->...", diff, diff))
+        np.abs(diff, out=diff)
+        if self.name == "L1":
+            return diff.sum(axis=-1)
+        return diff.max(axis=-1)
+
+    def to_refs(self, q, refs):
+        import numpy as np
+
+        R = as_matrix(refs)
+        qv = np.asarray(q, dtype=R.dtype)
+        n, d = R.shape
+        out = np.empty(n, dtype=np.float64)
+        step = max(1, BLOCK_ELEMS // max(1, d))
+        for s in range(0, n, step):
+            out[s : s + step] = self._reduce(R[s : s + step] - qv)
+        return out
+
+    def pairwise(self, Q, refs):
+        import numpy as np
+
+        R = as_matrix(refs)
+        Qm = as_matrix(Q).astype(R.dtype, copy=False)
+        m, n, d = Qm.shape[0], R.shape[0], R.shape[1]
+        out = np.empty((m, n), dtype=np.float64)
+        # NB: тайлы (mb x nb x d) укладываю в BLOCK_ELEMS
+        nb = max(1, min(n, BLOCK_ELEMS // max(1, d)))
+        mb = max(1, BLOCK_ELEMS // (nb * max(1, d)))
+        for i in range(0, m, mb):
+            Qb = Qm[i : i + mb, None, :]
+            for j in range(0, n, nb):
+                out[i : i + mb, j : j + nb] = self._reduce(Qb - R[None, j : j + nb, :])
+        return out
+
+    def nearest(self, Q, refs):
+        # NB: (min-дистанции (M,), индексы ближайших (M,)) без матрицы M x N:
+        # тайлы запросов x эталонов размером с кэш (TILE_ELEMS), по каждой
+        # строке держу только бегущий минимум и его индекс. Эталонные тайлы —
+        # по возрастанию, обновляю только при строго меньшем: tie-first, как argmin.
+        import numpy as np
+
+        R = as_matrix(refs)
+        Qm = as_matrix(Q).astype(R.dtype, copy=False)
+        m, n, d = Qm.shape[0], R.shape[0], R.shape[1]
+        best = np.full(m, np.inf)
+        arg = np.zeros(m, dtype=np.int64)
+        nb = max(1, min(n, TILE_REFS, TILE_ELEMS // max(1, d)))
+        mb = max(1, TILE_ELEMS // (nb * max(1, d)))
+        for i in range(0, m, mb):
+            Qb = Qm[i : i + mb, None, :]
+            b, a = best[i : i + mb], arg[i : i + mb]  # NB: view — пишу прямо в best/arg
+            rows = np.arange(len(b))
+            for j in range(0, n, nb):
+                D = self._reduce(Qb - R[None, j : j + nb, :])
+                k = D.argmin(axis=1)
+                v = D[rows, k]
+                upd = v < b
+                b[upd] = v[upd]
+                a[upd] = k[upd] + j
+        return best, arg
+
+
+_ENGINES = {
+    "L1": DistanceEngine("L1", l1),
+    "L2": DistanceEngine("L2", l2),
+    "Linf": DistanceEngine("Linf", linf),
+}
+
+
+def distances_to_refs(metric_fn, q, refs):
+    # NB: Единая точка для decision/calibrate: движок считает матрично,
+    # произвольная пользовательская метрика — по-старому, попарно.
+    import numpy as np
+
+    if isinstance(metric_fn, DistanceEngine):
+        return metric_fn.to_refs(q, refs)
+    return np.fromiter(
+        (metric_fn(q, r) for r in refs), dtype=np.float64, count=len(refs)
+    )
+
+
 def get_metric(name: str) -> Tuple:
     n = (name or "L2").strip().lower()
     if n == "l1":
-        return l1, "L1"
+        return _ENGINES["L1"], "L1"
     if n in ("l2", "euclid", "euclidean"):
-        return l2, "L2"
+        return _ENGINES["L2"], "L2"
     if n in ("linf", "l∞", "chebyshev"):
-        return linf, "Linf"
+        return _ENGINES["Linf"], "Linf"
     raise RuntimeError(f"❌ Unknown metric: {name}. Use one of L1|L2|Linf.")
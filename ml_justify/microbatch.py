@@ -0,0 +1,248 @@
+# NB: asyncio-фронт с микро-батчингом. Мелкие одновременные запросы к одним
+# и тем же эталонам дешевле посчитать одной матрицей (запросы x эталоны),
+# чем по одному. Запросы, пришедшие в пределах окна window_ms (или пока не
+# набралось max_batch), уходят одним Model.classify_batch; каждый вызывающий
+# получает свой ответ — тот же, что дал бы Model.classify_payload.
+# Пока пачка считается (в потоке), следующая уже копится — под нагрузкой
+# пачки растут сами, а окно ждём только от первого запроса пачки.
+#
+# Протокол тот же, что у server.py: POST /classify, POST /refs, GET /health, HTTP/1.1 keep-alive.
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import asyncio, json, os, sys
+
+from .model import Model, content_length
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found"}
+
+
+class MicroBatcher:
+    def __init__(self, model: Model, window_ms: float = 2.0, max_batch: int = 64):
+        if max_batch < 1:
+            raise RuntimeError("❌ max_batch must be >= 1")
+        if window_ms < 0:
+            raise RuntimeError("❌ window_ms must be >= 0")
+        self.model = model
+        self.window = window_ms / 1e3
+        self.max_batch = max_batch
+        self.batches = 0
+        self.requests = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def classify(self, data: Any, top_k: Optional[int] = None) -> Dict[str, Any]:
+        # NB: валидация сразу — кривой запрос не портит чужую пачку
+        q, top_k = self.model.parse_payload(data, top_k)
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((q, top_k, fut))
+        return await fut
+
+    async def _collect(self) -> List[tuple]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _compute(self, batch: List[tuple]) -> List[Dict[str, Any]]:
+        # NB: в одной пачке могут быть разные top_k — считаю по группам
+        groups: Dict[Optional[int], List[int]] = {}
+        for i, (_q, k, _f) in enumerate(batch):
+            groups.setdefault(k, []).append(i)
+        out: List[Dict[str, Any]] = [None] * len(batch)
+        for k, ids in groups.items():
+            res = self.model.classify_batch([batch[i][0] for i in ids], top_k=k)
+            for i, r in zip(ids, res):
+                out[i] = r
+        return out
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            try:
+                results = await loop.run_in_executor(None, self._compute, batch)
+            except Exception as e:  # NB: ошибка пачки — всем её участникам
+                for _q, _k, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += len(batch)
+            for (_q, _k, fut), r in zip(batch, results):
+                if not fut.done():  # NB: клиент мог уже отвалиться
+                    fut.set_result(r)
+
+
+def _response(code: int, payload, keep_alive: bool) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {code} {_REASONS.get(code, '')}\r\n"
+        "Server: ml-justify\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("ascii") + body
+
+
+class _App:
+    def __init__(self, batcher: MicroBatcher, top_k: Optional[int], verbose: bool):
+        self.batcher = batcher
+        self.top_k = top_k
+        self.verbose = verbose
+
+    def _health(self) -> Dict[str, Any]:
+        b, model = self.batcher, self.batcher.model
+        health = {
+            "status": "ok",
+            "n_refs": len(model.refs["class_ids"]),
+            "dimensions": model.d,
+            "metric": model.metric_name,
+            "batches": b.batches,
+            "mean_batch": round(b.requests / b.batches, 2) if b.batches else None,
+        }
+        if model.cache is not None:
+            health["cache"] = model.cache.stats()
+        return health
+
+    async def _dispatch(self, method: str, path: str, body: bytes):
+        if method == "GET" and path == "/health":
+            return 200, self._health()
+        if method != "POST" or path not in ("/classify", "/refs"):
+            return 404, {"error": f"❌ Unknown path: {path}"}
+        try:
+            data = json.loads(body or b"null")
+            if path == "/refs":
+                loop = asyncio.get_running_loop()
+                return 200, await loop.run_in_executor(
+                    None, self.batcher.model.update_payload, data
+                )
+            return 200, await self.batcher.classify(data, top_k=self.top_k)
+        except (RuntimeError, ValueError, TypeError) as e:
+            # NB: TypeError — payload не той формы (например, "add": 5): это 400, а не обрыв
+            return 400, {"error": str(e)}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                parts = line.decode("latin-1").split()
+                if len(parts) < 2:
+                    break
+                method, path = parts[0], parts[1]
+                version = parts[2] if len(parts) > 2 else "HTTP/1.0"
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                try:
+                    n = content_length(headers.get("content-length"))
+                except RuntimeError as e:
+                    # NB: тело не прочитать — где следующий запрос, неизвестно: 400 и закрываю
+                    writer.write(_response(400, {"error": str(e)}, False))
+                    await writer.drain()
+                    break
+                body = await reader.readexactly(n)
+                conn = headers.get("connection", "").lower()
+                keep_alive = conn != "close" and (version == "HTTP/1.1" or conn == "keep-alive")
+                code, payload = await self._dispatch(method, path, body)
+                if self.verbose:
+                    print(f'"{method} {path}" {code}', file=sys.stderr)
+                writer.write(_response(code, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def start_async_server(
+    model: Model,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    unix_socket: Optional[str] = None,
+    top_k: Optional[int] = None,
+    window_ms: float = 2.0,
+    max_batch: int = 64,
+    verbose: bool = False,
+):
+    # NB: (asyncio.Server, MicroBatcher); останавливать: server.close() + batcher.stop()
+    batcher = MicroBatcher(model, window_ms=window_ms, max_batch=max_batch)
+    await batcher.start()
+    app = _App(batcher, top_k, verbose)
+    if unix_socket:
+        path = Path(unix_socket)
+        if path.exists():
+            path.unlink()  # NB: хвост от прошлого запуска
+        srv = await asyncio.start_unix_server(app.handle, path=str(path))
+    else:
+        srv = await asyncio.start_server(app.handle, host, port)
+    return srv, batcher
+
+
+def serve_async(
+    model: Model,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    unix_socket: Optional[str] = None,
+    top_k: Optional[int] = None,
+    window_ms: float = 2.0,
+    max_batch: int = 64,
+    verbose: bool = False,
+) -> None:
+    async def _main():
+        srv, batcher = await start_async_server(
+            model, host, port, unix_socket, top_k, window_ms, max_batch, verbose
+        )
+        where = unix_socket or "http://%s:%d" % srv.sockets[0].getsockname()[:2]
+        print(
+            f"Serving {len(model.refs['class_ids'])} refs (d={model.d}, {model.metric_name}) "
+            f"on {where}, micro-batch window {window_ms} ms, max {max_batch}",
+            file=sys.stderr,
+        )
+        try:
+            async with srv:
+                await srv.serve_forever()
+        finally:
+            await batcher.stop()
+
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if unix_socket and os.path.exists(unix_socket):
+            os.unlink(unix_socket)
@@ -0,0 +1,356 @@
+# NB: «Загруженная модель» = конфиг + эталоны (уже отскейленные) + метрика.
+# CLI собирает это по шагам на каждый запуск; сервер и другие долгоживущие
+# режимы держат один Model в памяти и только классифицируют.
+# Индекс и апдейты импортирую по месту: одиночному запуску cli с --refs они не нужны.
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import threading
+
+from .cache import QueryCache
+from .config import read_config
+from .data_io import load_refs_array, parse_query
+from .decision import decide, decide_block, make_result_dict
+from .metrics import get_metric
+from .scaling import Scaler, transform_vector
+from .storage import compact_refs
+from .thresholds import ClassThresholds, thresholds_from_config
+
+
+def load_references(
+    cfg: Dict[str, Any],
+    refs_path: Optional[Path] = None,
+    index_path: Optional[Path] = None,
+    strict: Optional[bool] = None,
+    parser: str = "auto",
+    config_path: str = "config.yaml",
+    storage: str = "float64",
+    scaler: Optional[Scaler] = None,
+) -> Dict[str, Any]:
+    # NB: Эталоны из csv (fit скейлинга) или из mmap-индекса (всё уже готово).
+    # strict=None — по умолчанию: для csv строго, для индекса — как при сборке.
+    # scaler — уже подобранный Scaler: csv тогда только трансформируется, без fit.
+    # storage float32|int8 — ещё и компактная копия для поиска (refs["compact"]),
+    # полная матрица остаётся для точной перепроверки кандидатов.
+    refs = _load_references(cfg, refs_path, index_path, strict, parser, config_path, scaler)
+    refs["storage"] = storage
+    refs["compact"] = None if storage == "float64" else compact_refs(refs["scaled"], storage)
+    return refs
+
+
+def search_refs(refs: Dict[str, Any]):
+    # NB: матрица, по которой ищем ближайших: компактная, если есть
+    return refs["compact"] if refs.get("compact") is not None else refs["scaled"]
+
+
+def content_length(value: Optional[str]) -> int:
+    # NB: заголовок Content-Length для обоих фронтов (server и microbatch):
+    # не число или < 0 — 400, а не read(-1), который ждёт закрытия сокета
+    try:
+        n = int(value or 0)
+    except ValueError:
+        n = -1
+    if n < 0:
+        raise RuntimeError(f"❌ Bad Content-Length: {value!r}")
+    return n
+
+
+def _load_references(
+    cfg, refs_path, index_path, strict, parser, config_path, scaler=None
+) -> Dict[str, Any]:
+    scale = cfg["scale"]
+    if scaler is not None and scaler.scale != scale:
+        raise RuntimeError(
+            f"❌ Scaler was fitted with scale={scaler.scale}, but config has scale={scale}.\n"
+            f"➡️  Refit it: --save-scaler with the current config"
+        )
+    if index_path is not None:
+        from .index_file import open_index
+
+        index = open_index(Path(index_path))
+        if index["scale_info"]["scale"] != scale:
+            raise RuntimeError(
+                f"❌ Index {index_path} was built with scale={index['scale_info']['scale']}, "
+                f"but config has scale={scale}.\n➡️  Rebuild: python3 -m ml_justify.cli build-index --config {config_path}"
+            )
+        if strict is not None and strict != index["strict"]:
+            # NB: строки уже разобраны при сборке — другой строгости флаг не даст
+            raise RuntimeError(
+                f"❌ Index {index_path} was built with strict={index['strict']}, "
+                f"but strict={strict} was requested.\n"
+                f"➡️  Drop --strict/--no-strict (the index keeps its own) or rebuild it with the flag you need"
+            )
+        return {
+            "class_ids": index["class_ids"],
+            "raw": index["raw"],
+            "scaled": index["scaled"],
+            "scale_info": index["scale_info"],
+            # NB: строгость зафиксирована при сборке индекса
+            "strict": index["strict"],
+            "d": index["d"],
+            "stats": index["stats"],
+            "fingerprint": index["fingerprint"],
+            "index": index,
+        }
+    strict = True if strict is None else strict
+    class_ids, raw = load_refs_array(Path(refs_path), strict=strict, parser=parser)
+    fitted = scaler is not None
+    if not fitted:
+        scaler = Scaler(scale).fit(raw)
+    elif scaler.d is not None and scaler.d != raw.shape[1]:
+        raise RuntimeError(
+            f"❌ Dimensionality mismatch: scaler has d={scaler.d}, but refs have d={raw.shape[1]}."
+        )
+    return {
+        "class_ids": class_ids,
+        "raw": raw,
+        "scaled": scaler.transform(raw),
+        "scale_info": scaler.info,
+        "strict": strict,
+        "d": raw.shape[1],
+        # NB: stats для инкрементальных апдейтов — от своего fit; у чужого
+        # скейлера они про другие данные, посчитаются при первом апдейте
+        "stats": None if fitted else scaler.stats,
+        # NB: отпечаток (sha256 по всей матрице) — тоже лениво, нужен только кэшу
+        "fingerprint": None,
+        "index": None,
+    }
+
+
+class Model:
+    def __init__(
+        self,
+        cfg: Dict[str, Any],
+        refs: Dict[str, Any],
+        files: Dict[str, Any],
+        cache: Optional[QueryCache] = None,
+    ):
+        self.cfg = cfg
+        self.files = files
+        self.cache = cache
+        self.metric_fn, self.metric_name = get_metric(cfg["metric"])
+        # NB: число/None или ClassThresholds (delta_max_per_class в конфиге)
+        self.delta_max = thresholds_from_config(cfg)
+        self.refs = self._bind(refs)
+        self.d = refs["d"]
+        # NB: апдейты эталонов сериализую; читатели берут снимок self.refs
+        # (апдейт собирает новый словарь и подменяет его одним присваиванием)
+        self._update_lock = threading.Lock()
+        self.result_cfg = {
+            "metric": self.metric_name,
+            "tie_break": cfg["tie_break"],
+            "scale": cfg["scale"],
+            "strict": refs["strict"],
+        }
+
+    @classmethod
+    def load(
+        cls,
+        config_path: str = "config.yaml",
+        refs_path: str = "refs.csv",
+        index_path: Optional[str] = None,
+        strict: Optional[bool] = None,
+        parser: str = "auto",
+        storage: str = "float64",
+        cache: Optional[QueryCache] = None,
+        scaler: Optional[Scaler] = None,
+    ) -> "Model":
+        cfg = read_config(Path(config_path))
+        refs = load_references(
+            cfg,
+            refs_path=Path(refs_path),
+            index_path=index_path,
+            strict=strict,
+            parser=parser,
+            config_path=config_path,
+            storage=storage,
+            scaler=scaler,
+        )
+        files = {
+            "refs": refs_path,
+            "index": index_path,
+            "query": None,
+            "config": config_path,
+            "val": None,
+        }
+        return cls(cfg, refs, files, cache=cache)
+
+    def _scope(self, refs: Dict[str, Any], top_k, with_ranking: bool):
+        # NB: всё, кроме самого q, от чего зависит решение (см. cache.py)
+        if refs.get("fingerprint") is None:
+            from .index_file import fingerprint
+
+            refs["fingerprint"] = fingerprint(list(refs["class_ids"]), refs["raw"])
+        return (
+            self.metric_name,
+            refs["scale_info"]["scale"],
+            self.delta_max,
+            refs["fingerprint"],
+            top_k,
+            with_ranking,
+        )
+
+    def _bind(self, refs):
+        # NB: пороги по классам привязаны к строкам эталонов (см. thresholds.py):
+        # привязанные кладу в сам снимок refs — читатель берёт пороги из того же
+        # снимка, что и эталоны, общий self.delta_max на чтении не меняется
+        if isinstance(self.delta_max, ClassThresholds):
+            refs = dict(refs)
+            refs["thresholds"] = self.delta_max.bind(refs["class_ids"])
+        return refs
+
+    def _thresholds(self, refs):
+        bound = refs.get("thresholds")
+        if bound is None and isinstance(self.delta_max, ClassThresholds):
+            # NB: снимок собран в обход _bind — привязываю локально, не сохраняя
+            bound = self.delta_max.bind(refs["class_ids"])
+        return self.delta_max if bound is None else bound
+
+    def _decide_many(self, refs, qs_s, top_k, with_ranking: bool):
+        # NB: (min_distance, класс, индекс, ranking) по каждому q; с кэшем
+        # считаю одним блоком только промахи
+        if self.cache is None:
+            return decide_block(
+                qs_s, search_refs(refs), refs["class_ids"], self.metric_fn, with_ranking, top_k
+            )
+        scope = self._scope(refs, top_k, with_ranking)
+        keys = [self.cache.key(q_s, scope) for q_s in qs_s]
+        out = [self.cache.get(k) for k in keys]
+        miss = [i for i, r in enumerate(out) if r is None]
+        if miss:
+            block = decide_block(
+                [qs_s[i] for i in miss],
+                search_refs(refs),
+                refs["class_ids"],
+                self.metric_fn,
+                with_ranking,
+                top_k,
+            )
+            for i, r in zip(miss, block):
+                out[i] = r
+                self.cache.put(keys[i], r)
+        return out
+
+    def classify(
+        self, q: List[float], top_k: Optional[int] = None, with_ranking: bool = True
+    ) -> Dict[str, Any]:
+        # NB: тот же путь, что шаги 3/5/7 в cli.main, и та же схема ответа
+        refs = self.refs
+        q_s = transform_vector(refs["scale_info"], q)
+        if self.cache is not None:
+            min_d, winner_class, winner_idx, ranking = self._decide_many(
+                refs, [q_s], top_k, with_ranking
+            )[0]
+            distances = None
+        else:
+            min_d, winner_class, winner_idx, distances, ranking = decide(
+                q_s,
+                search_refs(refs),
+                refs["class_ids"],
+                self.metric_fn,
+                with_ranking=with_ranking,
+                top_k=top_k,
+            )
+        return make_result_dict(
+            self.files,
+            self.result_cfg,
+            self.d,
+            refs["scale_info"],
+            None,
+            q,
+            q_s,
+            distances,
+            ranking,
+            winner_idx,
+            winner_class,
+            self._thresholds(refs),
+            min_distance=min_d,
+        )
+
+    def classify_batch(
+        self, qs: List[List[float]], top_k: Optional[int] = None, with_ranking: bool = True
+    ) -> List[Dict[str, Any]]:
+        # NB: classify для пачки: одна матрица запросов x эталоны (decide_block),
+        # ответы те же, что у classify по одному
+        refs = self.refs
+        qs_s = [transform_vector(refs["scale_info"], q) for q in qs]
+        block = self._decide_many(refs, qs_s, top_k, with_ranking)
+        delta_max = self._thresholds(refs)
+        return [
+            make_result_dict(
+                self.files,
+                self.result_cfg,
+                self.d,
+                refs["scale_info"],
+                None,
+                q,
+                q_s,
+                None,
+                ranking,
+                winner_idx,
+                winner_class,
+                delta_max,
+                min_distance=min_d,
+            )
+            for q, q_s, (min_d, winner_class, winner_idx, ranking) in zip(qs, qs_s, block)
+        ]
+
+    def parse_payload(self, data: Any, top_k: Optional[int] = None):
+        # NB: payload как в q.json: {"vector": [...]} (+ необязательный "top_k")
+        q = parse_query(data, self.d)
+        if isinstance(data, dict) and data.get("top_k") is not None:
+            top_k = data["top_k"]
+            # NB: bool — подкласс int, но {"top_k": true} — ошибка клиента, а не 1
+            if isinstance(top_k, bool) or not isinstance(top_k, int):
+                raise RuntimeError(f"❌ top_k must be an integer >= 1, got {top_k!r}")
+            if top_k < 1:
+                raise RuntimeError("❌ top_k must be >= 1")
+        return q, top_k
+
+    def classify_payload(self, data: Any, top_k: Optional[int] = None) -> Dict[str, Any]:
+        q, top_k = self.parse_payload(data, top_k)
+        return self.classify(q, top_k=top_k)
+
+    def add_refs(self, class_ids: List[str], rows) -> int:
+        # NB: rows — сырые (не отскейленные) признаки; возвращаю новое число эталонов
+        from .updates import add_references
+
+        with self._update_lock:
+            self.refs = self._bind(add_references(self.refs, class_ids, rows))
+            return len(self.refs["class_ids"])
+
+    def remove_refs(self, indices: List[int]) -> int:
+        from .updates import remove_references
+
+        with self._update_lock:
+            self.refs = self._bind(remove_references(self.refs, indices))
+            return len(self.refs["class_ids"])
+
+    def update_payload(self, data: Any) -> Dict[str, Any]:
+        # NB: {"remove": [индексы], "add": [{"class_id": "A", "vector": [...]}, ...]}
+        # Сначала remove (индексы — по текущему набору), потом add.
+        if not isinstance(data, dict):
+            raise RuntimeError('❌ Expected {"add": [...], "remove": [...]}')
+        add = data.get("add") or []
+        if not isinstance(add, list):
+            raise RuntimeError('❌ "add" must be a list of {"class_id", "vector"} objects')
+        labels, rows = [], []
+        for item in add:
+            if not isinstance(item, dict) or not isinstance(item.get("class_id"), str):
+                raise RuntimeError('❌ Each "add" item needs "class_id" (string) and "vector"')
+            labels.append(item["class_id"])
+            rows.append(parse_query(item, self.d))
+        remove = data.get("remove") or []
+        if not isinstance(remove, list):
+            raise RuntimeError('❌ "remove" must be a list of reference indices')
+        from .updates import update_references
+
+        with self._update_lock:
+            refs = self._bind(update_references(self.refs, remove, labels, rows or None))
+            self.refs = refs
+        return {
+            "n_refs": len(refs["class_ids"]),
+            "scaling": refs["scale_info"],
+            "rescaled_columns": refs.get("rescaled_columns", 0),
+        }
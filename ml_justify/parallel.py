@@ -0,0 +1,185 @@
+# NB: Параллельный nearest по процессам (обход GIL для больших пачек/валидации).
+# Отскейленная матрица эталонов НЕ пиклится в каждый воркер: она лежит в
+# shared memory (или это mmap-индекс — тогда воркеры сами открывают файл),
+# воркер один раз подключается к ней в initializer. По сети гоняются только
+# куски запросов туда и (min, argmin[, top-k]) обратно.
+
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import os
+
+from .decision import _is_compact, decide_block, top_k_order
+from .metrics import BLOCK_ELEMS, as_matrix, get_metric
+
+# NB: состояние воркера (заполняет _init_worker)
+_W: Dict[str, Any] = {}
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def _share(refs_s, R) -> Tuple[Dict[str, Any], Any]:
+    # NB: спецификация, по которой воркер найдёт ту же матрицу, + shm для unlink.
+    # memmap смотрю у исходного refs_s: as_matrix (np.asarray) подкласс снимает.
+    import mmap
+    import numpy as np
+    from multiprocessing import shared_memory
+
+    # NB: только «исходный» memmap (не срез) — у него offset/shape описывают его целиком
+    if (
+        isinstance(refs_s, np.memmap)
+        and refs_s.filename
+        and isinstance(refs_s.base, mmap.mmap)
+    ):
+        spec = {
+            "kind": "memmap",
+            "path": refs_s.filename,
+            "offset": refs_s.offset,
+            "shape": refs_s.shape,
+            "dtype": refs_s.dtype.str,
+        }
+        return spec, None
+    shm = shared_memory.SharedMemory(create=True, size=max(1, R.nbytes))
+    np.ndarray(R.shape, dtype=R.dtype, buffer=shm.buf)[...] = R
+    spec = {"kind": "shm", "name": shm.name, "shape": R.shape, "dtype": R.dtype.str}
+    return spec, shm
+
+
+def _init_worker(spec: Dict[str, Any], metric_name: str) -> None:
+    import numpy as np
+
+    if spec["kind"] == "memmap":
+        R = np.memmap(
+            spec["path"],
+            mode="r",
+            dtype=np.dtype(spec["dtype"]),
+            offset=spec["offset"],
+            shape=tuple(spec["shape"]),
+        )
+    else:
+        from multiprocessing import shared_memory
+
+        shm = shared_memory.SharedMemory(name=spec["name"])
+        _W["shm"] = shm  # NB: держу ссылку, иначе буфер закроется
+        R = np.ndarray(tuple(spec["shape"]), dtype=np.dtype(spec["dtype"]), buffer=shm.buf)
+    _W["R"] = R
+    _W["engine"] = get_metric(metric_name)[0]
+
+
+def _task(Q, top_k: Optional[int]):
+    # NB: индексы вместо меток — метки подставит родитель
+    R, engine = _W["R"], _W["engine"]
+    if top_k is None:
+        mins, idxs = engine.nearest(Q, R)
+        return mins.tolist(), idxs.tolist(), None
+    step = max(1, BLOCK_ELEMS // max(1, R.shape[0]))
+    mins, idxs, tops = [], [], []
+    for s in range(0, len(Q), step):
+        D = engine.pairwise(Q[s : s + step], R)
+        ii = D.argmin(axis=1)  # tie-break: first
+        mins.extend(D[range(len(ii)), ii].tolist())
+        idxs.extend(ii.tolist())
+        for row in D:
+            order = top_k_order(row, top_k)
+            tops.append((order, row[order].tolist()))
+    return mins, idxs, tops
+
+
+def _task_nearest(Q):
+    return _W["engine"].nearest(Q, _W["R"])
+
+
+def decide_block_parallel(
+    Q_s,
+    refs_s,
+    ref_labels: List[str],
+    metric_fn,
+    workers: int,
+    with_ranking: bool = False,
+    top_k: Optional[int] = None,
+    chunk_rows: Optional[int] = None,
+):
+    # NB: Тот же результат, что decision.decide_block, но куски запросов
+    # считаются в пуле процессов. workers<=1 или мелкая пачка — без пула.
+    from concurrent.futures import ProcessPoolExecutor
+
+    Q = as_matrix(Q_s) if len(Q_s) else Q_s
+    name = getattr(metric_fn, "name", None)
+    if workers <= 1 or len(Q) < 2 or name is None:
+        return decide_block(Q_s, refs_s, ref_labels, metric_fn, with_ranking, top_k)
+
+    if _is_compact(refs_s):
+        # NB: по процессам раздаю полную матрицу (mmap/shm), а не компактную копию
+        refs_s = refs_s.full
+    R = as_matrix(refs_s)
+    if chunk_rows is None:
+        # NB: ~4 куска на воркер — балансировка без лишнего IPC
+        chunk_rows = max(1, -(-len(Q) // (workers * 4)))
+    spec, shm = _share(refs_s, R)
+    k = (top_k if top_k is not None else len(ref_labels)) if with_ranking else None
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(spec, name)
+        ) as ex:
+            parts = ex.map(
+                _task,
+                [Q[s : s + chunk_rows] for s in range(0, len(Q), chunk_rows)],
+                [k] * (-(-len(Q) // chunk_rows)),
+            )
+            out = []
+            for mins, idxs, tops in parts:
+                for j, (m, idx) in enumerate(zip(mins, idxs)):
+                    ranking = None
+                    if tops is not None:
+                        order, dists = tops[j]
+                        ranking = [
+                            {"index": i, "class_id": ref_labels[i], "distance": dd}
+                            for i, dd in zip(order, dists)
+                        ]
+                    out.append((m, ref_labels[idx], idx, ranking))
+            return out
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+
+def nearest_parallel(Q_s, refs_s, metric_fn, workers: int, chunk_rows: Optional[int] = None):
+    # NB: Только (min-дистанции, индексы ближайших) массивами — для больших
+    # пачек вроде валидации в калибровке: без кортежа и меток на строку.
+    # Ядро — DistanceEngine.nearest (тайлы + бегущий min/argmin), память не
+    # зависит от M x N; workers>1 — куски запросов по процессам.
+    import numpy as np
+    from concurrent.futures import ProcessPoolExecutor
+
+    if _is_compact(refs_s):
+        # NB: компактная копия ускоряет отбор кандидатов, но точные значения — из full
+        refs_s = refs_s.full
+    R = as_matrix(refs_s)
+    Q = as_matrix(Q_s) if len(Q_s) else np.zeros((0, R.shape[1]), dtype=R.dtype)
+    if workers <= 1 or len(Q) < 2:
+        return metric_fn.nearest(Q, R)
+    if chunk_rows is None:
+        chunk_rows = max(1, -(-len(Q) // (workers * 4)))
+    spec, shm = _share(refs_s, R)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(spec, metric_fn.name)
+        ) as ex:
+            chunks = [Q[s : s + chunk_rows] for s in range(0, len(Q), chunk_rows)]
+            parts = list(ex.map(_task_nearest, chunks))
+        return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+
+def nearest_classes_parallel(
+    Q_s, refs_s, ref_labels: List[str], metric_fn, workers: int
+) -> List[Tuple[float, str, int]]:
+    return [
+        r[:3]
+        for r in decide_block_parallel(Q_s, refs_s, ref_labels, metric_fn, workers)
+    ]
@@ -0,0 +1,211 @@
+# NB: Потоковая запись result.json. Раньше: make_result_dict собирал ranking
+# из N словарей, и json.dump(indent=2) сериализовал всё разом — для больших N
+# это удваивало пик памяти и занимало дольше самой классификации.
+# Теперь ranking — ленивое представление (порядок + массив дистанций + метки),
+# и писатель выдаёт его кусками. Summary идёт первым ключом — итог виден
+# сразу, даже если дальше мегабайты ranking.
+# Форматы: pretty (indent=2, как раньше), compact (без отступов) и npz
+# (бинарный: JSON-шапка + ranking/distances массивами numpy).
+
+from __future__ import annotations
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import json
+
+FORMATS = ("pretty", "compact", "npz")
+CHUNK = 4096
+
+# NB: плейсхолдеры, на месте которых в шапке стримятся ranking/distances
+_HOLES = {"ranking": "\x00ranking\x00", "distances": "\x00distances\x00"}
+
+
+class RankingView(Sequence):
+    # NB: ranking без N словарей в памяти: снаружи — последовательность
+    # {"index", "class_id", "distance"}, как список из decision._ranking
+
+    def __init__(self, order, dists, labels):
+        self.order = order
+        self.dists = dists
+        self.labels = labels
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        k = int(self.order[i])
+        return {"index": k, "class_id": self.labels[k], "distance": float(self.dists[k])}
+
+    def chunks(self, size: int = CHUNK):
+        # NB: (индексы, метки, дистанции) кусками — для писателей
+        import numpy as np
+
+        order = np.asarray(self.order, dtype=np.int64)
+        dists = np.asarray(self.dists)
+        labels = self.labels
+        for s in range(0, len(order), size):
+            part = order[s : s + size]
+            idx = part.tolist()
+            yield idx, [labels[k] for k in idx], dists[part].astype(np.float64).tolist()
+
+
+def _num(x: float) -> str:
+    # NB: как json.dumps(float), но без его накладных расходов на каждое число
+    r = repr(x)
+    return r if r not in ("inf", "-inf", "nan") else json.dumps(x)
+
+
+def _ordered(result: Dict[str, Any]) -> Dict[str, Any]:
+    out = {"summary": result["summary"]}
+    out.update((k, v) for k, v in result.items() if k != "summary")
+    return out
+
+
+def _ranking_chunks(ranking):
+    if isinstance(ranking, RankingView):
+        yield from ranking.chunks()
+        return
+    for s in range(0, len(ranking), CHUNK):
+        part = ranking[s : s + CHUNK]
+        yield (
+            [r["index"] for r in part],
+            [r["class_id"] for r in part],
+            [r["distance"] for r in part],
+        )
+
+
+def _write_ranking(f, ranking, pretty: bool) -> None:
+    if ranking is None:
+        f.write("null")
+        return
+    if len(ranking) == 0:
+        f.write("[]")
+        return
+    cls_json: Dict[str, str] = {}  # NB: классов мало — кодирую каждый один раз
+    if pretty:
+        item = '    {\n      "index": %d,\n      "class_id": %s,\n      "distance": %s\n    }'
+        sep, head, tail = ",\n", "[\n", "\n  ]"
+    else:
+        item = '{"index": %d, "class_id": %s, "distance": %s}'
+        sep, head, tail = ", ", "[", "]"
+    f.write(head)
+    first = True
+    for idx, labels, dists in _ranking_chunks(ranking):
+        parts = []
+        for i, c, d in zip(idx, labels, dists):
+            cj = cls_json.get(c)
+            if cj is None:
+                cj = cls_json[c] = json.dumps(c, ensure_ascii=False)
+            parts.append(item % (i, cj, _num(d)))
+        if not first:
+            f.write(sep)
+        f.write(sep.join(parts))
+        first = False
+    f.write(tail)
+
+
+def _write_floats(f, values, pretty: bool) -> None:
+    if len(values) == 0:
+        f.write("[]")
+        return
+    sep, head, tail = (",\n    ", "[\n    ", "\n  ]") if pretty else (", ", "[", "]")
+    f.write(head)
+    for s in range(0, len(values), CHUNK):
+        if s:
+            f.write(sep)
+        chunk = values[s : s + CHUNK]
+        chunk = chunk.tolist() if hasattr(chunk, "tolist") else [float(x) for x in chunk]
+        f.write(sep.join(map(_num, chunk)))
+    f.write(tail)
+
+
+def _write_json(path: Path, result: Dict[str, Any], pretty: bool) -> None:
+    head = _ordered(result)
+    streams = {}
+    for key, hole in _HOLES.items():
+        if key in head and head[key] is not None:
+            streams[key] = head[key]
+            head[key] = hole
+    text = json.dumps(head, ensure_ascii=False, indent=2 if pretty else None)
+    with path.open("w", encoding="utf-8") as f:
+        pos = 0
+        while True:
+            # NB: ближайший плейсхолдер (ranking раньше distances, но не полагаюсь)
+            found = [(text.find(json.dumps(h), pos), k) for k, h in _HOLES.items() if k in streams]
+            found = [(i, k) for i, k in found if i >= 0]
+            if not found:
+                break
+            i, key = min(found)
+            f.write(text[pos:i])
+            if key == "ranking":
+                _write_ranking(f, streams[key], pretty)
+            else:
+                _write_floats(f, streams[key], pretty)
+            pos = i + len(json.dumps(_HOLES[key]))
+        f.write(text[pos:])
+
+
+def _write_npz(path: Path, result: Dict[str, Any]) -> None:
+    import numpy as np
+
+    head = _ordered(result)
+    arrays = {}
+    ranking = head.get("ranking")
+    if ranking is not None:
+        del head["ranking"]
+        classes: Dict[str, int] = {}
+        parts = {"index": [], "class": [], "distance": []}
+        for idx, labels, dists in _ranking_chunks(ranking):
+            parts["index"].append(np.asarray(idx, dtype=np.int64))
+            parts["class"].append(
+                np.asarray([classes.setdefault(c, len(classes)) for c in labels], dtype=np.int32)
+            )
+            parts["distance"].append(np.asarray(dists, dtype=np.float64))
+        for key, chunks in parts.items():
+            arrays["ranking_" + key] = np.concatenate(chunks) if chunks else np.zeros(0)
+        head["ranking_classes"] = list(classes)
+    distances = head.get("distances")
+    if distances is not None:
+        del head["distances"]
+        arrays["distances"] = np.asarray(distances, dtype=np.float64)
+    meta = json.dumps(head, ensure_ascii=False).encode("utf-8")
+    with path.open("wb") as f:
+        np.savez(f, meta=np.frombuffer(meta, dtype=np.uint8), **arrays)
+
+
+def write_result(path: Path, result: Dict[str, Any], fmt: str = "pretty") -> None:
+    # NB: result["ranking"] — список словарей, RankingView или None (не писать)
+    if fmt == "npz":
+        _write_npz(Path(path), result)
+    elif fmt in ("pretty", "compact"):
+        _write_json(Path(path), result, pretty=fmt == "pretty")
+    else:
+        raise RuntimeError(f"❌ Unknown result format: {fmt}. Use one of {'|'.join(FORMATS)}.")
+
+
+def read_result(path: Path) -> Dict[str, Any]:
+    # NB: Обратно в обычный dict (тот же вид, что у json.load(result.json))
+    path = Path(path)
+    with path.open("rb") as f:
+        magic = f.read(4)
+    if magic != b"PK\x03\x04":
+        return json.loads(path.read_text(encoding="utf-8"))
+    import numpy as np
+
+    with np.load(path) as z:
+        result = json.loads(z["meta"].tobytes().decode("utf-8"))
+        classes: Optional[List[str]] = result.pop("ranking_classes", None)
+        if "ranking_index" in z:
+            result["ranking"] = [
+                {"index": i, "class_id": classes[c], "distance": d}
+                for i, c, d in zip(
+                    z["ranking_index"].tolist(),
+                    z["ranking_class"].tolist(),
+                    z["ranking_distance"].tolist(),
+                )
+            ]
+        if "distances" in z:
+            result["distances"] = z["distances"].tolist()
+    return result
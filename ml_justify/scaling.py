@@ -39,20 +39,264 @@ def transform_standard(
     return [(v[j] - means[j]) / stds[j] for j in range(len(v))]
 
 
-def apply_scaling(scale: str, refs: List[List[float]], q: List[float]):
+# NB: fit по матрице идёт блоками строк: каждый блок читаю из памяти один раз
+# (min+max или среднее+M2 по нему — пока он в кэше) и сливаю с накопленным.
+FIT_BLOCK_ELEMS = 1 << 20
+
+
+def _fit_stats_matrix(scale: str, X) -> Dict[str, Any]:
+    import numpy as np
+
+    n, d = X.shape
+    rows = max(1, FIT_BLOCK_ELEMS // max(1, d))
+    if scale == "minmax":
+        mins = maxs = None
+        for s in range(0, n, rows):
+            c = X[s : s + rows]
+            lo, hi = c.min(axis=0), c.max(axis=0)
+            mins = lo if mins is None else np.minimum(mins, lo)
+            maxs = hi if maxs is None else np.maximum(maxs, hi)
+        return {
+            "n": int(n),
+            "mins": mins.astype(np.float64).tolist(),
+            "maxs": maxs.astype(np.float64).tolist(),
+        }
+    # NB: standard — слияние групп (Чан): для одного блока ровно X.mean и sum((X-mean)^2)
+    cnt, mean, m2 = 0, np.zeros(d), np.zeros(d)
+    for s in range(0, n, rows):
+        c = X[s : s + rows]
+        nb = c.shape[0]
+        mb = c.mean(axis=0, dtype=np.float64)
+        m2b = ((c - mb) ** 2).sum(axis=0)
+        tot = cnt + nb
+        delta = mb - mean
+        mean = mean + delta * nb / tot
+        m2 = m2 + m2b + delta**2 * cnt * nb / tot
+        cnt = tot
+    return {"n": int(n), "mean": mean.tolist(), "m2": m2.tolist()}
+
+
+class Scaler:
+    # NB: Подобранный скейлер: fit один раз (векторно, за один проход по
+    # матрице), дальше transform целых матриц или одного q; можно сохранить
+    # в JSON и загрузить без повторного fit. info — тот же словарь
+    # {"scale", "params"}, что кладётся в result.json и индекс.
+
+    FORMAT = "ml-justify-scaler"
+
+    def __init__(self, scale: str, params: Dict[str, Any] = None, stats: Dict[str, Any] = None):
+        if scale not in ("none", "minmax", "standard"):
+            raise RuntimeError(f"Unexpected scale: {scale}")
+        self.scale = scale
+        self.params = params
+        self.stats = stats
+
+    @property
+    def fitted(self) -> bool:
+        return self.scale == "none" or self.params is not None
+
+    @property
+    def d(self):
+        # NB: размерность, на которой подобран (у none её нет)
+        return None if not self.params else len(next(iter(self.params.values())))
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        if not self.fitted:
+            raise RuntimeError("❌ Scaler is not fitted yet")
+        if self.scale == "none":
+            return {"scale": "none"}
+        return {"scale": self.scale, "params": self.params}
+
+    def fit(self, X) -> "Scaler":
+        from .metrics import as_matrix
+
+        X = as_matrix(X)
+        if X.shape[0] == 0:
+            raise RuntimeError("❌ Cannot fit scaling on an empty matrix")
+        if self.scale == "none":
+            self.stats = {"n": int(X.shape[0])}
+            return self
+        self.stats = _fit_stats_matrix(self.scale, X)
+        self.params = stats_to_params(self.scale, self.stats)
+        return self
+
+    def transform(self, X):
+        return transform_matrix(self.info, X)
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
+
+    def transform_vector(self, v: List[float]) -> List[float]:
+        return transform_vector(self.info, v)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"format": self.FORMAT, "version": 1, **self.info, "stats": self.stats}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Scaler":
+        if not isinstance(data, dict) or data.get("format") != cls.FORMAT:
+            raise RuntimeError("❌ Not an ML-Justify scaler file")
+        return cls(data["scale"], data.get("params"), data.get("stats"))
+
+    def save(self, path) -> None:
+        import json
+        from pathlib import Path
+
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path) -> "Scaler":
+        import json
+        from pathlib import Path
+
+        path = Path(path)
+        if not path.exists():
+            raise RuntimeError(f"❌ scaler not found at: {path}")
+        return cls.from_dict(json.loads(path.read_text(encoding="utf-8")))
+
+
+def fit_scaling(scale: str, refs: List[List[float]]) -> Dict[str, Any]:
+    # NB: Только fit — параметры в том же виде, что кладутся в result.json
     info: Dict[str, Any] = {"scale": scale}
     if scale == "none":
-        return refs, q, info
+        return info
+    if scale in ("minmax", "standard") and hasattr(refs, "ndim"):
+        return Scaler(scale).fit(refs).info
     if scale == "minmax":
         mins, ranges = fit_minmax(refs)
-        refs2 = [transform_minmax(v, mins, ranges) for v in refs]
-        q2 = transform_minmax(q, mins, ranges)
         info.update({"params": {"mins": mins, "ranges": ranges}})
-        return refs2, q2, info
+        return info
     if scale == "standard":
         means, stds = fit_standard(refs)
-        refs2 = [transform_standard(v, means, stds) for v in refs]
-        q2 = transform_standard(q, means, stds)
         info.update({"params": {"means": means, "stds": stds}})
-        return refs2, q2, info
+        return info
     raise RuntimeError(f"Unexpected scale: {scale}")
+
+
+def transform_vector(scale_info: Dict[str, Any], v: List[float]) -> List[float]:
+    # NB: Применяю уже подобранные параметры (например, сохранённые в индексе)
+    scale = scale_info["scale"]
+    if scale == "none":
+        return v
+    if scale == "minmax":
+        p = scale_info["params"]
+        return transform_minmax(v, p["mins"], p["ranges"])
+    if scale == "standard":
+        p = scale_info["params"]
+        return transform_standard(v, p["means"], p["stds"])
+    raise RuntimeError(f"Unexpected scale: {scale}")
+
+
+def transform_matrix(scale_info: Dict[str, Any], X):
+    # NB: transform_vector для целой матрицы (numpy): (X - shift) / div построчно
+    import numpy as np
+
+    scale = scale_info["scale"]
+    X = np.asarray(X)
+    if scale == "none":
+        return X
+    p = scale_info["params"]
+    if scale == "minmax":
+        shift, div = p["mins"], p["ranges"]
+    elif scale == "standard":
+        shift, div = p["means"], p["stds"]
+    else:
+        raise RuntimeError(f"Unexpected scale: {scale}")
+    dtype = X.dtype if X.dtype.kind == "f" else np.float64
+    out = np.subtract(X, np.asarray(shift, dtype=dtype), dtype=dtype)
+    out /= np.asarray(div, dtype=dtype)
+    return out
+
+
+def fit_stats(scale: str, X) -> Dict[str, Any]:
+    # NB: «Сырьё» для инкрементального обновления параметров скейлинга:
+    # minmax — n/mins/maxs, standard — n/mean/m2 (сумма квадратов отклонений).
+    # Те же числа, из которых Scaler.fit получает params.
+    if scale not in ("none", "minmax", "standard"):
+        raise RuntimeError(f"Unexpected scale: {scale}")
+    return Scaler(scale).fit(X).stats
+
+
+def stats_to_params(scale: str, stats: Dict[str, Any]) -> Dict[str, Any]:
+    import numpy as np
+
+    if scale == "minmax":
+        mins = np.asarray(stats["mins"], dtype=np.float64)
+        ranges = np.asarray(stats["maxs"], dtype=np.float64) - mins
+        ranges[ranges == 0] = 1.0
+        return {"mins": mins.tolist(), "ranges": ranges.tolist()}
+    variances = np.asarray(stats["m2"], dtype=np.float64) / stats["n"]
+    stds = np.where(variances > 0, np.sqrt(variances), 1.0)
+    return {"means": list(stats["mean"]), "stds": stds.tolist()}
+
+
+def update_stats(scale: str, stats: Dict[str, Any], added=None, removed=None, remaining=None):
+    # NB: Новые stats после добавления (added) и/или удаления (removed) строк.
+    # standard — формулы Уэлфорда/Чана для объединения (и «вычитания») групп:
+    # O(k·d) на k строк вместо O(N·d). minmax — O(k·d); полный пересчёт
+    # столбца по remaining (оставшиеся строки) только если удалили его min/max.
+    import numpy as np
+
+    if scale == "none":
+        n = stats["n"] + (len(added) if added is not None else 0)
+        return {"n": n - (len(removed) if removed is not None else 0)}
+    out = {k: (list(v) if isinstance(v, list) else v) for k, v in stats.items()}
+
+    if scale == "minmax":
+        mins = np.asarray(out["mins"], dtype=np.float64)
+        maxs = np.asarray(out["maxs"], dtype=np.float64)
+        if removed is not None and len(removed):
+            R = np.asarray(removed, dtype=np.float64)
+            out["n"] -= len(R)
+            hit = np.flatnonzero((R.min(axis=0) <= mins) | (R.max(axis=0) >= maxs))
+            if len(hit):
+                if remaining is None or len(remaining) == 0:
+                    raise RuntimeError("❌ Need the remaining rows to update minmax bounds")
+                cols = np.asarray(remaining)[:, hit]
+                mins[hit] = cols.min(axis=0)
+                maxs[hit] = cols.max(axis=0)
+        if added is not None and len(added):
+            A = np.asarray(added, dtype=np.float64)
+            out["n"] += len(A)
+            mins = np.minimum(mins, A.min(axis=0))
+            maxs = np.maximum(maxs, A.max(axis=0))
+        out["mins"], out["maxs"] = mins.tolist(), maxs.tolist()
+        return out
+
+    n = out["n"]
+    mean = np.asarray(out["mean"], dtype=np.float64)
+    m2 = np.asarray(out["m2"], dtype=np.float64)
+    if removed is not None and len(removed):
+        R = np.asarray(removed, dtype=np.float64)
+        nb = len(R)
+        na = n - nb
+        if na <= 0:
+            raise RuntimeError("❌ Cannot remove all reference rows")
+        mean_b = R.mean(axis=0)
+        m2_b = ((R - mean_b) ** 2).sum(axis=0)
+        mean_a = (n * mean - nb * mean_b) / na
+        delta = mean_b - mean_a
+        m2 = np.maximum(m2 - m2_b - delta**2 * na * nb / n, 0.0)
+        n, mean = na, mean_a
+    if added is not None and len(added):
+        A = np.asarray(added, dtype=np.float64)
+        nb = len(A)
+        mean_b = A.mean(axis=0)
+        m2_b = ((A - mean_b) ** 2).sum(axis=0)
+        delta = mean_b - mean
+        tot = n + nb
+        mean = mean + delta * nb / tot
+        m2 = m2 + m2_b + delta**2 * n * nb / tot
+        n = tot
+    out.update({"n": n, "mean": mean.tolist(), "m2": m2.tolist()})
+    return out
+
+
+def apply_scaling(scale: str, refs: List[List[float]], q: List[float]):
+    info = fit_scaling(scale, refs)
+    if scale == "none":
+        return refs, q, info
+    refs2 = [transform_vector(info, v) for v in refs]
+    q2 = transform_vector(info, q)
+    return refs2, q2, info
@@ -0,0 +1,132 @@
+# NB: Долгоживущий сервер: конфиг, эталоны и скейлинг грузятся ОДИН раз,
+# дальше каждый запрос — только transform q + decide + JSON.
+# Протокол — обычный HTTP/1.1 (keep-alive) по TCP или по unix-сокету:
+#   POST /classify  {"vector": [...], "top_k": 5?}  -> ответ как result.json
+#   GET  /health                                    -> {"status": "ok", ...}
+#   POST /refs      {"add": [{"class_id", "vector"}], "remove": [i, ...]}
+#                   -> добавить/удалить эталоны без перезапуска (см. updates.py)
+
+from __future__ import annotations
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+import json, os, socketserver, sys
+
+from .model import Model, content_length
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # NB: keep-alive — без нового TCP на каждый запрос
+    server_version = "ml-justify"
+    disable_nagle_algorithm = True  # NB: заголовки и тело уходят разными write — без Nagle +40 мс
+
+    def _send(self, code: int, payload) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._send(404, {"error": f"❌ Unknown path: {self.path}"})
+            return
+        model = self.server.model
+        health = {
+            "status": "ok",
+            "n_refs": len(model.refs["class_ids"]),
+            "dimensions": model.d,
+            "metric": model.metric_name,
+        }
+        if model.cache is not None:
+            health["cache"] = model.cache.stats()
+        self._send(200, health)
+
+    def do_POST(self) -> None:
+        if self.path not in ("/classify", "/refs"):
+            self._send(404, {"error": f"❌ Unknown path: {self.path}"})
+            return
+        try:
+            n = content_length(self.headers.get("Content-Length"))
+        except RuntimeError as e:
+            # NB: где кончается тело — неизвестно: отвечаю и закрываю соединение
+            self.close_connection = True
+            self._send(400, {"error": str(e)})
+            return
+        try:
+            data = json.loads(self.rfile.read(n) or b"null")
+            if self.path == "/refs":
+                result = self.server.model.update_payload(data)
+            else:
+                result = self.server.model.classify_payload(data, top_k=self.server.top_k)
+        except (RuntimeError, ValueError, TypeError) as e:
+            # NB: TypeError — payload не той формы: это 400, а не обрыв соединения
+            self._send(400, {"error": str(e)})
+            return
+        self._send(200, result)
+
+    def address_string(self) -> str:
+        # NB: у unix-сокета client_address — пустая строка
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+        return "unix"
+
+    def log_message(self, fmt, *args) -> None:
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+
+class _TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(
+    model: Model,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    unix_socket: Optional[str] = None,
+    top_k: Optional[int] = None,
+    verbose: bool = False,
+):
+    if unix_socket:
+        path = Path(unix_socket)
+        if path.exists():
+            path.unlink()  # NB: хвост от прошлого запуска
+        srv = _UnixServer(str(path), _Handler)
+    else:
+        srv = _TCPServer((host, port), _Handler)
+    srv.model = model
+    srv.top_k = top_k
+    srv.verbose = verbose
+    return srv
+
+
+def serve(
+    model: Model,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    unix_socket: Optional[str] = None,
+    top_k: Optional[int] = None,
+    verbose: bool = False,
+) -> None:
+    srv = make_server(model, host, port, unix_socket, top_k, verbose)
+    where = unix_socket or "http://%s:%d" % srv.server_address[:2]
+    print(
+        f"Serving {len(model.refs['class_ids'])} refs (d={model.d}, {model.metric_name}) on {where}",
+        file=sys.stderr,
+    )
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.unlink(unix_socket)
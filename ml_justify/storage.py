@@ -0,0 +1,152 @@
+# NB: Компактное хранение отскейленных эталонов: float32 (в 2 раза меньше)
+# или int8 — скалярное квантование с шагом по каждому признаку (в 8 раз меньше).
+# Ядро считает приближённые дистанции прямо по компактной матрице, плюс
+# гарантированную оценку ошибки E (квантование + округление float32).
+# Кандидаты, которые с учётом E ещё могут оказаться ближайшими (или войти в
+# top-k), перепроверяю в полной точности по исходной матрице (full — обычно
+# mmap индекса, в RAM попадают только нужные строки). Поэтому min_distance,
+# winner_index и решение class/undecided — ровно те же, что без сжатия.
+# full остаётся при CompactRefs всегда: экономия памяти — только поверх
+# mmap-индекса (--index); у эталонов из csv full уже в RAM, и компактная
+# копия добавляется к ней (выигрыш тогда — скорость отбора, не память).
+
+from __future__ import annotations
+from typing import List, Optional, Tuple
+
+from .decision import top_k_order
+from .metrics import BLOCK_ELEMS, DistanceEngine, as_matrix
+
+STORAGES = ("float64", "float32", "int8")
+
+# NB: запасы для оценки ошибки округления (единица младшего разряда float32)
+_U32 = 2.0**-24
+
+
+class CompactRefs:
+    def __init__(self, kind: str, data, full, offset=None, step=None):
+        self.kind = kind
+        self.data = data
+        self.full = full
+        self.offset = offset
+        self.step = step
+        import numpy as np
+
+        if kind == "float32":
+            # NB: |x - fl32(x)| <= u·|x| — беру худший случай по столбцу
+            self._ref_err = _U32 * np.abs(full).max(axis=0).astype(np.float64)
+        else:
+            self._ref_err = np.asarray(step, dtype=np.float64) * (0.5 + _U32)
+
+    @classmethod
+    def build(cls, full, kind: str) -> "CompactRefs":
+        import numpy as np
+
+        if kind not in ("float32", "int8"):
+            raise RuntimeError(f"❌ Unknown storage: {kind}. Use one of {'|'.join(STORAGES)}.")
+        full = as_matrix(full)
+        if kind == "float32":
+            return cls(kind, full.astype(np.float32), full)
+        lo = full.min(axis=0).astype(np.float64)
+        step = (full.max(axis=0) - lo) / 255.0
+        step[step == 0] = 1.0
+        codes = np.empty(full.shape, dtype=np.int8)
+        # NB: блоками по строкам — без временной float64-копии всей матрицы
+        rows = max(1, BLOCK_ELEMS // max(1, full.shape[1]))
+        for s in range(0, full.shape[0], rows):
+            c = np.rint((full[s : s + rows] - lo) / step) - 128.0
+            codes[s : s + rows] = np.clip(c, -128, 127)
+        # NB: offset/step — float64: коды считались именно от них. Округлённые
+        # во float32 (при больших значениях признака, ~1e6, это сотые) сдвигали
+        # бы всю сетку квантования мимо оценки ошибки в _ref_err
+        return cls(kind, codes, full, lo, step)
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+    def _approx(self, engine: DistanceEngine, Qb):
+        # NB: (приближённые дистанции mb x N, оценка ошибки mb x N) — float32
+        import numpy as np
+
+        n, d = self.data.shape
+        if self.kind == "float32":
+            Qc = Qb.astype(np.float32)
+            q_err = _U32 * np.abs(Qb)
+        else:
+            Qc = ((Qb - self.offset) / self.step - 128.0).astype(np.float32)
+            # NB: округление кода q во float32: u·|код|·step <= u·(|q - offset| + 128·step)
+            q_err = 2 * _U32 * (np.abs(Qb - self.offset) + 128.0 * self.step)
+        # NB: ошибка представления: |d(q, x~) - d(q, x)| <= ||e|| (неравенство треугольника)
+        e0 = engine._reduce(self._ref_err + q_err)
+        # NB: плюс округление арифметики float32 на сумме из d слагаемых
+        rel = (d + 8) * 2 * _U32
+        D = np.empty((len(Qb), n), dtype=np.float32)
+        nb = max(1, min(n, BLOCK_ELEMS // max(1, d)))
+        mb = max(1, BLOCK_ELEMS // (nb * max(1, d)))
+        for i in range(0, len(Qb), mb):
+            qb = Qc[i : i + mb, None, :]
+            for j in range(0, n, nb):
+                diff = self.data[None, j : j + nb, :] - qb
+                if self.kind == "int8":
+                    diff *= self.step
+                D[i : i + mb, j : j + nb] = engine._reduce(diff)
+        E = e0[:, None] + rel * (D.astype(np.float64) + e0[:, None])
+        return D, E
+
+    def _exact(self, engine: DistanceEngine, q, cand):
+        return engine.to_refs(q, self.full[cand])
+
+    def nearest_block(
+        self, engine: DistanceEngine, Q, top_k: Optional[int] = None, with_ranking: bool = False
+    ) -> List[Tuple[float, int, Optional[List[int]], Optional[list]]]:
+        # NB: по запросу (min_distance, winner_index, ranking-индексы, их дистанции);
+        # всё — точные значения из full, tie-first как у argmin/stable-сортировки.
+        import numpy as np
+
+        Qm = as_matrix(Q).astype(np.float64, copy=False)
+        n = len(self)
+        full_rank = with_ranking and (top_k is None or top_k >= n)
+        out = []
+        step = max(1, BLOCK_ELEMS // max(1, n))
+        for s in range(0, len(Qm), step):
+            Qb = Qm[s : s + step]
+            D, E = self._approx(engine, Qb)
+            lo = D - E
+            hi = D + E
+            best_hi = hi.min(axis=1)
+            for r, q in enumerate(Qb):
+                if full_rank:
+                    # NB: полный ranking всё равно требует всех точных дистанций
+                    dists = engine.to_refs(q, self.full)
+                    order = top_k_order(dists, top_k)
+                    idx = order[0]
+                    out.append((float(dists[idx]), idx, order, dists[order].tolist()))
+                    continue
+                cand = np.flatnonzero(lo[r] <= best_hi[r])
+                exact = self._exact(engine, q, cand)
+                j = int(exact.argmin())  # tie-break: first (cand по возрастанию)
+                m, idx = float(exact[j]), int(cand[j])
+                order = dists = None
+                if with_ranking:
+                    kth = np.partition(hi[r], top_k - 1)[top_k - 1]
+                    cand_k = np.flatnonzero(lo[r] <= kth)
+                    exact_k = self._exact(engine, q, cand_k)
+                    local = top_k_order(exact_k, top_k)
+                    order = cand_k[local].tolist()
+                    dists = exact_k[local].tolist()
+                out.append((m, idx, order, dists))
+        return out
+
+
+def compact_refs(scaled, storage: str = "float64"):
+    # NB: float64 — без обёртки (как раньше), иначе CompactRefs
+    if storage == "float64":
+        return scaled
+    return CompactRefs.build(scaled, storage)
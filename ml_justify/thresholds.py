@@ -0,0 +1,81 @@
+# NB: Пороги delta_max по классам. У классов разный разброс: один общий порог
+# либо режет «широкие» классы, либо пропускает лишнее у «узких». В конфиге —
+# delta_max (общий, для классов без своего) + delta_max_per_class {класс: порог}.
+# Сравниваю min_distance с порогом класса-победителя. Порог по каждой строке
+# эталонов считаю заранее (bind) — на запрос это одно чтение массива по
+# winner_index, без поиска по словарю.
+
+from __future__ import annotations
+from typing import Any, Dict, Optional
+import math
+
+
+class ClassThresholds:
+    def __init__(self, default: Optional[float], per_class: Dict[str, float], class_ids=None):
+        self.default = default
+        self.per_class = dict(per_class)
+        self.class_ids = class_ids
+        self.by_ref = None
+        if class_ids is not None:
+            import numpy as np
+
+            fallback = math.inf if default is None else float(default)
+            self.by_ref = np.fromiter(
+                (self.per_class.get(c, fallback) for c in class_ids),
+                dtype=np.float64,
+                count=len(class_ids),
+            )
+
+    def bind(self, class_ids) -> "ClassThresholds":
+        # NB: тот же набор порогов, привязанный к строкам эталонов; после апдейта
+        # эталонов (новый список class_ids) — пересобираю, иначе переиспользую
+        if self.class_ids is class_ids:
+            return self
+        return ClassThresholds(self.default, self.per_class, class_ids)
+
+    def for_class(self, class_id) -> Optional[float]:
+        return self.per_class.get(class_id, self.default)
+
+    def for_winner(self, winner_idx: int, winner_class) -> Optional[float]:
+        if self.by_ref is not None and winner_idx is not None and winner_idx >= 0:
+            t = float(self.by_ref[winner_idx])
+            return None if t == math.inf else t
+        return self.for_class(winner_class)
+
+    def bound(self) -> Optional[float]:
+        # NB: max_dist для дерева/early-exit: дальше самого большого порога —
+        # точно undecided; есть класс без порога — отсекать нельзя
+        if self.by_ref is not None:
+            m = float(self.by_ref.max()) if len(self.by_ref) else math.inf
+            return None if m == math.inf else m
+        if self.default is None:
+            return None
+        return max([float(self.default), *self.per_class.values()])
+
+    def to_config(self) -> Dict[str, Any]:
+        return {"delta_max": self.default, "delta_max_per_class": dict(self.per_class)}
+
+    def __repr__(self) -> str:
+        # NB: стабильный вид — входит в ключ кэша решений
+        return f"ClassThresholds({self.default!r}, {sorted(self.per_class.items())!r})"
+
+
+def thresholds_from_config(cfg: Dict[str, Any]):
+    # NB: без delta_max_per_class — просто число/None, как раньше
+    per_class = cfg.get("delta_max_per_class")
+    if not per_class:
+        return cfg["delta_max"]
+    return ClassThresholds(cfg["delta_max"], per_class)
+
+
+def applied_threshold(delta_max, winner_idx: int = -1, winner_class=None) -> Optional[float]:
+    # NB: порог, с которым сравнивается min_distance данного победителя
+    if isinstance(delta_max, ClassThresholds):
+        return delta_max.for_winner(winner_idx, winner_class)
+    return delta_max
+
+
+def search_bound(delta_max) -> Optional[float]:
+    if isinstance(delta_max, ClassThresholds):
+        return delta_max.bound()
+    return delta_max
@@ -0,0 +1,182 @@
+# NB: Добавить/удалить эталоны без полной пересборки. Параметры скейлинга
+# обновляются инкрементально (scaling.update_stats: minmax — границы,
+# standard — Уэлфорд), а отскейленная матрица пересчитывается только в тех
+# столбцах, где параметры реально поменялись (+ новые строки).
+# Функции не трогают исходный refs (он может быть mmap-индексом и его в этот
+# момент читают другие потоки): возвращают новый словарь того же вида,
+# что model.load_references.
+
+from __future__ import annotations
+from typing import Any, Dict, List, Sequence
+import hashlib, operator
+
+from .storage import compact_refs
+from .scaling import fit_stats, stats_to_params, transform_matrix, update_stats
+
+
+def _fail(msg: str):
+    raise RuntimeError(msg)
+
+
+def _indices(remove) -> List[int]:
+    # NB: operator.index принимает int и целые numpy, но не float/str/list;
+    # bool формально int, но [true] вместо индекса — ошибка клиента
+    msg = "❌ remove must be a list of integer reference indices"
+    try:
+        items = list(remove)
+    except TypeError:
+        _fail(msg)
+    if any(isinstance(i, bool) for i in items):
+        _fail(msg)
+    try:
+        return [operator.index(i) for i in items]
+    except TypeError:
+        _fail(msg)
+
+
+def _stats(refs: Dict[str, Any]) -> Dict[str, Any]:
+    # NB: в индексе stats уже лежат; для csv — один проход по матрице при первом апдейте
+    if refs.get("stats") is not None:
+        return refs["stats"]
+    return fit_stats(refs["scale_info"]["scale"], refs["raw"])
+
+
+def _info(scale: str, stats: Dict[str, Any]) -> Dict[str, Any]:
+    if scale == "none":
+        return {"scale": "none"}
+    return {"scale": scale, "params": stats_to_params(scale, stats)}
+
+
+def _changed_columns(old: Dict[str, Any], new: Dict[str, Any]):
+    import numpy as np
+
+    if old["scale"] == "none":
+        return np.zeros(0, dtype=np.int64)
+    a, b = old["params"], new["params"]
+    return np.flatnonzero(
+        np.logical_or.reduce(
+            [np.asarray(a[k]) != np.asarray(b[k]) for k in a]
+        )
+    )
+
+
+def _refresh(scaled, raw, old_info, new_info) -> int:
+    # NB: пересчитываю на месте только «поехавшие» столбцы; возвращаю их число.
+    # Если поехали почти все (standard: среднее сдвигается везде) — целиком,
+    # без gather/scatter по столбцам: так в разы быстрее.
+    import numpy as np
+
+    cols = _changed_columns(old_info, new_info)
+    if len(cols) * 2 > scaled.shape[1]:
+        p = new_info["params"]
+        shift, div = (p["mins"], p["ranges"]) if "mins" in p else (p["means"], p["stds"])
+        np.subtract(raw, np.asarray(shift, dtype=scaled.dtype), out=scaled, dtype=scaled.dtype)
+        scaled /= np.asarray(div, dtype=scaled.dtype)
+    elif len(cols):
+        sub = {
+            "scale": new_info["scale"],
+            "params": {k: [v[j] for j in cols.tolist()] for k, v in new_info["params"].items()},
+        }
+        scaled[:, cols] = transform_matrix(sub, raw[:, cols])
+    return len(cols)
+
+
+def _chain_fingerprint(old: str, remove, class_ids, rows) -> str:
+    # NB: новый отпечаток = хэш(старый + сам апдейт) — без прохода по всей матрице
+    import numpy as np
+
+    h = hashlib.sha256(old.encode("ascii"))
+    h.update(repr(sorted(remove)).encode("ascii"))
+    h.update("\n".join(class_ids).encode("utf-8"))
+    h.update(np.ascontiguousarray(rows, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+def _rebuild(refs, class_ids, raw, scaled, info, stats, changed: int) -> Dict[str, Any]:
+    out = dict(refs)
+    out.update(
+        {
+            "class_ids": class_ids,
+            "raw": raw,
+            "scaled": scaled,
+            "scale_info": info,
+            "stats": stats,
+            "d": refs["d"],
+            # NB: файл индекса больше не соответствует — сохранять через write_index
+            "index": None,
+            "rescaled_columns": changed,
+        }
+    )
+    if refs.get("compact") is not None:
+        # NB: у int8 шаг квантования зависит от всех строк — компактную копию пересобираю
+        out["compact"] = compact_refs(scaled, refs["storage"])
+    return out
+
+
+def update_references(
+    refs: Dict[str, Any],
+    remove: Sequence[int] = (),
+    class_ids: Sequence[str] = (),
+    rows=None,
+) -> Dict[str, Any]:
+    # NB: Сначала remove (индексы — по текущему набору), потом add.
+    # Скейлинг пересчитывается один раз на весь апдейт.
+    import numpy as np
+
+    n, d = len(refs["class_ids"]), refs["d"]
+    raw = np.asarray(refs["raw"])
+    A = np.asarray(rows if rows is not None else np.zeros((0, d)), dtype=raw.dtype)
+    if A.ndim != 2 or A.shape[0] != len(class_ids):
+        _fail("❌ Reference update: need one class_id per row (rows must be a 2D n×d array)")
+    if A.shape[1] != d:
+        _fail(f"❌ Dimensionality mismatch: refs have d={d}, but new rows have d={A.shape[1]}.")
+    if not np.isfinite(A).all():
+        _fail("❌ New reference rows contain NaN/Inf")
+    for c in class_ids:
+        if not isinstance(c, str) or not c.strip():
+            _fail("❌ class_id of a new reference must be a non-empty string")
+    idx = sorted(set(_indices(remove)))
+    if idx and (idx[0] < 0 or idx[-1] >= n):
+        _fail(f"❌ Reference index out of range: valid 0..{n - 1}")
+    if len(idx) >= n:
+        _fail("❌ Cannot remove all reference rows")
+    if not idx and len(A) == 0:
+        return refs
+
+    scale = refs["scale_info"]["scale"]
+    old_info = refs["scale_info"]
+    labels = list(refs["class_ids"])
+    scaled = np.asarray(refs["scaled"])
+    stats = _stats(refs)
+    if idx:
+        keep = np.ones(n, dtype=bool)
+        keep[idx] = False
+        removed = raw[idx]
+        raw, scaled = raw[keep], scaled[keep]
+        stats = update_stats(scale, stats, removed=removed, remaining=raw)
+        drop = set(idx)
+        labels = [c for i, c in enumerate(labels) if i not in drop]
+    if len(A):
+        stats = update_stats(scale, stats, added=A)
+        raw = np.concatenate([raw, A])
+        if scale != "none":
+            # NB: новые строки — по старым параметрам, дальше общий _refresh
+            scaled = np.concatenate([scaled, transform_matrix(old_info, A)])
+        labels += [c.strip() for c in class_ids]
+    info = _info(scale, stats)
+    if scale == "none":
+        scaled, changed = raw, 0
+    else:
+        changed = _refresh(scaled, raw, old_info, info)
+    out = _rebuild(refs, labels, raw, scaled, info, stats, changed)
+    if refs.get("fingerprint") is not None:
+        out["fingerprint"] = _chain_fingerprint(refs["fingerprint"], idx, list(class_ids), A)
+    return out
+
+
+def add_references(refs: Dict[str, Any], class_ids: Sequence[str], rows) -> Dict[str, Any]:
+    return update_references(refs, class_ids=class_ids, rows=rows)
+
+
+def remove_references(refs: Dict[str, Any], indices: List[int]) -> Dict[str, Any]:
+    return update_references(refs, remove=indices)
@@ -0,0 +1,84 @@
+# NB: Пакетный режим должен давать те же решения, что и одиночные запуски.
+
+from pathlib import Path
+import sys, json
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ml_justify import get_metric, nearest_class  # noqa: E402
+from ml_justify.decision import nearest_classes  # noqa: E402
+from ml_justify.cli import main  # noqa: E402
+from ml_justify.data_io import load_queries  # noqa: E402
+
+
+def test_nearest_classes_matches_single():
+    refs = [[0.0, 0.0], [1.0, 0.0], [0.0, 1.0], [1.0, 1.0]]
+    labels = ["A", "B", "C", "D"]
+    Q = [[0.5, 0.5], [0.9, 0.1], [0.2, 0.9], [5.0, 5.0]]
+    for name in ("L1", "L2", "Linf"):
+        engine, _ = get_metric(name)
+        batch = nearest_classes(Q, refs, labels, engine)
+        assert batch == [nearest_class(q, refs, labels, engine) for q in Q]
+
+
+def test_cli_batch_jsonl(tmp_path):
+    batch = tmp_path / "q.jsonl"
+    batch.write_text(
+        '{"vector": [0.15, 0.15]}\n\n{"vector": [0.9, 0.85]}\n', encoding="utf-8"
+    )
+    out = tmp_path / "out.jsonl"
+    rc = main(
+        [
+            "--refs", str(ROOT / "refs.csv"),
+            "--config", str(ROOT / "config.yaml"),
+            "--batch", str(batch),
+            "--out", str(out),
+        ]
+    )
+    assert rc == 0
+    lines = [json.loads(x) for x in out.read_text(encoding="utf-8").splitlines()]
+    assert [x["summary"]["winner_class_id"] for x in lines] == ["A", "B"]
+    assert [x["index"] for x in lines] == [0, 1]
+
+
+def test_decide_single_pass_matches_parts():
+    from ml_justify.decision import decide, decide_block, build_ranking
+
+    refs = [[0.0, 0.0], [1.0, 0.0], [0.0, 1.0], [1.0, 1.0], [0.0, 0.0]]
+    labels = ["A", "B", "C", "D", "E"]
+    engine, _ = get_metric("L1")
+    for q in ([0.5, 0.5], [0.0, 0.0], [2.0, 0.0]):
+        m, cls, idx, _dists, ranking = decide(q, refs, labels, engine, True, 3)
+        assert (m, cls, idx) == nearest_class(q, refs, labels, engine)
+        assert ranking == build_ranking(labels, refs, q, engine, top_k=3)[1]
+        assert decide_block([q], refs, labels, engine, True, 3) == [(m, cls, idx, ranking)]
+
+
+def test_parallel_block_matches_serial():
+    from ml_justify.decision import decide_block
+    from ml_justify.parallel import decide_block_parallel
+
+    refs = [[float(i % 7), float(i % 5)] for i in range(60)]
+    labels = [f"c{i % 4}" for i in range(60)]
+    Q = [[i / 3.0, (i * 7 % 11) / 2.0] for i in range(25)]
+    engine, _ = get_metric("Linf")
+    serial = decide_block(Q, refs, labels, engine, True, 5)
+    assert decide_block_parallel(Q, refs, labels, engine, 2, True, 5, chunk_rows=4) == serial
+
+
+def test_batch_bad_rows_are_numbered_from_one(tmp_path):
+    import numpy as np
+
+    # NB: вторая строка с NaN — и в .npy, и в .jsonl это «строка 2»
+    Q = [[0.1, 0.2], [float("nan"), 0.5], [0.3, 0.4]]
+    np.save(tmp_path / "q.npy", np.asarray(Q))
+    with pytest.raises(RuntimeError, match=r"row 2 \(array index 1\)"):
+        load_queries(tmp_path / "q.npy", 2)
+    (tmp_path / "q.jsonl").write_text(
+        "\n".join(json.dumps({"vector": v}) for v in Q).replace("NaN", '"nan"'), encoding="utf-8"
+    )
+    with pytest.raises(RuntimeError, match="at line 2"):
+        load_queries(tmp_path / "q.jsonl", 2)
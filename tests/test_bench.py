@@ -0,0 +1,29 @@
+# NB: bench: синтетика читается обычными загрузчиками, отчёт — по всем шагам.
+
+from pathlib import Path
+import json, sys
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ml_justify.cli import main  # noqa: E402
+from ml_justify.data_io import load_refs_array  # noqa: E402
+
+
+def test_bench_command(tmp_path):
+    out = tmp_path / "bench.json"
+    argv = ["bench", "--n", "200", "--d", "3", "--classes", "4", "--n-val", "50"]
+    argv += ["--queries", "20", "--repeat", "1", "--data-dir", str(tmp_path), "--out", str(out)]
+    assert main(argv) == 0
+    report = json.loads(out.read_text(encoding="utf-8"))
+    stages = report["runs"][0]["stages"]
+    assert {"load_refs", "fit_scaling", "nearest_class", "build_ranking", "calibrate"} <= set(stages)
+    assert all(s["seconds"] >= 0 and s["peak_bytes"] >= 0 for s in stages.values())
+
+    labels, raw = load_refs_array(tmp_path / "n200_d3_k4" / "refs.csv")
+    assert raw.shape == (200, 3) and len(set(labels)) <= 4
+
+    argv2 = argv[:-1] + [str(tmp_path / "again.json"), "--compare", str(out)]
+    assert main(argv2) == 0
+    rows = json.loads((tmp_path / "again.json").read_text(encoding="utf-8"))["comparison"]["rows"]
+    assert len(rows) == len(stages)
@@ -0,0 +1,35 @@
+# NB: Кэш решений: повтор — из кэша, ответ тот же; апдейт эталонов — мимо кэша.
+
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ml_justify.cache import QueryCache  # noqa: E402
+from ml_justify.model import Model  # noqa: E402
+
+
+def test_cache_hits_and_invalidation():
+    plain = Model.load(str(ROOT / "config.yaml"), refs_path=str(ROOT / "refs.csv"))
+    model = Model.load(
+        str(ROOT / "config.yaml"), refs_path=str(ROOT / "refs.csv"), cache=QueryCache(1 << 20)
+    )
+    for _ in range(3):
+        assert model.classify([0.15, 0.15], top_k=2) == plain.classify([0.15, 0.15], top_k=2)
+    st = model.cache.stats()
+    assert (st["hits"], st["misses"]) == (2, 1)
+
+    model.update_payload({"add": [{"class_id": "C", "vector": [0.15, 0.15]}]})
+    assert model.classify([0.15, 0.15])["summary"]["winner_class_id"] == "C"
+    assert model.cache.stats()["misses"] == 2
+
+
+def test_cache_budget_and_ttl():
+    cache = QueryCache(max_bytes=2000, ttl=60)
+    for i in range(20):
+        cache.put(cache.key([float(i)], ("L2",)), (0.0, "A", i, None))
+    st = cache.stats()
+    assert st["bytes"] <= 2000 and st["evictions"] > 0
+    assert cache.get(cache.key([19.0], ("L2",))) is not None
+    assert cache.get(cache.key([0.0], ("L2",))) is None
@@ -0,0 +1,90 @@
+# NB: Sweep-калибровка обязана давать ровно то же, что прежний O(n²) перебор.
+
+from pathlib import Path
+import sys, random
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ml_justify.calibrate import sweep_thresholds  # noqa: E402
+
+
+def _legacy(dists, correct, min_coverage):
+    stats = [{"dist": d, "ok": c} for d, c in zip(dists, correct)]
+    dists_sorted = sorted(set(dists))
+    best = None
+    for thr in dists_sorted + [dists_sorted[-1] * 1.01]:
+        decided = [s for s in stats if s["dist"] <= thr]
+        coverage = len(decided) / len(stats)
+        if coverage < min_coverage:
+            continue
+        acc = sum(1 for s in decided if s["ok"]) / len(decided)
+        if best is None or (acc, -thr) > best[2]:
+            best = (float(thr), coverage, (acc, -thr))
+    if best is None:
+        thr = dists_sorted[-1]
+        acc = sum(1 for s in stats if s["ok"]) / len(stats)
+        best = (float(thr), 1.0, (acc, -thr))
+    return best[0], best[1], best[2][0]
+
+
+def test_sweep_matches_legacy_search():
+    rnd = random.Random(7)
+    for trial in range(40):
+        n = rnd.randint(1, 60)
+        # NB: грубая сетка дистанций — много равных значений
+        dists = [rnd.randint(0, 8) / 4 for _ in range(n)]
+        correct = [rnd.random() < 0.7 for _ in range(n)]
+        for cov in (0.0, 0.3, 0.5, 0.9, 1.0, 1.5):
+            got = sweep_thresholds(dists, correct, cov)
+            assert (got["delta"], got["coverage"], got["acc_decided"]) == _legacy(
+                dists, correct, cov
+            )
+
+
+def test_coverage_sweep_grid_and_resampling():
+    from ml_justify.calibrate import coverage_sweep
+
+    rnd = random.Random(3)
+    dists = [rnd.randint(0, 40) / 8 for _ in range(300)]
+    correct = [rnd.random() < 1 - d / 6 for d in dists]
+    grid = [0.0, 0.25, 0.5, 0.8, 0.95, 1.0]
+    out = coverage_sweep(dists, correct, grid)
+    for row, cov in zip(out["grid"], grid):
+        best = sweep_thresholds(dists, correct, cov)
+        assert (row["delta"], row["coverage"]) == (best["delta"], best["coverage"])
+    assert out["curve"]["coverage"][-1] == 1.0
+
+    # NB: перевыборки зависят только от seed, не от числа процессов
+    for method in ("kfold", "bootstrap"):
+        one = coverage_sweep(dists, correct, grid, resample=method, n_boot=20, seed=5)
+        two = coverage_sweep(dists, correct, grid, resample=method, n_boot=20, seed=5, workers=2)
+        assert one == two
+        band = one["grid"][3]["resampled"]["coverage"]
+        assert band["lo"] <= band["mean"] <= band["hi"]
+
+
+def test_validation_nearest_tiles_match_full_matrix(monkeypatch):
+    # NB: мелкие тайлы — много границ тайлов; округлённые координаты — много ничьих
+    import numpy as np
+
+    from ml_justify import metrics
+    from ml_justify.calibrate import validation_nearest
+    from ml_justify.storage import compact_refs
+
+    monkeypatch.setattr(metrics, "TILE_ELEMS", 64)
+    monkeypatch.setattr(metrics, "TILE_REFS", 7)
+    rng = np.random.default_rng(0)
+    R = np.round(rng.random((200, 3)), 1)
+    V = np.round(rng.random((90, 3)), 1)
+    labels = [f"c{i % 4}" for i in range(200)]
+    val_labels = [f"c{i % 3}" for i in range(90)]
+    for name in ("L1", "L2", "Linf"):
+        engine = metrics.get_metric(name)[0]
+        D = engine.pairwise(V, R)
+        k = D.argmin(axis=1)
+        for refs in (R, compact_refs(R, "int8")):
+            dists, correct, predicted = validation_nearest(labels, refs, val_labels, V, engine)
+            assert np.array_equal(dists, D[np.arange(90), k])
+            assert list(predicted) == [labels[i] for i in k]
+            assert list(correct) == [labels[i] == y for i, y in zip(k, val_labels)]
@@ -0,0 +1,81 @@
+# NB: condense: на самих эталонах решения сжатого набора те же, что у полного.
+
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.cli import main  # noqa: E402
+from ml_justify.condense import compare_decisions, condense_references  # noqa: E402
+from ml_justify.decision import nearest_classes  # noqa: E402
+from ml_justify.metrics import get_metric  # noqa: E402
+from ml_justify.data_io import load_refs_array  # noqa: E402
+
+
+def test_condensed_set_keeps_decisions_on_refs():
+    rng = np.random.default_rng(0)
+    centers = rng.random((3, 4))
+    y = rng.integers(0, 3, 600)
+    X = centers[y] + rng.normal(scale=0.1, size=(600, 4))
+    labels = [f"c{k}" for k in y]
+    metric_fn, _ = get_metric("L2")
+    for delta in (None, 0.25):
+        for reduce in (False, True):
+            res = condense_references(labels, X, metric_fn, delta, reduce=reduce)
+            keep = res["keep"]
+            assert 0 < res["n_kept"] < 600
+            small = [labels[i] for i in keep]
+            for i, (m, c, _j) in enumerate(nearest_classes(X, X[keep], small, metric_fn)):
+                assert c == labels[i] and (delta is None or m <= delta)
+            cmp = compare_decisions(labels, X, keep, X, None, metric_fn, delta)
+            assert cmp["changed"] == 0
+
+
+def test_condense_ties_follow_original_index():
+    # NB: решётка — сплошные ничьи; S сравнивается по (дистанция, индекс), как
+    # nearest_class на сжатом наборе, поэтому каждый эталон сохраняет свой класс
+    for seed in range(5):
+        rng = np.random.default_rng(seed)
+        X = np.unique(rng.integers(0, 6, (150, 2)), axis=0).astype(float)
+        rng.shuffle(X)
+        labels = [f"c{int(k)}" for k in X[:, 0] + rng.integers(0, 2, len(X)) > 3]
+        for name in ("L1", "Linf"):
+            metric_fn, _ = get_metric(name)
+            res = condense_references(labels, X, metric_fn, None, max_passes=50)
+            assert res["converged"]
+            keep = res["keep"]
+            small = [labels[i] for i in keep]
+            got = [c for _m, c, _j in nearest_classes(X, X[keep], small, metric_fn)]
+            assert got == labels
+
+
+def test_condense_reports_unconverged_passes():
+    rng = np.random.default_rng(0)
+    X = rng.random((400, 2))
+    labels = [f"c{k}" for k in rng.integers(0, 2, 400)]
+    metric_fn, _ = get_metric("L2")
+    short = condense_references(labels, X, metric_fn, None, max_passes=1)
+    assert short["passes"] == 1 and not short["converged"]
+    assert condense_references(labels, X, metric_fn, None, max_passes=50)["converged"]
+
+
+def test_condense_command(tmp_path):
+    out = tmp_path / "small.csv"
+    argv = [
+        "condense",
+        "--refs",
+        str(ROOT / "refs.csv"),
+        "--config",
+        str(ROOT / "config.yaml"),
+        "--val",
+        str(ROOT / "val.csv"),
+        "--out",
+        str(out),
+    ]
+    assert main(argv) == 0
+    labels, _raw = load_refs_array(out)
+    assert sorted(set(labels)) == ["A", "B"]
+    assert (tmp_path / "small.scaler.json").exists()
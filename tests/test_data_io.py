@@ -0,0 +1,68 @@
+# NB: Потоковые загрузчики обязаны совпадать со списочными, включая ошибки.
+
+from pathlib import Path
+import sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ml_justify import load_refs_csv, load_val_csv  # noqa: E402
+from ml_justify.data_io import load_refs_array, load_val_array  # noqa: E402
+
+DIRTY = """class_id,p1,p2
+A,0.1,0.2
+
+A,0.2,x
+,0.5,0.5
+B,0.9,nan
+B,0.8,0.9
+C,1e3,-2
+"""
+
+
+def test_refs_array_matches_lists_non_strict(tmp_path):
+    path = tmp_path / "refs.csv"
+    path.write_text(DIRTY, encoding="utf-8")
+    ids, vecs = load_refs_csv(path, strict=False)
+    for chunk_rows in (1, 2, 1000):
+        ids2, X = load_refs_array(path, strict=False, chunk_rows=chunk_rows)
+        assert ids2 == ids == ["A", "B", "C"]
+        assert X.tolist() == vecs
+
+
+def test_refs_array_strict_errors_keep_line_numbers(tmp_path):
+    path = tmp_path / "refs.csv"
+    path.write_text(DIRTY, encoding="utf-8")
+    with pytest.raises(RuntimeError, match="refs line 4"):
+        load_refs_csv(path, strict=True)
+    with pytest.raises(RuntimeError, match="refs line 4"):
+        load_refs_array(path, strict=True, chunk_rows=3)
+
+
+def test_val_array_matches_lists(tmp_path):
+    ys, X = load_val_csv(ROOT / "val.csv", expected_dim=2)
+    ys2, X2 = load_val_array(ROOT / "val.csv", expected_dim=2, chunk_rows=3)
+    assert ys2 == ys and X2.tolist() == X
+    X32 = load_val_array(ROOT / "val.csv", expected_dim=2, dtype="float32")[1]
+    assert X32.dtype.name == "float32"
+
+    bad = tmp_path / "val.csv"
+    bad.write_text("class_id,p1,p2\nA,1,2\nB,1,inf\n", encoding="utf-8")
+    with pytest.raises(RuntimeError, match="NaN/inf in val at line 3"):
+        load_val_array(bad, expected_dim=2)
+
+
+def test_fast_parser_matches_python_path(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "refs.csv"
+    path.write_text("class_id,p1,p2\n A ,0.1,2e-3\n\nB,1,-0.5\n", encoding="utf-8")
+    fast = load_refs_array(path, parser="pyarrow")
+    slow = load_refs_array(path, parser="python")
+    assert fast[0] == slow[0] == ["A", "B"]
+    assert fast[1].tolist() == slow[1].tolist()
+    # NB: «грязный» файл уходит на обычный путь — с тем же номером строки
+    path.write_text(DIRTY, encoding="utf-8")
+    with pytest.raises(RuntimeError, match="refs line 4"):
+        load_refs_array(path, strict=True, parser="pyarrow")
@@ -0,0 +1,37 @@
+# NB: Ранний выход по частичной дистанции — то же, что полный перебор.
+
+from pathlib import Path
+import sys, math
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from ml_justify.cli import main  # noqa: E402
+from ml_justify.decision import nearest_classes  # noqa: E402
+from ml_justify.early_exit import PartialDistanceSearch  # noqa: E402
+from ml_justify.metrics import get_metric  # noqa: E402
+
+
+def test_early_exit_matches_full_scan():
+    rng = np.random.default_rng(5)
+    R = rng.standard_normal((800, 70)) * rng.random(70)
+    R[3] = R[11]  # NB: дубликаты — tie-first
+    Q = np.vstack([rng.standard_normal((20, 70)), R[[3, 11]]])
+    labels = [f"c{i % 6}" for i in range(len(R))]
+    search = PartialDistanceSearch.build(R)
+    for name in ("L1", "L2", "Linf"):
+        engine, _ = get_metric(name)
+        full = nearest_classes(Q, R, labels, engine)
+        assert nearest_classes(Q, R, labels, engine, tree=search) == full
+        delta = float(np.median([m for m, _c, _i in full]))
+        got = nearest_classes(Q, R, labels, engine, tree=search, max_dist=delta)
+        assert got == [r if r[0] <= delta else (math.inf, None, -1) for r in full]
+
+
+def test_cli_early_exit_requires_batch(tmp_path):
+    base = ["--refs", str(ROOT / "refs.csv"), "--query", str(ROOT / "q.json"), "--config", str(ROOT / "config.yaml")]
+    with pytest.raises(RuntimeError, match="--early-exit requires --batch"):
+        main([*base, "--early-exit", "--out", str(tmp_path / "r.json")])
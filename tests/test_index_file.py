@@ -0,0 +1,64 @@
+# NB: Индекс должен отдавать ровно то же, что csv + apply_scaling.
+
+from pathlib import Path
+import sys, json
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ml_justify import load_refs_csv, apply_scaling  # noqa: E402
+from ml_justify.cli import main  # noqa: E402
+from ml_justify.index_file import build_index, open_index  # noqa: E402
+
+
+def test_index_roundtrip(tmp_path):
+    idx_path = tmp_path / "refs.idx"
+    build_index(ROOT / "refs.csv", idx_path, "standard")
+    index = open_index(idx_path)
+
+    class_ids, refs = load_refs_csv(ROOT / "refs.csv")
+    refs_s, _q, info = apply_scaling("standard", refs, refs[0])
+    assert list(index["class_ids"]) == class_ids
+    assert index["raw"].tolist() == refs
+    assert index["scaled"].tolist() == refs_s
+    assert index["scale_info"] == info
+
+
+def test_cli_with_index_matches_csv(tmp_path):
+    idx_path = tmp_path / "refs.idx"
+    cfg = str(ROOT / "config.yaml")
+    base = ["--refs", str(ROOT / "refs.csv"), "--query", str(ROOT / "q.json"), "--config", cfg]
+    assert main(["build-index", *base[:2], "--config", cfg, "--out", str(idx_path)]) == 0
+    assert main([*base, "--out", str(tmp_path / "a.json")]) == 0
+    assert main([*base, "--index", str(idx_path), "--out", str(tmp_path / "b.json")]) == 0
+    a = json.loads((tmp_path / "a.json").read_text(encoding="utf-8"))
+    b = json.loads((tmp_path / "b.json").read_text(encoding="utf-8"))
+    for key in ("summary", "ranking", "scaling", "query"):
+        assert a[key] == b[key]
+
+    # NB: строгость задана при сборке: совпадающий флаг можно, противоположный — ошибка
+    assert main([*base, "--index", str(idx_path), "--strict", "--out", str(tmp_path / "c.json")]) == 0
+    with pytest.raises(RuntimeError, match="built with strict=True"):
+        main([*base, "--index", str(idx_path), "--no-strict", "--out", str(tmp_path / "d.json")])
+
+
+def test_parallel_workers_reopen_index_mmap(tmp_path):
+    # NB: матрица индекса не копируется в shared memory — воркеры открывают файл сами
+    from ml_justify.metrics import as_matrix, get_metric
+    from ml_justify.parallel import _share, decide_block_parallel
+
+    idx_path = tmp_path / "refs.idx"
+    build_index(ROOT / "refs.csv", idx_path, "minmax")
+    index = open_index(idx_path)
+    R = index["scaled"]
+    spec, shm = _share(R, as_matrix(R))
+    assert spec["kind"] == "memmap" and shm is None
+
+    labels = list(index["class_ids"])
+    engine, _ = get_metric("L2")
+    Q = as_matrix(R) + 0.01
+    assert decide_block_parallel(Q, R, labels, engine, 2) == decide_block_parallel(
+        Q, R, labels, engine, 1
+    )
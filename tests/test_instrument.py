@@ -0,0 +1,55 @@
+# NB: --timings: блок timings в result.json, хук профилировщика видит каждый шаг.
+
+from pathlib import Path
+import json, sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ml_justify.cli import main  # noqa: E402
+from ml_justify.instrument import (  # noqa: E402
+    NULL_TIMER,
+    add_profiler_hook,
+    make_timer,
+    remove_profiler_hook,
+)
+
+
+def _run(out, *extra):
+    argv = ["--refs", str(ROOT / "refs.csv"), "--query", str(ROOT / "q.json")]
+    argv += ["--config", str(ROOT / "config.yaml"), "--out", str(out), *extra]
+    assert main(argv) == 0
+    return json.loads(out.read_text(encoding="utf-8"))
+
+
+def test_timings_block_and_profiler_hook(tmp_path):
+    assert make_timer() is NULL_TIMER
+    assert "timings" not in _run(tmp_path / "plain.json")
+
+    events = []
+    hook = lambda event, step, rec: events.append((event, step))  # noqa: E731
+    add_profiler_hook(hook)
+    try:
+        # NB: один хук (без --timings) — шаги видит, но result.json прежний
+        assert "timings" not in _run(tmp_path / "hooked.json")
+        assert events[-1] == ("end", "7_write")
+        events.clear()
+        res = _run(tmp_path / "timed.json", "--timings", "--timings-memory")
+    finally:
+        remove_profiler_hook(hook)
+    steps = res["timings"]["steps"]
+    assert [s["step"] for s in steps] == ["1_config", "2_load", "3_scale", "5_decide"]
+    assert steps[1]["rows"] == 4
+    assert all(s["wall_s"] >= 0 and s["cpu_s"] >= 0 and s["peak_bytes"] >= 0 for s in steps)
+    # NB: запись result.json — последний шаг, в сам файл не попадает, но хук его видит
+    assert events[-2:] == [("start", "7_write"), ("end", "7_write")]
+
+
+def test_timings_memory_stops_tracing_on_error(tmp_path):
+    import tracemalloc
+
+    with pytest.raises(RuntimeError):
+        _run(tmp_path / "bad.json", "--timings-memory", "--query", str(tmp_path / "missing.json"))
+    assert not tracemalloc.is_tracing()
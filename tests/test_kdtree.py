@@ -0,0 +1,39 @@
+# NB: KD-дерево обязано совпадать с полным перебором, включая tie_break: first.
+
+from pathlib import Path
+import sys, math, random
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ml_justify import get_metric, nearest_class  # noqa: E402
+from ml_justify.cli import main  # noqa: E402
+from ml_justify.kdtree import KDTree  # noqa: E402
+
+
+def test_kdtree_matches_bruteforce_with_ties():
+    rnd = random.Random(3)
+    # NB: целочисленная решётка — много равных дистанций и дубликатов
+    refs = [[float(rnd.randint(0, 4)) for _ in range(3)] for _ in range(300)]
+    labels = [f"c{i % 7}" for i in range(len(refs))]
+    Q = [[rnd.randint(-1, 5) + rnd.choice((0.0, 0.5)) for _ in range(3)] for _ in range(60)]
+    tree = KDTree.build(refs, leaf_size=4)
+    for name in ("L1", "L2", "Linf"):
+        engine, _ = get_metric(name)
+        for q in Q:
+            exact = nearest_class(q, refs, labels, engine)
+            assert nearest_class(q, refs, labels, engine, tree=tree) == exact
+            for thr in (0.0, 0.5, 1.0):
+                got = nearest_class(q, refs, labels, engine, tree=tree, max_dist=thr)
+                if exact[0] <= thr:
+                    assert got == exact
+                else:
+                    assert got == (math.inf, None, -1)
+
+
+def test_cli_tree_requires_batch(tmp_path):
+    base = ["--refs", str(ROOT / "refs.csv"), "--query", str(ROOT / "q.json"), "--config", str(ROOT / "config.yaml")]
+    with pytest.raises(RuntimeError, match="--tree requires --batch"):
+        main([*base, "--tree", "--out", str(tmp_path / "r.json")])
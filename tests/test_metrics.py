@@ -0,0 +1,67 @@
+# NB: Матричный движок должен совпадать с попарными l1/l2/linf.
+
+from pathlib import Path
+import sys, random
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ml_justify import get_metric, l1, l2, linf, nearest_class  # noqa: E402
+
+
+def _rand(n, d, seed=0):
+    rnd = random.Random(seed)
+    return [[rnd.uniform(-1, 1) for _ in range(d)] for _ in range(n)]
+
+
+def test_engine_matches_pair_functions():
+    refs = _rand(50, 7)
+    Q = _rand(5, 7, seed=1)
+    for name, fn in (("L1", l1), ("L2", l2), ("Linf", linf)):
+        engine, _ = get_metric(name)
+        assert engine(Q[0], refs[0]) == fn(Q[0], refs[0])
+        one = engine.to_refs(Q[0], refs)
+        block = engine.pairwise(Q, refs)
+        assert block.shape == (5, 50)
+        for i, q in enumerate(Q):
+            for j, r in enumerate(refs):
+                assert abs(block[i, j] - fn(q, r)) < 1e-12
+        for j, r in enumerate(refs):
+            assert abs(one[j] - fn(Q[0], r)) < 1e-12
+
+
+def test_nearest_class_tie_first():
+    refs = [[1.0, 0.0], [0.0, 1.0], [-1.0, 0.0]]
+    for name in ("L1", "L2", "Linf"):
+        engine, _ = get_metric(name)
+        m, cls, idx = nearest_class([0.0, 0.0], refs, ["A", "B", "C"], engine)
+        assert (m, cls, idx) == (1.0, "A", 0)
+
+
+def test_exact_ties_match_pair_functions():
+    # NB: решётка с шагом 0.5 — все суммы точны, ничьи настоящие: движок обязан
+    # давать те же дистанции бит в бит и того же (первого) победителя
+    rnd = random.Random(11)
+    refs = [[rnd.randint(-3, 3) * 0.5 for _ in range(4)] for _ in range(200)]
+    labels = [f"c{i % 5}" for i in range(len(refs))]
+    Q = [[rnd.randint(-4, 4) * 0.5 for _ in range(4)] for _ in range(50)]
+    for name, fn in (("L1", l1), ("L2", l2), ("Linf", linf)):
+        engine, _ = get_metric(name)
+        for q in Q:
+            dists = [fn(q, r) for r in refs]
+            m = min(dists)
+            assert engine.to_refs(q, refs).tolist() == dists
+            assert nearest_class(q, refs, labels, engine) == (m, labels[dists.index(m)], dists.index(m))
+
+
+def test_top_k_ranking_is_prefix_of_full_sort():
+    from ml_justify import build_ranking
+
+    rnd = random.Random(5)
+    refs = [[float(rnd.randint(0, 3)), float(rnd.randint(0, 3))] for _ in range(40)]
+    labels = [str(i % 3) for i in range(40)]
+    engine, _ = get_metric("L1")
+    _, full = build_ranking(labels, refs, [1.0, 1.0], engine)
+    for k in (1, 5, 13, 40, 100):
+        _, top = build_ranking(labels, refs, [1.0, 1.0], engine, top_k=k)
+        assert top == full[:k]
@@ -0,0 +1,33 @@
+# NB: Потоковый писатель: тот же результат, что json.dump словаря целиком.
+
+from pathlib import Path
+import sys, json
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ml_justify.cli import main  # noqa: E402
+from ml_justify.result_io import read_result  # noqa: E402
+
+
+def test_formats_roundtrip(tmp_path):
+    base = [
+        "--refs", str(ROOT / "refs.csv"),
+        "--query", str(ROOT / "q.json"),
+        "--config", str(ROOT / "config.yaml"),
+        "--with-distances",
+    ]
+    got = {}
+    for fmt in ("pretty", "compact", "npz"):
+        out = tmp_path / f"result.{fmt}"
+        main(base + ["--format", fmt, "--out", str(out)])
+        got[fmt] = read_result(out)
+    assert got["pretty"] == got["compact"] == got["npz"]
+    text = (tmp_path / "result.pretty").read_text(encoding="utf-8")
+    assert text == json.dumps(got["pretty"], ensure_ascii=False, indent=2)
+    assert next(iter(got["pretty"])) == "summary"
+    assert len(got["pretty"]["ranking"]) == len(got["pretty"]["distances"]) == 4
+
+    out = tmp_path / "short.json"
+    main(base[:6] + ["--no-ranking", "--out", str(out)])
+    assert "ranking" not in read_result(out)
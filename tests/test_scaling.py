@@ -0,0 +1,36 @@
+# NB: Scaler: один проход блоками = прежние формулы; save/load — без повторного fit.
+
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify import scaling  # noqa: E402
+from ml_justify.scaling import Scaler, apply_scaling  # noqa: E402
+
+
+def test_scaler_matches_list_path_and_reloads(tmp_path, monkeypatch):
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(50, 3))
+    X[:, 2] = 7.0  # NB: нулевой размах/std — защита как у списочных функций
+    q = X[0].tolist()
+    for scale in ("minmax", "standard"):
+        ref_s, q_s, info = apply_scaling(scale, X.tolist(), q)
+        sc = Scaler(scale).fit(X)
+        assert np.allclose(sc.transform(X), ref_s, rtol=0, atol=1e-12)
+        assert sc.info == info and sc.transform_vector(q) == q_s
+
+        # NB: мелкие блоки — тот же результат, что и одним куском
+        monkeypatch.setattr(scaling, "FIT_BLOCK_ELEMS", 21)
+        chunked = Scaler(scale).fit(X)
+        monkeypatch.undo()
+        for k, v in sc.params.items():
+            assert np.allclose(chunked.params[k], v, rtol=1e-12, atol=1e-12)
+
+        sc.save(tmp_path / "scaler.json")
+        again = Scaler.load(tmp_path / "scaler.json")
+        assert again.info == sc.info and again.stats == sc.stats
+        assert np.array_equal(again.transform(X), sc.transform(X))
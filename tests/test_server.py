@@ -0,0 +1,158 @@
+# NB: Сервер отвечает тем же, что пишет CLI в result.json.
+
+from pathlib import Path
+import sys, json, socket, threading, http.client
+from contextlib import contextmanager
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ml_justify.cli import main  # noqa: E402
+from ml_justify.model import Model  # noqa: E402
+from ml_justify.server import make_server  # noqa: E402
+
+
+def test_serve_matches_cli(tmp_path):
+    model = Model.load(str(ROOT / "config.yaml"), refs_path=str(ROOT / "refs.csv"))
+    srv = make_server(model, port=0)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    try:
+        conn = http.client.HTTPConnection(*srv.server_address[:2])
+        conn.request("POST", "/classify", json.dumps({"vector": [0.15, 0.15]}))
+        resp = conn.getresponse()
+        got = json.loads(resp.read())
+        assert resp.status == 200
+        conn.request("POST", "/classify", json.dumps({"vector": [1.0]}))
+        bad = conn.getresponse()
+        assert bad.status == 400 and "Dimensionality" in json.loads(bad.read())["error"]
+        for top_k in ([2], {"k": 2}, "2", True):
+            conn.request("POST", "/classify", json.dumps({"vector": [0.15, 0.15], "top_k": top_k}))
+            bad = conn.getresponse()
+            assert bad.status == 400 and "top_k" in json.loads(bad.read())["error"]
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+    out = tmp_path / "r.json"
+    main(
+        [
+            "--refs", str(ROOT / "refs.csv"),
+            "--query", str(ROOT / "q.json"),
+            "--config", str(ROOT / "config.yaml"),
+            "--out", str(out),
+        ]
+    )
+    expected = json.loads(out.read_text(encoding="utf-8"))
+    for key in ("config", "scaling", "query", "summary", "ranking"):
+        assert got[key] == expected[key]
+
+
+def test_micro_batch_matches_single():
+    import asyncio
+    from ml_justify.microbatch import MicroBatcher
+
+    model = Model.load(str(ROOT / "config.yaml"), refs_path=str(ROOT / "refs.csv"))
+    vectors = [[0.15, 0.15], [0.9, 0.8], [0.5, 0.1], [3.0, 3.0]]
+
+    async def run():
+        b = MicroBatcher(model, window_ms=20, max_batch=3)
+        await b.start()
+        try:
+            got = await asyncio.gather(
+                *[b.classify({"vector": v, "top_k": 2}) for v in vectors]
+            )
+        finally:
+            await b.stop()
+        return got, b.batches
+
+    got, batches = asyncio.run(run())
+    assert batches == 2
+    assert got == [model.classify(v, top_k=2) for v in vectors]
+
+
+@contextmanager
+def _serving(model, front):
+    # NB: (host, port) одного из фронтов: "serve" (потоки) или "micro" (asyncio)
+    if front == "serve":
+        srv = make_server(model, port=0)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        try:
+            yield srv.server_address[:2]
+        finally:
+            srv.shutdown()
+            srv.server_close()
+        return
+    import asyncio
+    from ml_justify.microbatch import start_async_server
+
+    loop = asyncio.new_event_loop()
+    srv, batcher = loop.run_until_complete(start_async_server(model, port=0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    async def stop():
+        srv.close()
+        await srv.wait_closed()
+        await batcher.stop()
+
+    try:
+        yield srv.sockets[0].getsockname()[:2]
+    finally:
+        asyncio.run_coroutine_threadsafe(stop(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
+
+
+def _raw(addr, request: bytes):
+    # NB: сырой HTTP — чтобы слать и заведомо кривые заголовки; -> (код, json)
+    with socket.create_connection(addr, timeout=5) as sock:
+        sock.sendall(request)
+        f = sock.makefile("rb")
+        code = int(f.readline().split()[1])
+        n = 0
+        for line in iter(f.readline, b"\r\n"):
+            k, _, v = line.decode("latin-1").partition(":")
+            if k.strip().lower() == "content-length":
+                n = int(v)
+        return code, json.loads(f.read(n))
+
+
+def _post(addr, path: str, payload):
+    body = json.dumps(payload).encode("utf-8")
+    return _raw(addr, b"POST %s HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (path.encode(), len(body), body))
+
+
+def test_refs_add_must_be_a_list():
+    for front in ("serve", "micro"):
+        model = Model.load(str(ROOT / "config.yaml"), refs_path=str(ROOT / "refs.csv"))
+        with _serving(model, front) as addr:
+            code, got = _post(addr, "/refs", {"add": 5})
+            assert code == 400 and '"add" must be a list' in got["error"], front
+            code, got = _post(addr, "/refs", {"add": None})  # NB: null — как пустой список
+            assert code == 200 and got["n_refs"] == 4, front
+
+
+def test_bad_requests_get_same_400_from_both_fronts():
+    # NB: кривой payload/Content-Length — одинаковый 400 от serve и micro-batch
+    bad = [
+        (b"POST /classify HTTP/1.1\r\nContent-Length: abc\r\n\r\n"),
+        (b"POST /classify HTTP/1.1\r\nContent-Length: -1\r\n\r\n"),
+    ]
+    payloads = [
+        ("/refs", {"add": 5}),
+        ("/refs", {"remove": [[1]]}),
+        ("/refs", {"add": [{"class_id": "C", "vector": {"x": 1}}]}),
+        ("/classify", {"vector": [0.15, 0.15], "top_k": [2]}),
+        ("/classify", {"vector": 5}),
+        ("/classify", [1, 2]),
+    ]
+    answers = {}
+    for front in ("serve", "micro"):
+        model = Model.load(str(ROOT / "config.yaml"), refs_path=str(ROOT / "refs.csv"))
+        with _serving(model, front) as addr:
+            answers[front] = [_raw(addr, r) for r in bad] + [_post(addr, *p) for p in payloads]
+            assert _post(addr, "/classify", {"vector": [0.15, 0.15]})[0] == 200
+        assert len(model.refs["class_ids"]) == 4
+    assert all(code == 400 for code, _ in answers["serve"])
+    assert answers["serve"] == answers["micro"]
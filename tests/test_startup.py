@@ -0,0 +1,60 @@
+# NB: Быстрый старт: ленивый пакет, кэш разобранного YAML, одиночная
+# классификация не грузит калибровку/график/pyarrow/PyYAML.
+
+from pathlib import Path
+import json, os, shutil, subprocess, sys
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ml_justify import calibrate, cli  # noqa: E402
+from ml_justify.config import cache_path, read_config  # noqa: E402
+
+OPTIONAL = [
+    "yaml",
+    "pyarrow",
+    "ml_justify.calibrate",
+    "ml_justify.plot2d",
+    "ml_justify.kdtree",
+]
+
+
+def _loaded(code, cwd):
+    env = dict(os.environ, PYTHONPATH=str(ROOT), ML_JUSTIFY_CACHE_DIR=str(cwd / "cache"))
+    probe = f"import json, sys; {code}; print(json.dumps([m for m in {OPTIONAL!r} if m in sys.modules]))"
+    out = subprocess.run(
+        [sys.executable, "-c", probe], cwd=cwd, env=env, check=True, capture_output=True, text=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_yaml_config_cache(tmp_path, monkeypatch):
+    pytest.importorskip("yaml")
+    monkeypatch.setenv("ML_JUSTIFY_CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "config.yaml"
+    path.write_text("metric: L1\ndelta_max: 0.5\nscale: minmax\n", encoding="utf-8")
+    cfg = read_config(path)
+    assert cache_path(path.read_bytes()).exists()
+    assert read_config(path) == cfg
+    # NB: рядом с конфигом ничего не пишу
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cache", "config.yaml"]
+
+    # NB: та же длина и тот же mtime — ключ по содержимому всё равно другой
+    st = path.stat()
+    path.write_text("metric: L1\ndelta_max: 0.4\nscale: minmax\n", encoding="utf-8")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert read_config(path)["delta_max"] == 0.4
+    assert read_config(path, cache=False)["delta_max"] == 0.4
+
+
+def test_classify_path_skips_optional_subsystems(tmp_path):
+    pytest.importorskip("yaml")
+    for name in ("refs.csv", "q.json", "config.yaml"):
+        shutil.copy(ROOT / name, tmp_path / name)
+    assert _loaded("import ml_justify; ml_justify.Scaler", tmp_path) == []
+    run = "from ml_justify.cli import main; main(['--out', 'result.json'])"
+    assert _loaded(run, tmp_path) == ["yaml"]  # NB: первый запуск — разбор YAML
+    assert _loaded(run, tmp_path) == []
+    assert cli.RESAMPLING is calibrate.RESAMPLING
@@ -0,0 +1,39 @@
+# NB: Компактное хранение не должно менять ни одного решения/ranking.
+
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.decision import decide_block  # noqa: E402
+from ml_justify.metrics import get_metric  # noqa: E402
+from ml_justify.storage import CompactRefs  # noqa: E402
+
+
+def test_compact_matches_full():
+    rng = np.random.default_rng(3)
+    R = rng.random((500, 12))
+    R[10] = R[20]  # NB: дубликаты — проверка tie-first
+    Q = np.vstack([rng.random((30, 12)), R[[10, 20, 7]], R[[3]] + 1e-12])
+    labels = [f"c{i % 4}" for i in range(len(R))]
+    for name in ("L1", "L2", "Linf"):
+        engine, _ = get_metric(name)
+        want = decide_block(Q, R, labels, engine, True, 5)
+        for kind in ("float32", "int8"):
+            C = CompactRefs.build(R, kind)
+            assert decide_block(Q, C, labels, engine, True, 5) == want
+
+
+def test_int8_large_feature_offsets():
+    # NB: признаки ~1e6: float32-шаг там 0.0625 — offset/step обязаны быть float64
+    rng = np.random.default_rng(0)
+    R = 1e6 + 0.03 + rng.random((3000, 3)) * 0.5
+    Q = 1e6 + 0.03 + rng.random((300, 3)) * 0.5
+    labels = [f"c{i % 5}" for i in range(len(R))]
+    C = CompactRefs.build(R, "int8")
+    for name in ("L1", "L2", "Linf"):
+        engine, _ = get_metric(name)
+        assert decide_block(Q, C, labels, engine) == decide_block(Q, R, labels, engine)
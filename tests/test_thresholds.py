@@ -0,0 +1,54 @@
+# NB: Пороги по классам: конфиг -> решение (порог класса-победителя) и калибровка.
+
+from pathlib import Path
+import json, sys
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from ml_justify.calibrate import calibrate_delta, calibrated_thresholds  # noqa: E402
+from ml_justify.metrics import get_metric  # noqa: E402
+from ml_justify.model import Model  # noqa: E402
+
+
+def test_per_class_thresholds_in_decision(tmp_path):
+    cfg = {"metric": "L2", "delta_max": 0.5, "scale": "minmax", "delta_max_per_class": {"B": 0.01}}
+    (tmp_path / "cfg.json").write_text(json.dumps(cfg), encoding="utf-8")
+    model = Model.load(str(tmp_path / "cfg.json"), refs_path=str(ROOT / "refs.csv"))
+    # NB: около A — общий порог 0.5, около B — свой узкий 0.01
+    a = model.classify([0.15, 0.15])
+    b = model.classify([0.85, 0.85])
+    assert a["summary"]["decision"] == "class" and a["summary"]["delta_max"] == 0.5
+    assert b["summary"]["decision"] == "undecided" and b["summary"]["delta_max"] == 0.01
+    assert b["config"]["delta_max_per_class"] == {"B": 0.01}
+    assert [r["summary"] for r in model.classify_batch([[0.15, 0.15], [0.85, 0.85]])] == [
+        a["summary"],
+        b["summary"],
+    ]
+    # NB: апдейт эталонов — пороги перепривязываются к новым строкам в новом
+    # снимке; старый снимок (его мог взять параллельный запрос) не трогается
+    old, shared = model.refs, model.delta_max
+    model.update_payload({"remove": [0]})
+    assert model.classify([0.85, 0.85])["summary"]["delta_max"] == 0.01
+    assert model.delta_max is shared
+    assert len(old["thresholds"].by_ref) == 4 and len(model.refs["thresholds"].by_ref) == 3
+    assert model._thresholds(old) is old["thresholds"]
+
+
+def test_calibrate_per_class():
+    rng = np.random.default_rng(0)
+    # NB: «узкий» класс a и «широкий» b
+    refs = np.vstack([rng.normal(0, 0.05, (50, 2)), rng.normal(3, 0.5, (50, 2))])
+    labels = ["a"] * 50 + ["b"] * 50
+    val = np.vstack([rng.normal(0, 0.05, (100, 2)), rng.normal(3, 0.5, (100, 2))])
+    val_labels = ["a"] * 100 + ["b"] * 100
+    metric_fn, _ = get_metric("L2")
+    info = calibrate_delta(labels, refs, val_labels, val, metric_fn, 0.9, per_class=True)
+    pc = info["per_class"]
+    assert set(pc) == {"a", "b"} and pc["a"]["delta"] < pc["b"]["delta"]
+    assert all(row["coverage"] >= 0.9 for row in pc.values())
+    assert info["per_class_coverage"] >= 0.9
+    thr = calibrated_thresholds(info).bind(labels)
+    assert thr.for_winner(0, "a") == pc["a"]["delta"] and thr.for_winner(99, "b") == pc["b"]["delta"]
@@ -0,0 +1,74 @@
+# NB: Инкрементальные add/remove должны давать то же, что полная пересборка.
+
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from ml_justify.cli import main  # noqa: E402
+from ml_justify.index_file import build_index, open_index  # noqa: E402
+from ml_justify.updates import remove_references  # noqa: E402
+
+
+def _write(path, labels, X):
+    with path.open("w", encoding="utf-8") as f:
+        f.write("class_id," + ",".join(f"p{j + 1}" for j in range(X.shape[1])) + "\n")
+        for c, row in zip(labels, X.tolist()):
+            f.write(c + "," + ",".join(map(repr, row)) + "\n")
+
+
+def test_update_index_matches_rebuild(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.random((40, 3))
+    labels = [f"c{i % 3}" for i in range(40)]
+    _write(tmp_path / "base.csv", labels[:30], X[:30])
+    _write(tmp_path / "new.csv", labels[30:], X[30:])
+    removed = [0, 5, int(X[:30, 1].argmax())]  # NB: среди удалённых — max столбца
+    keep = [i for i in range(30) if i not in removed] + list(range(30, 40))
+    _write(tmp_path / "full.csv", [labels[i] for i in keep], X[keep])
+
+    for scale in ("minmax", "standard"):
+        idx = tmp_path / f"{scale}.idx"
+        build_index(tmp_path / "base.csv", idx, scale)
+        main(
+            [
+                "update-index", "--index", str(idx),
+                "--remove", ",".join(map(str, removed)),
+                "--add", str(tmp_path / "new.csv"),
+            ]
+        )
+        got = open_index(idx)
+        build_index(tmp_path / "full.csv", tmp_path / "ref.idx", scale)
+        want = open_index(tmp_path / "ref.idx")
+        assert list(got["class_ids"]) == list(want["class_ids"])
+        assert np.array_equal(got["raw"], want["raw"])
+        assert got["fingerprint"] == want["fingerprint"]
+        assert np.allclose(got["scaled"], want["scaled"], rtol=0, atol=1e-12)
+        if scale == "minmax":
+            assert got["scale_info"] == want["scale_info"]
+
+
+def test_model_update_payload():
+    from ml_justify.model import Model
+
+    model = Model.load(str(ROOT / "config.yaml"), refs_path=str(ROOT / "refs.csv"))
+    n = len(model.refs["class_ids"])
+    out = model.update_payload(
+        {"remove": [0], "add": [{"class_id": "C", "vector": [0.15, 0.15]}]}
+    )
+    assert out["n_refs"] == n
+    res = model.classify([0.15, 0.15])
+    assert res["summary"]["winner_class_id"] == "C"
+    assert res["summary"]["min_distance"] == 0.0
+
+    # NB: кривые индексы — RuntimeError (сервер отвечает 400), набор не меняется
+    before = model.refs
+    for remove in (["a"], [[1]], [1.5], [True], "0", 3):
+        with pytest.raises(RuntimeError, match="remove"):
+            model.update_payload({"remove": remove})
+    assert model.refs is before
+    assert remove_references(before, [np.int64(0)])["class_ids"] == before["class_ids"][1:]